@@ -7,7 +7,7 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm, call_llm_batched, submit_llm_task
 import math
 
 
@@ -17,6 +17,10 @@ class BenGrahamSignal(BaseModel):
     reasoning: str
 
 
+class BenGrahamSignals(BaseModel):
+    signals: dict[str, BenGrahamSignal]
+
+
 def ben_graham_agent(state: AgentState):
     """
     Analyzes stocks using Benjamin Graham's classic value-investing principles:
@@ -31,6 +35,8 @@ def ben_graham_agent(state: AgentState):
 
     analysis_data = {}
     graham_analysis = {}
+    llm_futures = {}
+    batch_llm_prompts = state["metadata"].get("batch_llm_prompts", False)
 
     for ticker in tickers:
         progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
@@ -67,13 +73,27 @@ def ben_graham_agent(state: AgentState):
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
         progress.update_status("ben_graham_agent", ticker, "Generating Graham-style analysis")
-        graham_output = generate_graham_output(
-            ticker=ticker,
+        if not batch_llm_prompts:
+            # Run the LLM calls concurrently; each prompt sees the analysis gathered up to its ticker, as before
+            llm_futures[ticker] = submit_llm_task(
+                generate_graham_output,
+                ticker=ticker,
+                analysis_data=dict(analysis_data),
+                model_name=state["metadata"]["model_name"],
+                model_provider=state["metadata"]["model_provider"],
+            )
+
+    if batch_llm_prompts:
+        # One prompt per batch of tickers, each ticker with only its own analysis
+        outputs = generate_graham_output_batch(
             analysis_data=analysis_data,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    else:
+        outputs = {ticker: future.result() for ticker, future in llm_futures.items()}
 
+    for ticker, graham_output in outputs.items():
         graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done")
@@ -276,6 +296,17 @@ def analyze_valuation_graham(metrics: list, financial_line_items: list, market_c
     return {"score": score, "details": "; ".join(details)}
 
 
+SYSTEM_PROMPT = """You are a Benjamin Graham AI agent, making investment decisions using his principles:
+            1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
+            2. Emphasize the company's financial strength (low leverage, ample current assets).
+            3. Prefer stable earnings over multiple years.
+            4. Consider dividend record for extra safety.
+            5. Avoid speculative or high-growth assumptions; focus on proven metrics.
+                        
+            Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and concise reasoning.
+            """
+
+
 def generate_graham_output(
     ticker: str,
     analysis_data: dict[str, any],
@@ -291,15 +322,7 @@ def generate_graham_output(
     template = ChatPromptTemplate.from_messages([
         (
             "system",
-            """You are a Benjamin Graham AI agent, making investment decisions using his principles:
-            1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
-            2. Emphasize the company's financial strength (low leverage, ample current assets).
-            3. Prefer stable earnings over multiple years.
-            4. Consider dividend record for extra safety.
-            5. Avoid speculative or high-growth assumptions; focus on proven metrics.
-                        
-            Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and concise reasoning.
-            """
+            SYSTEM_PROMPT
         ),
         (
             "human",
@@ -333,4 +356,57 @@ def generate_graham_output(
         pydantic_model=BenGrahamSignal,
         agent_name="ben_graham_agent",
         default_factory=create_default_ben_graham_signal,
+        ticker=ticker,
+    )
+
+
+def generate_graham_output_batch(
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, BenGrahamSignal]:
+    """
+    Gets investment decisions for several tickers at once: one prompt carries a batch of tickers'
+    analysis, with batches sized to the prompt token budget.
+    """
+    template = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            """Based on the following analysis, create a Graham-style investment signal for each of these tickers: {tickers}.
+
+            Analysis Data by ticker:
+            {analysis_data}
+
+            Return the trading signals in this JSON format, with one entry per ticker:
+            {{
+              "signals": {{
+                "TICKER": {{
+                  "signal": "bullish/bearish/neutral",
+                  "confidence": float (0-100),
+                  "reasoning": "string"
+                }}
+              }}
+            }}
+            """
+        )
+    ])
+
+    def render_prompt(batch: dict[str, any]):
+        return template.invoke({
+            "analysis_data": json.dumps(batch, indent=2),
+            "tickers": ", ".join(batch)
+        })
+
+    def create_default_ben_graham_signal():
+        return BenGrahamSignal(signal="neutral", confidence=0.0, reasoning="Error in generating analysis; defaulting to neutral.")
+
+    return call_llm_batched(
+        analysis_data=analysis_data,
+        render_prompt=render_prompt,
+        model_name=model_name,
+        model_provider=model_provider,
+        container_model=BenGrahamSignals,
+        agent_name="ben_graham_agent",
+        default_factory=create_default_ben_graham_signal,
     )
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm, call_llm_batched, submit_llm_task
 
 class BillAckmanSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -15,6 +15,10 @@ class BillAckmanSignal(BaseModel):
     reasoning: str
 
 
+class BillAckmanSignals(BaseModel):
+    signals: dict[str, BillAckmanSignal]
+
+
 def bill_ackman_agent(state: AgentState):
     """
     Analyzes stocks using Bill Ackman's investing principles and LLM reasoning.
@@ -26,6 +30,8 @@ def bill_ackman_agent(state: AgentState):
     
     analysis_data = {}
     ackman_analysis = {}
+    llm_futures = {}
+    batch_llm_prompts = state["metadata"].get("batch_llm_prompts", False)
     
     for ticker in tickers:
         progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
@@ -85,13 +91,27 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Generating Ackman analysis")
-        ackman_output = generate_ackman_output(
-            ticker=ticker, 
+        if not batch_llm_prompts:
+            # Run the LLM calls concurrently; each prompt sees the analysis gathered up to its ticker, as before
+            llm_futures[ticker] = submit_llm_task(
+                generate_ackman_output,
+                ticker=ticker, 
+                analysis_data=dict(analysis_data),
+                model_name=state["metadata"]["model_name"],
+                model_provider=state["metadata"]["model_provider"],
+            )
+
+    if batch_llm_prompts:
+        # One prompt per batch of tickers, each ticker with only its own analysis
+        outputs = generate_ackman_output_batch(
             analysis_data=analysis_data,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
-        
+    else:
+        outputs = {ticker: future.result() for ticker, future in llm_futures.items()}
+
+    for ticker, ackman_output in outputs.items():
         ackman_analysis[ticker] = {
             "signal": ackman_output.signal,
             "confidence": ackman_output.confidence,
@@ -336,19 +356,7 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
-def generate_ackman_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    model_name: str,
-    model_provider: str,
-) -> BillAckmanSignal:
-    """
-    Generates investment decisions in the style of Bill Ackman.
-    """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Bill Ackman AI agent, making investment decisions using his principles:
+SYSTEM_PROMPT = """You are a Bill Ackman AI agent, making investment decisions using his principles:
 
             1. Seek high-quality businesses with durable competitive advantages (moats).
             2. Prioritize consistent free cash flow and growth potential.
@@ -364,6 +372,21 @@ def generate_ackman_output(
             - Buy at a discount to intrinsic value; higher discount => stronger conviction.
             - Engage if management is suboptimal or if there's a path for strategic improvements.
             - Provide a rational, data-driven recommendation (bullish, bearish, or neutral)."""
+
+
+def generate_ackman_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> BillAckmanSignal:
+    """
+    Generates investment decisions in the style of Bill Ackman.
+    """
+    template = ChatPromptTemplate.from_messages([
+        (
+            "system",
+            SYSTEM_PROMPT
         ),
         (
             "human",
@@ -401,4 +424,61 @@ def generate_ackman_output(
         pydantic_model=BillAckmanSignal, 
         agent_name="bill_ackman_agent", 
         default_factory=create_default_bill_ackman_signal,
+        ticker=ticker,
+    )
+
+
+def generate_ackman_output_batch(
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, BillAckmanSignal]:
+    """
+    Gets investment decisions for several tickers at once: one prompt carries a batch of tickers'
+    analysis, with batches sized to the prompt token budget.
+    """
+    template = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            """Based on the following analysis, create an Ackman-style investment signal for each of these tickers: {tickers}.
+
+            Analysis Data by ticker:
+            {analysis_data}
+
+            Return the trading signals in this JSON format, with one entry per ticker:
+            {{
+              "signals": {{
+                "TICKER": {{
+                  "signal": "bullish/bearish/neutral",
+                  "confidence": float (0-100),
+                  "reasoning": "string"
+                }}
+              }}
+            }}
+            """
+        )
+    ])
+
+    def render_prompt(batch: dict[str, any]):
+        return template.invoke({
+            "analysis_data": json.dumps(batch, indent=2),
+            "tickers": ", ".join(batch)
+        })
+
+    def create_default_bill_ackman_signal():
+        return BillAckmanSignal(
+            signal="neutral",
+            confidence=0.0,
+            reasoning="Error in analysis, defaulting to neutral"
+        )
+
+    return call_llm_batched(
+        analysis_data=analysis_data,
+        render_prompt=render_prompt,
+        model_name=model_name,
+        model_provider=model_provider,
+        container_model=BillAckmanSignals,
+        agent_name="bill_ackman_agent",
+        default_factory=create_default_bill_ackman_signal,
     )
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm, call_llm_batched, submit_llm_task
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -15,6 +15,10 @@ class CathieWoodSignal(BaseModel):
     reasoning: str
 
 
+class CathieWoodSignals(BaseModel):
+    signals: dict[str, CathieWoodSignal]
+
+
 def cathie_wood_agent(state: AgentState):
     """
     Analyzes stocks using Cathie Wood's investing principles and LLM reasoning.
@@ -29,6 +33,8 @@ def cathie_wood_agent(state: AgentState):
 
     analysis_data = {}
     cw_analysis = {}
+    llm_futures = {}
+    batch_llm_prompts = state["metadata"].get("batch_llm_prompts", False)
 
     for ticker in tickers:
         progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
@@ -92,13 +98,27 @@ def cathie_wood_agent(state: AgentState):
         }
 
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood style analysis")
-        cw_output = generate_cathie_wood_output(
-            ticker=ticker,
+        if not batch_llm_prompts:
+            # Run the LLM calls concurrently; each prompt sees the analysis gathered up to its ticker, as before
+            llm_futures[ticker] = submit_llm_task(
+                generate_cathie_wood_output,
+                ticker=ticker,
+                analysis_data=dict(analysis_data),
+                model_name=state["metadata"]["model_name"],
+                model_provider=state["metadata"]["model_provider"],
+            )
+
+    if batch_llm_prompts:
+        # One prompt per batch of tickers, each ticker with only its own analysis
+        outputs = generate_cathie_wood_output_batch(
             analysis_data=analysis_data,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    else:
+        outputs = {ticker: future.result() for ticker, future in llm_futures.items()}
 
+    for ticker, cw_output in outputs.items():
         cw_analysis[ticker] = {
             "signal": cw_output.signal,
             "confidence": cw_output.confidence,
@@ -412,19 +432,7 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
     }
 
 
-def generate_cathie_wood_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    model_name: str,
-    model_provider: str,
-) -> CathieWoodSignal:
-    """
-    Generates investment decisions in the style of Cathie Wood.
-    """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Cathie Wood AI agent, making investment decisions using her principles:\n\n"
+SYSTEM_PROMPT = """You are a Cathie Wood AI agent, making investment decisions using her principles:\n\n"
             "1. Seek companies leveraging disruptive innovation.\n"
             "2. Emphasize exponential growth potential, large TAM.\n"
             "3. Focus on technology, healthcare, or other future-facing sectors.\n"
@@ -437,6 +445,21 @@ def generate_cathie_wood_output(
             "- Check if the company can scale effectively in a large market.\n"
             "- Use a growth-biased valuation approach.\n"
             "- Provide a data-driven recommendation (bullish, bearish, or neutral)."""
+
+
+def generate_cathie_wood_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> CathieWoodSignal:
+    """
+    Generates investment decisions in the style of Cathie Wood.
+    """
+    template = ChatPromptTemplate.from_messages([
+        (
+            "system",
+            SYSTEM_PROMPT
         ),
         (
             "human",
@@ -467,6 +490,63 @@ def generate_cathie_wood_output(
         pydantic_model=CathieWoodSignal,
         agent_name="cathie_wood_agent",
         default_factory=create_default_cathie_wood_signal,
+        ticker=ticker,
+    )
+
+
+def generate_cathie_wood_output_batch(
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, CathieWoodSignal]:
+    """
+    Gets investment decisions for several tickers at once: one prompt carries a batch of tickers'
+    analysis, with batches sized to the prompt token budget.
+    """
+    template = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            """Based on the following analysis, create a Cathie Wood-style investment signal for each of these tickers: {tickers}.
+
+            Analysis Data by ticker:
+            {analysis_data}
+
+            Return the trading signals in this JSON format, with one entry per ticker:
+            {{
+              "signals": {{
+                "TICKER": {{
+                  "signal": "bullish/bearish/neutral",
+                  "confidence": float (0-100),
+                  "reasoning": "string"
+                }}
+              }}
+            }}
+            """
+        )
+    ])
+
+    def render_prompt(batch: dict[str, any]):
+        return template.invoke({
+            "analysis_data": json.dumps(batch, indent=2),
+            "tickers": ", ".join(batch)
+        })
+
+    def create_default_cathie_wood_signal():
+        return CathieWoodSignal(
+            signal="neutral",
+            confidence=0.0,
+            reasoning="Error in analysis, defaulting to neutral"
+        )
+
+    return call_llm_batched(
+        analysis_data=analysis_data,
+        render_prompt=render_prompt,
+        model_name=model_name,
+        model_provider=model_provider,
+        container_model=CathieWoodSignals,
+        agent_name="cathie_wood_agent",
+        default_factory=create_default_cathie_wood_signal,
     )
 
 # source: https://ark-invest.com
\ No newline at end of file
@@ -30,6 +30,9 @@ def crypto_risk_manager(state: AgentState):
     symbols = state["data"]["symbols"]
     risk_analysis = {}
     crypto_api = CryptoAPI()
+
+    # 一次请求获取所有交易对的24h行情
+    market_snapshot = crypto_api.get_market_snapshot(symbols)
     
     for symbol in symbols:
         progress.update_status("crypto_risk_manager", symbol, "分析风险")
@@ -45,7 +48,7 @@ def crypto_risk_manager(state: AgentState):
             continue
             
         # 获取当前市场数据
-        market_data = crypto_api.get_market_data(symbol)
+        market_data = market_snapshot.get(symbol, {})
         
         # 计算波动率
         volatility = calculate_volatility(df)
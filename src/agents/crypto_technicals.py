@@ -1,7 +1,7 @@
 from graph.state import AgentState
 import pandas as pd
 import numpy as np
-import talib
+from utils import ta
 from utils.progress import progress
 from tools.api import CryptoAPI
 
@@ -20,24 +20,27 @@ def crypto_technical_agent(state: AgentState):
     }
     primary_timeframe = "1h"  # 主要分析周期
     
+    # 先拉取所有交易对、所有周期的K线
+    symbol_frames = {}
     for symbol in symbols:
         progress.update_status("crypto_technical_agent", symbol, "分析价格数据")
         
-        signals = {}
-        # 获取不同时间周期的数据
-        for timeframe, description in timeframes.items():
-            df = crypto_api.get_crypto_prices(
-                symbol, 
-                data["start_date"],
-                data["end_date"],
-                interval=timeframe
-            )
-            
-            if df.empty:
-                continue
-                
-            # 计算技术指标
-            signals[timeframe] = calculate_crypto_signals(df)
+        # 获取不同时间周期的数据（只拉取1h，4h/1d在本地聚合）
+        frames = crypto_api.get_crypto_prices_multi(
+            symbol,
+            data["start_date"],
+            data["end_date"],
+            intervals=list(timeframes)
+        )
+        symbol_frames[symbol] = {timeframe: frames[timeframe] for timeframe in timeframes if not frames[timeframe].empty}
+    
+    # 所有交易对×周期的技术指标一次批量计算
+    keys = [(symbol, timeframe) for symbol, frames in symbol_frames.items() for timeframe in frames]
+    batch_signals = calculate_crypto_signals_batch([symbol_frames[symbol][timeframe] for symbol, timeframe in keys])
+    signals_by_key = dict(zip(keys, batch_signals))
+    
+    for symbol, frames in symbol_frames.items():
+        signals = {timeframe: signals_by_key[(symbol, timeframe)] for timeframe in frames}
         
         # 生成综合交易信号
         signal = generate_trading_signal(signals, primary_timeframe)
@@ -57,32 +60,20 @@ def crypto_technical_agent(state: AgentState):
 
 def calculate_crypto_signals(df: pd.DataFrame) -> dict:
     """计算加密货币技术指标"""
-    signals = {}
-    
-    # RSI
-    signals['rsi'] = talib.RSI(df['close'])
-    
-    # MACD
-    macd, signal, hist = talib.MACD(df['close'])
-    signals['macd'] = macd
-    signals['macd_signal'] = signal
-    signals['macd_hist'] = hist
-    
-    # Bollinger Bands
-    upper, middle, lower = talib.BBANDS(df['close'])
-    signals['bb_upper'] = upper
-    signals['bb_middle'] = middle
-    signals['bb_lower'] = lower
-    
-    # 成交量分析
-    signals['volume_sma'] = talib.SMA(df['volume'], timeperiod=20)
-    
-    # 额外的加密货币特定指标
-    signals['atr'] = talib.ATR(df['high'], df['low'], df['close'], timeperiod=14)  # 平均真实范围
-    signals['obv'] = talib.OBV(df['close'], df['volume'])  # 能量潮指标
-    signals['adx'] = talib.ADX(df['high'], df['low'], df['close'], timeperiod=14)  # 趋向指标
-    
-    return signals
+    return calculate_crypto_signals_batch([df])[0]
+
+def calculate_crypto_signals_batch(frames: list[pd.DataFrame]) -> list[dict]:
+    """批量计算多组K线的技术指标：所有序列左对齐堆叠后一次计算（安装了talib时使用talib，否则使用NumPy实现）"""
+    if not frames:
+        return []
+    columns = {name: ta.stack_left([df[name].to_numpy(dtype=np.float64) for df in frames]) for name in ("high", "low", "close", "volume")}
+    indicators = ta.indicator_set(**columns)
+    
+    # RSI, MACD, 布林带, 成交量均线, ATR(平均真实范围), OBV(能量潮指标), ADX(趋向指标)
+    return [
+        {name: pd.Series(values[i, :len(df)], index=df.index) for name, values in indicators.items()}
+        for i, df in enumerate(frames)
+    ]
 
 def generate_trading_signal(signals: dict, primary_tf: str) -> dict:
     """根据多个时间周期的技术指标生成交易信号"""
@@ -1,5 +1,3 @@
-import math
-
 from langchain_core.messages import HumanMessage
 
 from graph.state import AgentState, show_agent_reasoning
@@ -8,7 +6,9 @@ import json
 import pandas as pd
 import numpy as np
 
-from tools.api import get_prices, prices_to_df
+from tools.api import get_prices, prices_to_view_df
+from utils import indicators
+from utils.indicators import IndicatorTimeline, compute_indicator_panel, latest_values
 from utils.progress import progress
 
 
@@ -30,37 +30,51 @@ def technical_analyst_agent(state: AgentState):
     # Initialize analysis for each ticker
     technical_analysis = {}
 
+    # Get the historical price data for every ticker
+    prices = {}
+    ticker_values = {}
     for ticker in tickers:
         progress.update_status("technical_analyst_agent", ticker, "Analyzing price data")
 
-        # Get the historical price data
-        prices = get_prices(
+        # Backtests precompute every day's indicator values; serve those without touching prices
+        if _timeline is not None and (values := _timeline.get(ticker, start_date, end_date)) is not None:
+            ticker_values[ticker] = values
+            continue
+
+        ticker_prices = get_prices(
             ticker=ticker,
             start_date=start_date,
             end_date=end_date,
         )
 
-        if not prices:
+        if not ticker_prices:
             progress.update_status("technical_analyst_agent", ticker, "Failed: No price data found")
             continue
 
-        # Convert prices to a DataFrame
-        prices_df = prices_to_df(prices)
+        prices[ticker] = prices_to_view_df(ticker_prices)
+
+    # Compute the indicators of every ticker in one pass over a (bar x ticker) panel
+    if prices:
+        panel = compute_indicator_panel(prices)
+        ticker_values.update({ticker: latest_values(panel, ticker) for ticker in prices})
+
+    for ticker in [ticker for ticker in tickers if ticker in ticker_values]:
+        values = ticker_values[ticker]
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating trend signals")
-        trend_signals = calculate_trend_signals(prices_df)
+        trend_signals = trend_signals_from_values(values)
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating mean reversion")
-        mean_reversion_signals = calculate_mean_reversion_signals(prices_df)
+        mean_reversion_signals = mean_reversion_signals_from_values(values)
 
         progress.update_status("technical_analyst_agent", ticker, "Calculating momentum")
-        momentum_signals = calculate_momentum_signals(prices_df)
+        momentum_signals = momentum_signals_from_values(values)
 
         progress.update_status("technical_analyst_agent", ticker, "Analyzing volatility")
-        volatility_signals = calculate_volatility_signals(prices_df)
+        volatility_signals = volatility_signals_from_values(values)
 
         progress.update_status("technical_analyst_agent", ticker, "Statistical analysis")
-        stat_arb_signals = calculate_stat_arb_signals(prices_df)
+        stat_arb_signals = stat_arb_signals_from_values(values)
 
         # Combine all signals using a weighted ensemble approach
         strategy_weights = {
@@ -135,29 +149,53 @@ def technical_analyst_agent(state: AgentState):
     }
 
 
+# Precomputed indicator values of a backtest's daily windows, consulted before any price data is loaded
+_timeline: IndicatorTimeline | None = None
+
+
+def set_technical_timeline(timeline: IndicatorTimeline | None):
+    """Serve the technical analyst's indicator values from a precomputed timeline (None stops it)."""
+    global _timeline
+    _timeline = timeline
+
+
+def build_technical_timeline(tickers: list[str], windows: list[tuple[str, str]]) -> IndicatorTimeline:
+    """Precompute the indicator values of every ticker for every (start_date, end_date) window."""
+    prices = {}
+    for ticker in tickers:
+        for start_date, end_date in windows:
+            ticker_prices = get_prices(ticker=ticker, start_date=start_date, end_date=end_date)
+            if ticker_prices:
+                prices[(ticker, start_date, end_date)] = prices_to_view_df(ticker_prices)
+    return IndicatorTimeline.build(prices)
+
+
+def _latest_indicator_values(prices_df: pd.DataFrame) -> dict[str, float]:
+    return latest_values(compute_indicator_panel({"": prices_df}), "")
+
+
 def calculate_trend_signals(prices_df):
     """
     Advanced trend following strategy using multiple timeframes and indicators
     """
-    # Calculate EMAs for multiple timeframes
-    ema_8 = calculate_ema(prices_df, 8)
-    ema_21 = calculate_ema(prices_df, 21)
-    ema_55 = calculate_ema(prices_df, 55)
+    return trend_signals_from_values(_latest_indicator_values(prices_df))
 
-    # Calculate ADX for trend strength
-    adx = calculate_adx(prices_df, 14)
 
+def trend_signals_from_values(values: dict[str, float]):
+    """
+    Trend signal from the latest EMA 8/21/55 and ADX values
+    """
     # Determine trend direction and strength
-    short_trend = ema_8 > ema_21
-    medium_trend = ema_21 > ema_55
+    short_trend = values["ema_8"] > values["ema_21"]
+    medium_trend = values["ema_21"] > values["ema_55"]
 
     # Combine signals with confidence weighting
-    trend_strength = adx["adx"].iloc[-1] / 100.0
+    trend_strength = values["adx"] / 100.0
 
-    if short_trend.iloc[-1] and medium_trend.iloc[-1]:
+    if short_trend and medium_trend:
         signal = "bullish"
         confidence = trend_strength
-    elif not short_trend.iloc[-1] and not medium_trend.iloc[-1]:
+    elif not short_trend and not medium_trend:
         signal = "bearish"
         confidence = trend_strength
     else:
@@ -168,7 +206,7 @@ def calculate_trend_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "adx": float(adx["adx"].iloc[-1]),
+            "adx": float(values["adx"]),
             "trend_strength": float(trend_strength),
         },
     }
@@ -178,28 +216,25 @@ def calculate_mean_reversion_signals(prices_df):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
     """
-    # Calculate z-score of price relative to moving average
-    ma_50 = prices_df["close"].rolling(window=50).mean()
-    std_50 = prices_df["close"].rolling(window=50).std()
-    z_score = (prices_df["close"] - ma_50) / std_50
+    return mean_reversion_signals_from_values(_latest_indicator_values(prices_df))
 
-    # Calculate Bollinger Bands
-    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
 
-    # Calculate RSI with multiple timeframes
-    rsi_14 = calculate_rsi(prices_df, 14)
-    rsi_28 = calculate_rsi(prices_df, 28)
+def mean_reversion_signals_from_values(values: dict[str, float]):
+    """
+    Mean reversion signal from the latest z-score, Bollinger Bands and RSI values
+    """
+    z_score = values["z_score"]
 
     # Mean reversion signals
-    price_vs_bb = (prices_df["close"].iloc[-1] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
+    price_vs_bb = (values["close"] - values["bb_lower"]) / (values["bb_upper"] - values["bb_lower"])
 
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score < -2 and price_vs_bb < 0.2:
         signal = "bullish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+        confidence = min(abs(z_score) / 4, 1.0)
+    elif z_score > 2 and price_vs_bb > 0.8:
         signal = "bearish"
-        confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
+        confidence = min(abs(z_score) / 4, 1.0)
     else:
         signal = "neutral"
         confidence = 0.5
@@ -208,10 +243,10 @@ def calculate_mean_reversion_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "z_score": float(z_score.iloc[-1]),
+            "z_score": float(z_score),
             "price_vs_bb": float(price_vs_bb),
-            "rsi_14": float(rsi_14.iloc[-1]),
-            "rsi_28": float(rsi_28.iloc[-1]),
+            "rsi_14": float(values["rsi_14"]),
+            "rsi_28": float(values["rsi_28"]),
         },
     }
 
@@ -220,24 +255,18 @@ def calculate_momentum_signals(prices_df):
     """
     Multi-factor momentum strategy
     """
-    # Price momentum
-    returns = prices_df["close"].pct_change()
-    mom_1m = returns.rolling(21).sum()
-    mom_3m = returns.rolling(63).sum()
-    mom_6m = returns.rolling(126).sum()
-
-    # Volume momentum
-    volume_ma = prices_df["volume"].rolling(21).mean()
-    volume_momentum = prices_df["volume"] / volume_ma
+    return momentum_signals_from_values(_latest_indicator_values(prices_df))
 
-    # Relative strength
-    # (would compare to market/sector in real implementation)
 
+def momentum_signals_from_values(values: dict[str, float]):
+    """
+    Momentum signal from the latest 1/3/6 month returns and volume momentum
+    """
     # Calculate momentum score
-    momentum_score = (0.4 * mom_1m + 0.3 * mom_3m + 0.3 * mom_6m).iloc[-1]
+    momentum_score = 0.4 * values["mom_1m"] + 0.3 * values["mom_3m"] + 0.3 * values["mom_6m"]
 
     # Volume confirmation
-    volume_confirmation = volume_momentum.iloc[-1] > 1.0
+    volume_confirmation = values["volume_momentum"] > 1.0
 
     if momentum_score > 0.05 and volume_confirmation:
         signal = "bullish"
@@ -253,10 +282,10 @@ def calculate_momentum_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "momentum_1m": float(mom_1m.iloc[-1]),
-            "momentum_3m": float(mom_3m.iloc[-1]),
-            "momentum_6m": float(mom_6m.iloc[-1]),
-            "volume_momentum": float(volume_momentum.iloc[-1]),
+            "momentum_1m": float(values["mom_1m"]),
+            "momentum_3m": float(values["mom_3m"]),
+            "momentum_6m": float(values["mom_6m"]),
+            "volume_momentum": float(values["volume_momentum"]),
         },
     }
 
@@ -265,26 +294,15 @@ def calculate_volatility_signals(prices_df):
     """
     Volatility-based trading strategy
     """
-    # Calculate various volatility metrics
-    returns = prices_df["close"].pct_change()
-
-    # Historical volatility
-    hist_vol = returns.rolling(21).std() * math.sqrt(252)
+    return volatility_signals_from_values(_latest_indicator_values(prices_df))
 
-    # Volatility regime detection
-    vol_ma = hist_vol.rolling(63).mean()
-    vol_regime = hist_vol / vol_ma
 
-    # Volatility mean reversion
-    vol_z_score = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
-
-    # ATR ratio
-    atr = calculate_atr(prices_df)
-    atr_ratio = atr / prices_df["close"]
-
-    # Generate signal based on volatility regime
-    current_vol_regime = vol_regime.iloc[-1]
-    vol_z = vol_z_score.iloc[-1]
+def volatility_signals_from_values(values: dict[str, float]):
+    """
+    Volatility signal from the latest volatility regime, volatility z-score and ATR ratio
+    """
+    current_vol_regime = values["vol_regime"]
+    vol_z = values["vol_z_score"]
 
     if current_vol_regime < 0.8 and vol_z < -1:
         signal = "bullish"  # Low vol regime, potential for expansion
@@ -300,10 +318,10 @@ def calculate_volatility_signals(prices_df):
         "signal": signal,
         "confidence": confidence,
         "metrics": {
-            "historical_volatility": float(hist_vol.iloc[-1]),
+            "historical_volatility": float(values["hist_vol"]),
             "volatility_regime": float(current_vol_regime),
             "volatility_z_score": float(vol_z),
-            "atr_ratio": float(atr_ratio.iloc[-1]),
+            "atr_ratio": float(values["atr_ratio"]),
         },
     }
 
@@ -312,24 +330,21 @@ def calculate_stat_arb_signals(prices_df):
     """
     Statistical arbitrage signals based on price action analysis
     """
-    # Calculate price distribution statistics
-    returns = prices_df["close"].pct_change()
-
-    # Skewness and kurtosis
-    skew = returns.rolling(63).skew()
-    kurt = returns.rolling(63).kurt()
+    return stat_arb_signals_from_values(_latest_indicator_values(prices_df))
 
-    # Test for mean reversion using Hurst exponent
-    hurst = calculate_hurst_exponent(prices_df["close"])
 
-    # Correlation analysis
-    # (would include correlation with related securities in real implementation)
+def stat_arb_signals_from_values(values: dict[str, float]):
+    """
+    Statistical arbitrage signal from the latest skewness, kurtosis and Hurst exponent
+    """
+    hurst = values["hurst"]
+    skew = values["skew"]
 
     # Generate signal based on statistical properties
-    if hurst < 0.4 and skew.iloc[-1] > 1:
+    if hurst < 0.4 and skew > 1:
         signal = "bullish"
         confidence = (0.5 - hurst) * 2
-    elif hurst < 0.4 and skew.iloc[-1] < -1:
+    elif hurst < 0.4 and skew < -1:
         signal = "bearish"
         confidence = (0.5 - hurst) * 2
     else:
@@ -341,8 +356,8 @@ def calculate_stat_arb_signals(prices_df):
         "confidence": confidence,
         "metrics": {
             "hurst_exponent": float(hurst),
-            "skewness": float(skew.iloc[-1]),
-            "kurtosis": float(kurt.iloc[-1]),
+            "skewness": float(skew),
+            "kurtosis": float(values["kurt"]),
         },
     }
 
@@ -396,22 +411,11 @@ def normalize_pandas(obj):
 
 
 def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
-    delta = prices_df["close"].diff()
-    gain = (delta.where(delta > 0, 0)).fillna(0)
-    loss = (-delta.where(delta < 0, 0)).fillna(0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return indicators.rsi(prices_df["close"], period)
 
 
 def calculate_bollinger_bands(prices_df: pd.DataFrame, window: int = 20) -> tuple[pd.Series, pd.Series]:
-    sma = prices_df["close"].rolling(window).mean()
-    std_dev = prices_df["close"].rolling(window).std()
-    upper_band = sma + (std_dev * 2)
-    lower_band = sma - (std_dev * 2)
-    return upper_band, lower_band
+    return indicators.bollinger_bands(prices_df["close"], window)
 
 
 def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
@@ -425,7 +429,7 @@ def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     Returns:
         pd.Series: EMA values
     """
-    return df["close"].ewm(span=window, adjust=False).mean()
+    return indicators.ema(df["close"], window)
 
 
 def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
@@ -433,32 +437,13 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     Calculate Average Directional Index (ADX)
 
     Args:
-        df: DataFrame with OHLC data
+        df: DataFrame with OHLC data (not modified)
         period: Period for calculations
 
     Returns:
         DataFrame with ADX values
     """
-    # Calculate True Range
-    df["high_low"] = df["high"] - df["low"]
-    df["high_close"] = abs(df["high"] - df["close"].shift())
-    df["low_close"] = abs(df["low"] - df["close"].shift())
-    df["tr"] = df[["high_low", "high_close", "low_close"]].max(axis=1)
-
-    # Calculate Directional Movement
-    df["up_move"] = df["high"] - df["high"].shift()
-    df["down_move"] = df["low"].shift() - df["low"]
-
-    df["plus_dm"] = np.where((df["up_move"] > df["down_move"]) & (df["up_move"] > 0), df["up_move"], 0)
-    df["minus_dm"] = np.where((df["down_move"] > df["up_move"]) & (df["down_move"] > 0), df["down_move"], 0)
-
-    # Calculate ADX
-    df["+di"] = 100 * (df["plus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["-di"] = 100 * (df["minus_dm"].ewm(span=period).mean() / df["tr"].ewm(span=period).mean())
-    df["dx"] = 100 * abs(df["+di"] - df["-di"]) / (df["+di"] + df["-di"])
-    df["adx"] = df["dx"].ewm(span=period).mean()
-
-    return df[["adx", "+di", "-di"]]
+    return pd.DataFrame(indicators.adx(df["high"], df["low"], df["close"], period))
 
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
@@ -472,38 +457,4 @@ def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     Returns:
         pd.Series: ATR values
     """
-    high_low = df["high"] - df["low"]
-    high_close = abs(df["high"] - df["close"].shift())
-    low_close = abs(df["low"] - df["close"].shift())
-
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-
-    return true_range.rolling(period).mean()
-
-
-def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> float:
-    """
-    Calculate Hurst Exponent to determine long-term memory of time series
-    H < 0.5: Mean reverting series
-    H = 0.5: Random walk
-    H > 0.5: Trending series
-
-    Args:
-        price_series: Array-like price data
-        max_lag: Maximum lag for R/S calculation
-
-    Returns:
-        float: Hurst exponent
-    """
-    lags = range(2, max_lag)
-    # Add small epsilon to avoid log(0)
-    tau = [max(1e-8, np.sqrt(np.std(np.subtract(price_series[lag:], price_series[:-lag])))) for lag in lags]
-
-    # Return the Hurst exponent from linear fit
-    try:
-        reg = np.polyfit(np.log(lags), np.log(tau), 1)
-        return reg[0]  # Hurst exponent is the slope
-    except (ValueError, RuntimeWarning):
-        # Return 0.5 (random walk) if calculation fails
-        return 0.5
+    return indicators.atr(df["high"], df["low"], df["close"], period)
@@ -5,7 +5,7 @@ from pydantic import BaseModel
 import json
 from typing_extensions import Literal
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
-from utils.llm import call_llm
+from utils.llm import call_llm, call_llm_batched, submit_llm_task
 from utils.progress import progress
 
 
@@ -15,6 +15,10 @@ class WarrenBuffettSignal(BaseModel):
     reasoning: str
 
 
+class WarrenBuffettSignals(BaseModel):
+    signals: dict[str, WarrenBuffettSignal]
+
+
 def warren_buffett_agent(state: AgentState):
     """Analyzes stocks using Buffett's principles and LLM reasoning."""
     data = state["data"]
@@ -24,6 +28,8 @@ def warren_buffett_agent(state: AgentState):
     # Collect all analysis for LLM reasoning
     analysis_data = {}
     buffett_analysis = {}
+    llm_futures = {}
+    batch_llm_prompts = state["metadata"].get("batch_llm_prompts", False)
 
     for ticker in tickers:
         progress.update_status("warren_buffett_agent", ticker, "Fetching financial metrics")
@@ -96,13 +102,27 @@ def warren_buffett_agent(state: AgentState):
         }
 
         progress.update_status("warren_buffett_agent", ticker, "Generating Buffett analysis")
-        buffett_output = generate_buffett_output(
-            ticker=ticker,
+        if not batch_llm_prompts:
+            # Run the LLM calls concurrently; each prompt sees the analysis gathered up to its ticker, as before
+            llm_futures[ticker] = submit_llm_task(
+                generate_buffett_output,
+                ticker=ticker,
+                analysis_data=dict(analysis_data),
+                model_name=state["metadata"]["model_name"],
+                model_provider=state["metadata"]["model_provider"],
+            )
+
+    if batch_llm_prompts:
+        # One prompt per batch of tickers, each ticker with only its own analysis
+        outputs = generate_buffett_output_batch(
             analysis_data=analysis_data,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    else:
+        outputs = {ticker: future.result() for ticker, future in llm_futures.items()}
 
+    for ticker, buffett_output in outputs.items():
         # Store analysis in consistent format with other agents
         buffett_analysis[ticker] = {
             "signal": buffett_output.signal,
@@ -284,18 +304,7 @@ def calculate_intrinsic_value(financial_line_items: list) -> dict[str, any]:
     }
 
 
-def generate_buffett_output(
-    ticker: str,
-    analysis_data: dict[str, any],
-    model_name: str,
-    model_provider: str,
-) -> WarrenBuffettSignal:
-    """Get investment decision from LLM with Buffett's principles"""
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett’s principles:
+SYSTEM_PROMPT = """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett’s principles:
 
                 Circle of Competence: Only invest in businesses you understand
                 Margin of Safety: Buy well below intrinsic value
@@ -311,7 +320,21 @@ def generate_buffett_output(
                 - Avoid high debt or poor management
                 - Hold good businesses long term
                 - Sell when fundamentals deteriorate or the valuation is too high
-                """,
+                """
+
+
+def generate_buffett_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> WarrenBuffettSignal:
+    """Get investment decision from LLM with Buffett's principles"""
+    template = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                SYSTEM_PROMPT,
             ),
             (
                 "human",
@@ -348,4 +371,57 @@ def generate_buffett_output(
         pydantic_model=WarrenBuffettSignal, 
         agent_name="warren_buffett_agent", 
         default_factory=create_default_warren_buffett_signal,
+        ticker=ticker,
+        )
+
+
+def generate_buffett_output_batch(
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, WarrenBuffettSignal]:
+    """
+    Gets investment decisions for several tickers at once: one prompt carries a batch of tickers'
+    analysis, with batches sized to the prompt token budget.
+    """
+    template = ChatPromptTemplate.from_messages([
+        ("system", SYSTEM_PROMPT),
+        (
+            "human",
+            """Based on the following data, create the investment signal as Warren Buffett would for each of these tickers: {tickers}.
+
+                Analysis Data by ticker:
+                {analysis_data}
+
+                Return the trading signals in this JSON format, with one entry per ticker:
+                {{
+                  "signals": {{
+                    "TICKER": {{
+                      "signal": "bullish/bearish/neutral",
+                      "confidence": float (0-100),
+                      "reasoning": "string"
+                    }}
+                  }}
+                }}
+                """
         )
+    ])
+
+    def render_prompt(batch: dict[str, any]):
+        return template.invoke({
+            "analysis_data": json.dumps(batch, indent=2),
+            "tickers": ", ".join(batch)
+        })
+
+    def create_default_warren_buffett_signal():
+        return WarrenBuffettSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
+
+    return call_llm_batched(
+        analysis_data=analysis_data,
+        render_prompt=render_prompt,
+        model_name=model_name,
+        model_provider=model_provider,
+        container_model=WarrenBuffettSignals,
+        agent_name="warren_buffett_agent",
+        default_factory=create_default_warren_buffett_signal,
+    )
@@ -1,3 +1,5 @@
+import asyncio
+import os
 import sys
 
 from datetime import datetime, timedelta
@@ -10,17 +12,16 @@ from colorama import Fore, Style, init
 import numpy as np
 import itertools
 
+from data.cache import configure_cache
 from llm.models import LLM_ORDER, get_model_info
 from utils.analysts import ANALYST_ORDER
 from main import run_hedge_fund
-from tools.api import (
-    get_company_news,
-    get_price_data,
-    get_prices,
-    get_financial_metrics,
-    get_insider_trades,
-)
+from agents.technicals import build_technical_timeline, set_technical_timeline
+from tools.api import get_price_data, prefetch_universe
+from tools.recorder import DATA_MODES, configure_data_mode
 from utils.display import print_backtest_results, format_backtest_row
+from utils.llm_cache import configure_llm_cache, get_llm_cache
+from utils.llm_metrics import get_llm_metrics
 from typing_extensions import Callable
 
 init(autoreset=True)
@@ -38,6 +39,13 @@ class Backtester:
         model_provider: str = "OpenAI",
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
+        cache_dir: str | None = None,
+        prefetch_concurrency: int = 8,
+        data_mode: str | None = None,
+        data_archive: str | None = None,
+        llm_cache: str | None = None,
+        batch_llm_prompts: bool = False,
+        llm_metrics: str | None = None,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -49,6 +57,13 @@ class Backtester:
         :param model_provider: Which LLM provider (OpenAI, etc).
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
+        :param cache_dir: Directory for the persistent data cache (None keeps it in memory only).
+        :param prefetch_concurrency: Maximum number of concurrent fetches while pre-fetching data.
+        :param data_mode: "live", "record" (archive every API response) or "replay" (serve from the archive, no network).
+        :param data_archive: Archive file used by the record and replay data modes.
+        :param llm_cache: SQLite file caching LLM responses, so re-runs with identical prompts skip the LLM.
+        :param batch_llm_prompts: Let persona agents analyze several tickers per LLM prompt.
+        :param llm_metrics: JSON or CSV file receiving per-agent/model/ticker LLM token, latency and cost totals.
         """
         self.agent = agent
         self.tickers = tickers
@@ -58,6 +73,21 @@ class Backtester:
         self.model_name = model_name
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
+        self.prefetch_concurrency = prefetch_concurrency
+        self.batch_llm_prompts = batch_llm_prompts
+        self.llm_metrics = llm_metrics
+
+        # Persist fetched data across runs when a cache directory is given
+        if cache_dir:
+            configure_cache(cache_dir)
+
+        # Record API responses, or replay a previous recording without network access
+        if data_mode:
+            configure_data_mode(data_mode, data_archive)
+
+        # Serve repeated prompts from the persistent LLM response cache
+        if llm_cache:
+            configure_llm_cache(llm_cache)
 
         # Store the margin ratio (e.g. 0.5 means 50% margin required).
         self.margin_ratio = initial_margin_requirement
@@ -279,21 +309,32 @@ class Backtester:
         start_date_dt = end_date_dt - relativedelta(years=1)
         start_date_str = start_date_dt.strftime("%Y-%m-%d")
 
-        for ticker in self.tickers:
-            # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
-
-            # Fetch financial metrics
-            get_financial_metrics(ticker, self.end_date, limit=10)
-
-            # Fetch insider trades
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        async def prefetch():
+            await asyncio.gather(
+                # Fetch price data for the entire period, plus 1 year
+                prefetch_universe(self.tickers, ["prices"], start_date_str, self.end_date, max_concurrency=self.prefetch_concurrency),
+                # Fetch financial metrics, insider trades and company news
+                prefetch_universe(
+                    self.tickers,
+                    ["financial_metrics", "insider_trades", "company_news"],
+                    self.start_date,
+                    self.end_date,
+                    max_concurrency=self.prefetch_concurrency,
+                ),
+            )
 
-            # Fetch company news
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        asyncio.run(prefetch())
 
         print("Data pre-fetch complete.")
 
+    def precompute_technical_signals(self, dates: pd.DatetimeIndex):
+        """Compute the technical analyst's indicators for every backtest day in one pass, served by lookup."""
+        if self.selected_analysts and "technical_analyst" not in self.selected_analysts:
+            return
+        print("\nPre-computing technical signals...")
+        windows = [((date - timedelta(days=30)).strftime("%Y-%m-%d"), date.strftime("%Y-%m-%d")) for date in dates]
+        set_technical_timeline(build_technical_timeline(self.tickers, windows))
+
     def parse_agent_response(self, agent_output):
         """Parse JSON output from the agent (fallback to 'hold' if invalid)."""
         import json
@@ -306,10 +347,18 @@ class Backtester:
             return {"action": "hold", "quantity": 0}
 
     def run_backtest(self):
+        try:
+            return self._run_backtest()
+        finally:
+            # Precomputed signals belong to this run only; never leave them behind for later runs
+            set_technical_timeline(None)
+
+    def _run_backtest(self):
         # Pre-fetch all data at the start
         self.prefetch_data()
 
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
+        self.precompute_technical_signals(dates)
         table_rows = []
         performance_metrics = {
             'sharpe_ratio': None,
@@ -359,6 +408,7 @@ class Backtester:
                 model_name=self.model_name,
                 model_provider=self.model_provider,
                 selected_analysts=self.selected_analysts,
+                batch_llm_prompts=self.batch_llm_prompts,
             )
             decisions = output["decisions"]
             analyst_signals = output["analyst_signals"]
@@ -490,6 +540,19 @@ class Backtester:
             if len(self.portfolio_values) > 3:
                 self._update_performance_metrics(performance_metrics)
 
+        if (cache := get_llm_cache()) is not None:
+            stats = cache.stats()
+            print(f"\nLLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), {stats['entries']} entries stored")
+
+        totals = get_llm_metrics().totals()
+        if totals["calls"]:
+            print(
+                f"LLM usage: {totals['calls']} calls, {totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion tokens, "
+                f"{totals['latency_total']:.1f}s total latency, ${totals['cost']:.2f} estimated cost"
+            )
+        if self.llm_metrics:
+            get_llm_metrics().dump(self.llm_metrics)
+            print(f"LLM metrics written to {self.llm_metrics}")
         return performance_metrics
 
     def _update_performance_metrics(self, performance_metrics):
@@ -649,8 +712,48 @@ if __name__ == "__main__":
         default=0.0,
         help="Margin ratio for short positions, e.g. 0.5 for 50% (default: 0.0)",
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Persist fetched market data in this directory so later runs skip the API (default: memory only)",
+    )
+    parser.add_argument(
+        "--data-mode",
+        choices=DATA_MODES,
+        default="live",
+        help="live: fetch from the network; record: fetch and archive every response; replay: serve responses from the archive only",
+    )
+    parser.add_argument(
+        "--data-archive",
+        type=str,
+        default=None,
+        help="Archive file used by the record and replay data modes",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        type=str,
+        default=None,
+        help="SQLite file caching LLM responses; re-runs with identical prompts are served from it (default: no cache)",
+    )
+
+    parser.add_argument(
+        "--batch-llm-prompts",
+        action="store_true",
+        help="Let persona agents analyze several tickers per LLM prompt (batches sized by LLM_BATCH_TOKEN_BUDGET)",
+    )
+    parser.add_argument(
+        "--llm-metrics",
+        type=str,
+        default=None,
+        help="Write per agent/model/ticker LLM token, latency and cost totals to this file (.csv for CSV, JSON otherwise)",
+    )
 
     args = parser.parse_args()
+    if args.data_mode != "live" and not args.data_archive:
+        parser.error(f"--data-mode {args.data_mode} needs --data-archive")
+    if args.data_mode == "replay" and not os.path.exists(args.data_archive):
+        parser.error(f"--data-archive {args.data_archive} does not exist; record it first with --data-mode record")
 
     # Parse tickers from comma-separated string
     tickers = [ticker.strip() for ticker in args.tickers.split(",")] if args.tickers else []
@@ -717,6 +820,12 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
+        cache_dir=args.cache_dir,
+        data_mode=args.data_mode,
+        data_archive=args.data_archive,
+        llm_cache=args.llm_cache,
+        batch_llm_prompts=args.batch_llm_prompts,
+        llm_metrics=args.llm_metrics,
     )
 
     performance_metrics = backtester.run_backtest()
@@ -1,91 +1,227 @@
-class Cache:
-    """In-memory cache for API responses."""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from data.kline_store import KlineStore, Klines
+from data.price_store import PriceColumns, PriceStore
+
+
+class SQLiteCacheStore:
+    """On-disk store for cached API responses, one row per (dataset, ticker)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                dataset TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (dataset, ticker)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, dataset: str, ticker: str) -> list[dict[str, any]] | None:
+        """Load the stored rows for a ticker, or None if nothing is stored."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM cache WHERE dataset = ? AND ticker = ?", (dataset, ticker)).fetchone()
+        return json.loads(row[0]) if row else None
 
-    def __init__(self):
-        self._prices_cache: dict[str, list[dict[str, any]]] = {}
-        self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
-        self._line_items_cache: dict[str, list[dict[str, any]]] = {}
-        self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
-        self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+    def set(self, dataset: str, ticker: str, data: list[dict[str, any]]):
+        """Replace the stored rows for a ticker."""
+        payload = json.dumps(data, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache (dataset, ticker, data) VALUES (?, ?, ?)", (dataset, ticker, payload))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Cache:
+    """Tiered cache for API responses: an in-memory LRU on top of an optional on-disk store."""
+
+    def __init__(self, cache_dir: str | None = None, max_memory_entries: int = 1024):
+        # (dataset, ticker) -> rows, most recently used last
+        self._memory: OrderedDict[tuple[str, str], list[dict[str, any]]] = OrderedDict()
+        self._max_memory_entries = max_memory_entries
+        self._store: SQLiteCacheStore | None = None
+        self._prices = PriceStore()
+        self._klines = KlineStore()
+        self._lock = threading.RLock()
+        if cache_dir:
+            self.enable_persistence(cache_dir)
+
+    @property
+    def cache_dir(self) -> str | None:
+        """Directory of the on-disk tier, or None when running memory-only."""
+        return os.path.dirname(self._store.path) if self._store else None
+
+    def enable_persistence(self, cache_dir: str):
+        """Back the cache with a SQLite file in `cache_dir`."""
+        with self._lock:
+            path = os.path.join(cache_dir, "api_cache.sqlite")
+            if self._store and self._store.path == path:
+                return
+            self.disable_persistence()
+            self._store = SQLiteCacheStore(path)
+            self._prices.set_root(os.path.join(cache_dir, "prices"))
+            self._klines.set_root(os.path.join(cache_dir, "klines"))
+
+    def disable_persistence(self):
+        """Drop the on-disk tier; data already in memory is kept."""
+        with self._lock:
+            if self._store:
+                self._store.close()
+                self._store = None
+            self._prices.set_root(None)
+            self._klines.set_root(None)
+
+    def _get(self, dataset: str, ticker: str) -> list[dict[str, any]] | None:
+        key = (dataset, ticker)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            if not self._store:
+                return None
+
+            data = self._store.get(dataset, ticker)
+            if data is not None:
+                self._remember(key, data)
+            return data
+
+    def _set(self, dataset: str, ticker: str, data: list[dict[str, any]]):
+        with self._lock:
+            self._remember((dataset, ticker), data)
+            if self._store:
+                self._store.set(dataset, ticker, data)
+
+    def _remember(self, key: tuple[str, str], data: list[dict[str, any]]):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        # Only evict when there is a disk tier to fall back to
+        if self._store:
+            while len(self._memory) > self._max_memory_entries:
+                self._memory.popitem(last=False)
 
     def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
         """Merge existing and new data, avoiding duplicates based on a key field."""
         if not existing:
             return new_data
-        
+
         # Create a set of existing keys for O(1) lookup
         existing_keys = {item[key_field] for item in existing}
-        
+
         # Only add items that don't exist yet
         merged = existing.copy()
         merged.extend([item for item in new_data if item[key_field] not in existing_keys])
         return merged
 
-    def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
-        """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+    def _merge_and_set(self, dataset: str, ticker: str, data: list[dict[str, any]], key_field: str):
+        with self._lock:
+            self._set(dataset, ticker, self._merge_data(self._get(dataset, ticker), data, key_field=key_field))
 
-    def set_prices(self, ticker: str, data: list[dict[str, any]]):
+    def get_prices(self, ticker: str) -> PriceColumns | None:
+        """Get cached price columns if available."""
+        return self._prices.get(ticker)
+
+    def set_prices(self, ticker: str, data: PriceColumns | list[dict[str, any]]):
         """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(
-            self._prices_cache.get(ticker),
-            data,
-            key_field="time"
-        )
+        if not isinstance(data, PriceColumns):
+            data = PriceColumns.from_records(data)
+        self._prices.append(ticker, data)
+
+    def get_missing_price_ranges(self, ticker: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Date ranges within [start_date, end_date] that have never been fetched for a ticker."""
+        return self._prices.missing_ranges(ticker, start_date, end_date)
+
+    def add_price_coverage(self, ticker: str, start_date: str, end_date: str, ttl: float | None = None):
+        """Mark [start_date, end_date] as fetched for a ticker, whether or not it had any bars (for `ttl` seconds only if given)."""
+        self._prices.add_coverage(ticker, start_date, end_date, ttl)
+
+    def get_klines(self, symbol: str, interval: str) -> tuple[Klines | None, int | None]:
+        """Get cached closed candles and the earliest open_time ever requested for them."""
+        return self._klines.get(symbol, interval)
+
+    def set_klines(self, symbol: str, interval: str, data: Klines, covered_from: int | None = None):
+        """Append closed candles to cache; `covered_from` records how far back the run has been requested."""
+        self._klines.append(symbol, interval, data, covered_from)
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._get("financial_metrics", ticker)
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(
-            self._financial_metrics_cache.get(ticker),
-            data,
-            key_field="report_period"
-        )
+        self._merge_and_set("financial_metrics", ticker, data, key_field="report_period")
 
     def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached line items if available."""
-        return self._line_items_cache.get(ticker)
+        return self._get("line_items", ticker)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(
-            self._line_items_cache.get(ticker),
-            data,
-            key_field="report_period"
-        )
+        """Merge new line items into cache, combining the fields of rows for the same report period."""
+        with self._lock:
+            rows = {(row["report_period"], row["period"]): row for row in self._get("line_items", ticker) or []}
+            for row in data:
+                key = (row["report_period"], row["period"])
+                rows[key] = {**rows.get(key, {}), **row}
+            self._set("line_items", ticker, list(rows.values()))
+
+    def get_line_item_queries(self, ticker: str) -> list[dict[str, any]]:
+        """Get the line item searches already answered for a ticker."""
+        return self._get("line_item_queries", ticker) or []
+
+    def add_line_item_query(self, ticker: str, query: dict[str, any]):
+        """Record a line item search (period, end_date, limit, line_items, rows, oldest_report_period)."""
+        with self._lock:
+            # Keep the most recent searches only; older ones are rarely the best match
+            self._set("line_item_queries", ticker, (self.get_line_item_queries(ticker) + [query])[-50:])
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._get("insider_trades", ticker)
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(
-            self._insider_trades_cache.get(ticker),
-            data,
-            key_field="filing_date"  # Could also use transaction_date if preferred
-        )
+        self._merge_and_set("insider_trades", ticker, data, key_field="filing_date")  # Could also use transaction_date if preferred
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._get("company_news", ticker)
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(
-            self._company_news_cache.get(ticker),
-            data,
-            key_field="date"
-        )
+        self._merge_and_set("company_news", ticker, data, key_field="date")
 
 
-# Global cache instance
-_cache = Cache()
+# Global cache instance. Set HEDGE_FUND_CACHE_DIR to persist it across runs.
+_cache = Cache(cache_dir=os.environ.get("HEDGE_FUND_CACHE_DIR") or None)
 
 
 def get_cache() -> Cache:
     """Get the global cache instance."""
     return _cache
+
+
+def configure_cache(cache_dir: str | None):
+    """Switch the global cache between memory-only (None) and persisted under `cache_dir`."""
+    if cache_dir:
+        _cache.enable_persistence(cache_dir)
+    else:
+        _cache.disable_persistence()
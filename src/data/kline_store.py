@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.price_store import load_columns, save_columns
+
+# Column name -> dtype of a Binance kline row, in the order the API returns them
+# (the trailing "ignore" field is dropped). Times are epoch milliseconds.
+KLINE_COLUMNS = {
+    "open_time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "close_time": np.int64,
+    "quote_volume": np.float64,
+    "trades": np.int64,
+    "buy_base_volume": np.float64,
+    "buy_quote_volume": np.float64,
+}
+
+Klines = dict[str, np.ndarray]
+
+
+def empty_klines() -> Klines:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in KLINE_COLUMNS.items()}
+
+
+def klines_from_rows(rows: list[list]) -> Klines:
+    """Convert raw Binance kline rows (lists of strings and ints) to typed columns sorted by open_time."""
+    if not rows:
+        return empty_klines()
+    table = np.array([row[: len(KLINE_COLUMNS)] for row in rows], dtype=object)
+    columns = {name: table[:, i].astype(np.float64).astype(dtype) for i, (name, dtype) in enumerate(KLINE_COLUMNS.items())}
+    _, first = np.unique(columns["open_time"], return_index=True)
+    return {name: array[first] for name, array in columns.items()}
+
+
+def merge_klines(existing: Klines, new: Klines) -> Klines:
+    """Union of two column sets by open_time; where both have a candle, the one from `new` wins."""
+    if not len(existing["open_time"]):
+        return new
+    if not len(new["open_time"]):
+        return existing
+    open_time, first = np.unique(np.concatenate([new["open_time"], existing["open_time"]]), return_index=True)
+    return {name: np.concatenate([new[name], existing[name]])[first] for name in KLINE_COLUMNS}
+
+
+def slice_klines(klines: Klines, start_ms: int, end_ms: int) -> Klines:
+    """Candles whose open_time lies in [start_ms, end_ms], as zero-copy views."""
+    lo = np.searchsorted(klines["open_time"], start_ms, side="left")
+    hi = np.searchsorted(klines["open_time"], end_ms, side="right")
+    return {name: array[lo:hi] for name, array in klines.items()}
+
+
+def resample_klines(klines: Klines, source_ms: int, target_ms: int, now_ms: int) -> Klines:
+    """
+    Aggregate candles of `source_ms` length into UTC-aligned candles of `target_ms` length.
+
+    A coarse candle is only emitted when every source candle in it is present (for the still-open
+    candle containing `now_ms`: every source candle up to now), so the output matches what Binance
+    returns for the coarser interval. Buckets with gaps in the source are skipped, never built from
+    partial data; missing_buckets() lists them.
+    """
+    if not len(klines["open_time"]):
+        return empty_klines()
+
+    bucket = klines["open_time"] // target_ms * target_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)]
+
+    open_time = bucket[starts]
+    resampled = {
+        "open_time": open_time,
+        "open": klines["open"][starts],
+        "high": np.maximum.reduceat(klines["high"], starts),
+        "low": np.minimum.reduceat(klines["low"], starts),
+        "close": klines["close"][ends - 1],
+        "close_time": open_time + target_ms - 1,
+    }
+    for name in ("volume", "quote_volume", "trades", "buy_base_volume", "buy_quote_volume"):
+        resampled[name] = np.add.reduceat(klines[name], starts)
+
+    expected = np.minimum(target_ms // source_ms, (now_ms - open_time) // source_ms + 1)
+    complete = ends - starts == expected
+    return {name: resampled[name][complete] for name in KLINE_COLUMNS}
+
+
+def missing_buckets(resampled: Klines, target_ms: int, start_ms: int, end_ms: int) -> np.ndarray:
+    """Open times of the UTC-aligned `target_ms` candles in [start_ms, end_ms] that `resampled` lacks."""
+    first_bucket = -(-start_ms // target_ms) * target_ms
+    expected = np.arange(first_bucket, end_ms + 1, target_ms, dtype=np.int64)
+    return np.setdiff1d(expected, resampled["open_time"])
+
+
+def klines_to_df(klines: Klines) -> pd.DataFrame:
+    """DataFrame indexed by candle open time, in the layout CryptoAPI.get_crypto_prices returns."""
+    index = pd.DatetimeIndex(pd.to_datetime(klines["open_time"], unit="ms"), name="timestamp")
+    return pd.DataFrame({name: klines[name] for name in KLINE_COLUMNS if name != "open_time"}, index=index)
+
+
+class KlineStore:
+    """
+    Per-(symbol, interval) store of closed Binance candles.
+
+    Stored candles always form one contiguous run, so a caller only needs to fetch what lies
+    before the first stored candle or after the last stored close_time. With a root directory
+    the columns are written as .npy files under root/<symbol>/<interval>/ and read back
+    memory-mapped; without one they live in memory only.
+    """
+
+    def __init__(self, root: str | None = None):
+        self._root = root
+        self._klines: dict[tuple[str, str], Klines] = {}
+        # Earliest open_time already requested, so listing-date gaps are not refetched
+        self._covered_from: dict[tuple[str, str], int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def root(self) -> str | None:
+        return self._root
+
+    def set_root(self, root: str | None):
+        """Point the store at a new directory (or None for memory-only)."""
+        with self._lock:
+            if root == self._root:
+                return
+            self._root = root
+            if root:
+                for key, klines in list(self._klines.items()):
+                    self._write(key, klines, self._covered_from.get(key))
+
+    def _dir(self, key: tuple[str, str]) -> str:
+        symbol, interval = key
+        return os.path.join(self._root, symbol.replace(os.sep, "_"), interval)
+
+    def _read(self, key: tuple[str, str]) -> tuple[Klines | None, int | None]:
+        directory = self._dir(key)
+        klines = load_columns(directory, KLINE_COLUMNS, marker="open_time")
+        covered_from = None
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                covered_from = json.load(f).get("covered_from")
+        except (OSError, ValueError):
+            pass
+        return klines, covered_from
+
+    def _write(self, key: tuple[str, str], klines: Klines, covered_from: int | None):
+        directory = self._dir(key)
+        save_columns(directory, klines)
+        tmp_path = os.path.join(directory, "meta.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump({"covered_from": covered_from}, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+
+    def get(self, symbol: str, interval: str) -> tuple[Klines | None, int | None]:
+        """Stored candles and the earliest open_time ever requested, or (None, None)."""
+        key = (symbol, interval)
+        with self._lock:
+            if key not in self._klines and self._root:
+                klines, covered_from = self._read(key)
+                if klines is not None:
+                    self._klines[key] = klines
+                    if covered_from is not None:
+                        self._covered_from[key] = covered_from
+            return self._klines.get(key), self._covered_from.get(key)
+
+    def append(self, symbol: str, interval: str, klines: Klines, covered_from: int | None = None):
+        """Merge closed candles into the stored run, optionally extending how far back it has been requested."""
+        key = (symbol, interval)
+        with self._lock:
+            existing, existing_from = self.get(symbol, interval)
+            merged = merge_klines(existing, klines) if existing is not None else klines
+            if covered_from is not None and existing_from is not None:
+                covered_from = min(covered_from, existing_from)
+            covered_from = covered_from if covered_from is not None else existing_from
+            if self._root:
+                self._write(key, merged, covered_from)
+                merged = load_columns(self._dir(key), KLINE_COLUMNS, marker="open_time")
+            self._klines[key] = merged
+            if covered_from is not None:
+                self._covered_from[key] = covered_from
@@ -1,3 +1,7 @@
+from collections.abc import Sequence
+from typing import get_args
+
+import pandas as pd
 from pydantic import BaseModel
 
 
@@ -148,3 +152,60 @@ class AgentStateData(BaseModel):
 class AgentStateMetadata(BaseModel):
     show_reasoning: bool = False
     model_config = {"extra": "allow"}
+
+
+class LazyModelList(Sequence):
+    """Read-only list of models over raw dict rows; each model is only built when it is first accessed."""
+
+    def __init__(self, model: type[BaseModel], rows: list[dict[str, any]]):
+        self._model = model
+        self._rows = rows
+        self._items: list[BaseModel | None] = [None] * len(rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._model(**self._rows[index])
+        return item
+
+    def __repr__(self) -> str:
+        return f"LazyModelList({self._model.__name__}, rows={len(self)})"
+
+    def rows(self) -> list[dict[str, any]]:
+        """The underlying dict rows."""
+        return self._rows
+
+
+def check_records(model: type[BaseModel], records: list[dict[str, any]]) -> list[dict[str, any]]:
+    """
+    Check raw API rows against a model's scalar fields column by column, without building models.
+
+    Returns the rows restricted to the model's fields; raises ValueError if a required field is
+    missing or null, or a numeric field holds something that is not a number.
+    """
+    if not records:
+        return []
+
+    df = pd.DataFrame.from_records(records)
+    for name, field in model.model_fields.items():
+        if name not in df.columns:
+            if field.is_required():
+                raise ValueError(f"{model.__name__} rows are missing field {name!r}")
+            continue
+
+        column = df[name]
+        types = get_args(field.annotation) or (field.annotation,)
+        if type(None) not in types and column.isna().any():
+            raise ValueError(f"{model.__name__} field {name!r} is null in {int(column.isna().sum())} rows")
+        if float in types or int in types:
+            invalid = pd.to_numeric(column, errors="coerce").isna() & column.notna()
+            if invalid.any():
+                raise ValueError(f"{model.__name__} field {name!r} is not numeric in {int(invalid.sum())} rows")
+
+    fields = [name for name in model.model_fields if name in df.columns]
+    return [{name: record.get(name) for name in fields} for record in records]
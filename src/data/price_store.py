@@ -0,0 +1,362 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from data.models import Price
+
+# Column name -> dtype of the on-disk arrays. "epoch" is the int64 UTC nanosecond index
+# used for range lookups; "time" keeps the API's original timestamp string.
+PRICE_COLUMNS = {
+    "epoch": np.int64,
+    "time": np.str_,
+    "open": np.float64,
+    "close": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "volume": np.int64,
+}
+
+_NS_PER_DAY = 86_400 * 1_000_000_000
+
+
+def to_epoch_ns(times) -> np.ndarray:
+    """Convert timestamp strings to int64 UTC epoch nanoseconds."""
+    return pd.to_datetime(np.asarray(times), utc=True).as_unit("ns").asi8
+
+
+def date_to_epoch_ns(date: str) -> int:
+    """Convert a YYYY-MM-DD (or full timestamp) string to UTC epoch nanoseconds."""
+    timestamp = pd.Timestamp(date)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.as_unit("ns").value
+
+
+def _merge_intervals(intervals: list[tuple[date, date]]) -> list[tuple[date, date]]:
+    """Merge overlapping or adjacent inclusive date intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(coverage: list[tuple[str, str]], start_date: str, end_date: str) -> list[tuple[str, str]]:
+    """Sub-ranges of [start_date, end_date] (inclusive YYYY-MM-DD) not covered by `coverage`."""
+    start, end = date.fromisoformat(start_date[:10]), date.fromisoformat(end_date[:10])
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in _merge_intervals([(date.fromisoformat(s), date.fromisoformat(e)) for s, e in coverage]):
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - timedelta(days=1)))
+        cursor = covered_end + timedelta(days=1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return [(gap_start.isoformat(), gap_end.isoformat()) for gap_start, gap_end in gaps]
+
+
+def save_columns(directory: str, columns: dict[str, np.ndarray]):
+    """
+    Write each column to directory/columns/<name>.npy so readers never see a mix of two sets.
+
+    The columns go to a fresh directory that is then swapped in: a reader sees the old set,
+    the new one, or (between the two renames) no set at all, which it treats as a miss.
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, "columns")
+    staging = os.path.join(directory, f"columns.{uuid.uuid4().hex}.tmp")
+    os.makedirs(staging)
+    for name, values in columns.items():
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(values))
+
+    retired = f"{staging}.old"
+    try:
+        os.rename(target, retired)
+    except FileNotFoundError:
+        pass
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Another process swapped its set in first; keep that one
+        shutil.rmtree(staging, ignore_errors=True)
+    # Files still memory-mapped by readers stay valid until they are closed
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_columns(directory: str, names, marker: str) -> dict[str, np.ndarray] | None:
+    """Memory-map the columns written by save_columns, or None if the set is missing or incomplete."""
+    directory = os.path.join(directory, "columns")
+    if not os.path.exists(os.path.join(directory, f"{marker}.npy")):
+        return None
+    try:
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in names}
+    except (OSError, ValueError):
+        return None
+
+
+class PriceColumns:
+    """
+    Column-oriented daily prices for a single ticker, sorted by time.
+
+    Behaves like a read-only list[Price] (Price objects are only built when an element is
+    accessed) while exposing the underlying NumPy arrays, which may be memory-mapped, to
+    vectorized consumers such as prices_to_df.
+    """
+
+    __slots__ = tuple(PRICE_COLUMNS)
+
+    def __init__(self, epoch, time, open, close, high, low, volume):
+        self.epoch = epoch
+        self.time = time
+        self.open = open
+        self.close = close
+        self.high = high
+        self.low = low
+        self.volume = volume
+
+    @classmethod
+    def empty(cls) -> "PriceColumns":
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in PRICE_COLUMNS.items()})
+
+    @classmethod
+    def from_arrays(cls, **arrays) -> "PriceColumns":
+        """Build from unsorted column arrays (without "epoch"), sorting by time and dropping duplicate timestamps."""
+        time = np.asarray(arrays["time"], dtype=np.str_)
+        if len(time) == 0:
+            return cls.empty()
+        epoch = to_epoch_ns(time)
+        epoch, first = np.unique(epoch, return_index=True)
+        columns = {name: np.asarray(arrays[name], dtype=dtype)[first] for name, dtype in PRICE_COLUMNS.items() if name != "epoch"}
+        return cls(epoch=epoch, **columns)
+
+    @classmethod
+    def from_json(cls, records: list[dict[str, any]]) -> "PriceColumns":
+        """
+        Build from the API's decoded JSON price rows, validating whole columns at once.
+
+        Raises ValueError if a row is missing a field, a price or volume is not a finite
+        non-negative number, or a volume is fractional.
+        """
+        if not records:
+            return cls.empty()
+        try:
+            time = [record["time"] for record in records]
+            values = np.array(
+                [(record["open"], record["close"], record["high"], record["low"], record["volume"]) for record in records],
+                dtype=np.float64,
+            )
+        except KeyError as e:
+            raise ValueError(f"Price rows are missing field {e}") from e
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Price rows hold non-numeric values: {e}") from e
+
+        invalid = ~np.isfinite(values).all(axis=1) | (values < 0).any(axis=1) | (values[:, 4] != np.floor(values[:, 4]))
+        if invalid.any():
+            first = int(np.argmax(invalid))
+            raise ValueError(f"{int(invalid.sum())} invalid price rows, first at {time[first]}")
+
+        open, close, high, low, volume = values.T
+        return cls.from_arrays(time=time, open=open, close=close, high=high, low=low, volume=volume)
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, any]]) -> "PriceColumns":
+        """Build from API-style price dicts."""
+        return cls.from_arrays(**{name: [record[name] for record in records] for name in PRICE_COLUMNS if name != "epoch"})
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in PRICE_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PriceColumns(**{name: array[index] for name, array in self.columns().items()})
+        return Price(
+            open=float(self.open[index]),
+            close=float(self.close[index]),
+            high=float(self.high[index]),
+            low=float(self.low[index]),
+            volume=int(self.volume[index]),
+            time=str(self.time[index]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"PriceColumns(rows={len(self)})"
+
+    def slice(self, start_date: str, end_date: str) -> "PriceColumns":
+        """Rows from start_date through the end of end_date, as zero-copy views."""
+        lo = np.searchsorted(self.epoch, date_to_epoch_ns(start_date), side="left")
+        hi = np.searchsorted(self.epoch, date_to_epoch_ns(end_date) + _NS_PER_DAY, side="left")
+        return self[lo:hi]
+
+    def merge(self, other: "PriceColumns") -> "PriceColumns":
+        """Union of two column sets; where both have a timestamp, the row from `other` wins."""
+        if not len(self):
+            return other
+        if not len(other):
+            return self
+        epoch = np.concatenate([other.epoch, self.epoch])
+        epoch, first = np.unique(epoch, return_index=True)
+        return PriceColumns(epoch=epoch, **{name: np.concatenate([getattr(other, name), getattr(self, name)])[first] for name in PRICE_COLUMNS if name != "epoch"})
+
+    def to_df(self, copy: bool = True) -> pd.DataFrame:
+        """
+        Build the DataFrame prices_to_df returns: a UTC "Date" index plus the Price fields as columns.
+
+        The frame owns its data by default. With copy=False it wraps the stored arrays instead,
+        which may be shared with the cache or memory-mapped read-only, and leaves out the "time"
+        strings; such a view is for internal read-only use and must not be modified.
+        """
+        index = pd.DatetimeIndex(self.epoch.view("datetime64[ns]"), name="Date").tz_localize("UTC")
+        data = {
+            "open": self.open,
+            "close": self.close,
+            "high": self.high,
+            "low": self.low,
+            "volume": self.volume,
+        }
+        if copy:
+            data["time"] = self.time.astype(object)
+        return pd.DataFrame(data, index=index, copy=copy)
+
+
+class PriceStore:
+    """
+    Per-ticker columnar price store.
+
+    With a root directory, each ticker's columns are written as .npy files under
+    root/<ticker>/ and read back memory-mapped; without one, columns live in memory only.
+
+    Alongside the rows, the store tracks which date ranges have already been fetched for each
+    ticker, so callers can tell "no trading days in this range" apart from "never requested".
+    """
+
+    def __init__(self, root: str | None = None):
+        self._root = root
+        self._columns: dict[str, PriceColumns] = {}
+        self._coverage: dict[str, list[tuple[str, str]]] = {}
+        # ticker -> (start, end, expiry on the monotonic clock) of ranges that count as fetched for a while only
+        self._provisional: dict[str, list[tuple[str, str, float]]] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def root(self) -> str | None:
+        return self._root
+
+    def set_root(self, root: str | None):
+        """Point the store at a new directory (or None for memory-only)."""
+        with self._lock:
+            if root == self._root:
+                return
+            self._root = root
+            # Anything already loaded stays valid; new tickers are read from the new root
+            if root:
+                for ticker, columns in list(self._columns.items()):
+                    self._write(ticker, columns)
+                for ticker, coverage in list(self._coverage.items()):
+                    self._write_coverage(ticker, coverage)
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self._root, ticker.replace(os.sep, "_"))
+
+    def _read(self, ticker: str) -> PriceColumns | None:
+        # A partially written ticker is treated as missing and refetched
+        columns = load_columns(self._ticker_dir(ticker), PRICE_COLUMNS, marker="epoch")
+        return PriceColumns(**columns) if columns is not None else None
+
+    def _write(self, ticker: str, columns: PriceColumns):
+        save_columns(self._ticker_dir(ticker), columns.columns())
+
+    def _read_coverage(self, ticker: str) -> list[tuple[str, str]]:
+        path = os.path.join(self._ticker_dir(ticker), "coverage.json")
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path) as f:
+                return [tuple(interval) for interval in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    def _write_coverage(self, ticker: str, coverage: list[tuple[str, str]]):
+        directory = self._ticker_dir(ticker)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, "coverage.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump(coverage, f)
+        os.replace(tmp_path, os.path.join(directory, "coverage.json"))
+
+    def get_coverage(self, ticker: str) -> list[tuple[str, str]]:
+        """Inclusive (start, end) date ranges already fetched for a ticker."""
+        with self._lock:
+            if ticker not in self._coverage:
+                self._coverage[ticker] = self._read_coverage(ticker) if self._root else []
+            return self._coverage[ticker]
+
+    def add_coverage(self, ticker: str, start_date: str, end_date: str, ttl: float | None = None):
+        """
+        Record that [start_date, end_date] has been fetched for a ticker.
+
+        With `ttl`, the range only counts as fetched for that many seconds and is never persisted;
+        for data that can still change, such as today's bar.
+        """
+        if ttl is not None:
+            with self._lock:
+                self._provisional.setdefault(ticker, []).append((start_date[:10], end_date[:10], time.monotonic() + ttl))
+            return
+        with self._lock:
+            intervals = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in self.get_coverage(ticker)]
+            intervals.append((date.fromisoformat(start_date[:10]), date.fromisoformat(end_date[:10])))
+            coverage = [(s.isoformat(), e.isoformat()) for s, e in _merge_intervals(intervals)]
+            self._coverage[ticker] = coverage
+            if self._root:
+                self._write_coverage(ticker, coverage)
+
+    def missing_ranges(self, ticker: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Sub-ranges of [start_date, end_date] that have not been fetched for a ticker."""
+        with self._lock:
+            now = time.monotonic()
+            provisional = self._provisional[ticker] = [entry for entry in self._provisional.get(ticker, []) if entry[2] > now]
+            coverage = self.get_coverage(ticker) + [(start, end) for start, end, _ in provisional]
+        return missing_ranges(coverage, start_date, end_date)
+
+    def get(self, ticker: str) -> PriceColumns | None:
+        """Get all stored prices for a ticker."""
+        with self._lock:
+            if ticker in self._columns:
+                return self._columns[ticker]
+            if not self._root:
+                return None
+            columns = self._read(ticker)
+            if columns is not None:
+                self._columns[ticker] = columns
+            return columns
+
+    def append(self, ticker: str, columns: PriceColumns):
+        """Merge new rows into a ticker's stored prices."""
+        with self._lock:
+            existing = self.get(ticker)
+            merged = existing.merge(columns) if existing is not None else columns
+            if self._root:
+                self._write(ticker, merged)
+                merged = self._read(ticker)
+            self._columns[ticker] = merged
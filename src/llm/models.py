@@ -1,10 +1,13 @@
 import os
+import threading
+import httpx
 from langchain_anthropic import ChatAnthropic
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from enum import Enum
 from pydantic import BaseModel
 from typing import Tuple
+from utils.llm_metrics import HTTPX_EVENT_HOOKS
 
 
 class ModelProvider(str, Enum):
@@ -19,6 +22,9 @@ class LLMModel(BaseModel):
     display_name: str
     model_name: str
     provider: ModelProvider
+    # USD per million prompt / completion tokens, used to estimate call costs
+    input_price: float | None = None
+    output_price: float | None = None
 
     def to_choice_tuple(self) -> Tuple[str, str, str]:
         """Convert to format needed for questionary choices"""
@@ -28,53 +34,77 @@ class LLMModel(BaseModel):
         """Check if the model is a DeepSeek model"""
         return self.model_name.startswith("deepseek")
 
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float | None:
+        """Estimated USD cost of a call, or None if the model's prices are unknown"""
+        if self.input_price is None or self.output_price is None:
+            return None
+        return (prompt_tokens * self.input_price + completion_tokens * self.output_price) / 1_000_000
+
 
 # Define available models
 AVAILABLE_MODELS = [
     LLMModel(
         display_name="[anthropic] claude-3.5-haiku",
         model_name="claude-3-5-haiku-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_price=0.8,
+        output_price=4.0
     ),
     LLMModel(
         display_name="[anthropic] claude-3.5-sonnet",
         model_name="claude-3-5-sonnet-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_price=3.0,
+        output_price=15.0
     ),
     LLMModel(
         display_name="[anthropic] claude-3-opus",
         model_name="claude-3-opus-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_price=15.0,
+        output_price=75.0
     ),
     LLMModel(
         display_name="[groq] deepseek-r1 70b",
         model_name="deepseek-r1-distill-llama-70b",
-        provider=ModelProvider.GROQ
+        provider=ModelProvider.GROQ,
+        input_price=0.75,
+        output_price=0.99
     ),
     LLMModel(
         display_name="[groq] llama-3.3 70b",
         model_name="llama-3.3-70b-versatile",
-        provider=ModelProvider.GROQ
+        provider=ModelProvider.GROQ,
+        input_price=0.59,
+        output_price=0.79
     ),
     LLMModel(
         display_name="[openai] gpt-4o",
         model_name="gpt-4o",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_price=2.5,
+        output_price=10.0
     ),
     LLMModel(
         display_name="[openai] gpt-4o-mini",
         model_name="gpt-4o-mini",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_price=0.15,
+        output_price=0.6
     ),
     LLMModel(
         display_name="[openai] o1",
         model_name="o1",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_price=15.0,
+        output_price=60.0
     ),
     LLMModel(
         display_name="[openai] o3-mini",
         model_name="o3-mini",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_price=1.1,
+        output_price=4.4
     ),
 ]
 
@@ -85,25 +115,99 @@ def get_model_info(model_name: str) -> LLMModel | None:
     """Get model information by model_name"""
     return next((model for model in AVAILABLE_MODELS if model.model_name == model_name), None)
 
-def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | None:
-    if model_provider == ModelProvider.GROQ:
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            # Print error to console
-            print(f"API Key Error: Please make sure GROQ_API_KEY is set in your .env file.")
-            raise ValueError("Groq API key not found.  Please make sure GROQ_API_KEY is set in your .env file.")
-        return ChatGroq(model=model_name, api_key=api_key)
-    elif model_provider == ModelProvider.OPENAI:
-        # Get and validate API key
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            # Print error to console
-            print(f"API Key Error: Please make sure OPENAI_API_KEY is set in your .env file.")
-            raise ValueError("OpenAI API key not found.  Please make sure OPENAI_API_KEY is set in your .env file.")
-        return ChatOpenAI(model=model_name, api_key=api_key)
-    elif model_provider == ModelProvider.ANTHROPIC:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            print(f"API Key Error: Please make sure ANTHROPIC_API_KEY is set in your .env file.")
-            raise ValueError("Anthropic API key not found.  Please make sure ANTHROPIC_API_KEY is set in your .env file.")
-        return ChatAnthropic(model=model_name, api_key=api_key)
\ No newline at end of file
+class ModelClientRegistry:
+    """
+    Memoizes configured chat model clients per (provider, model, API key, params).
+
+    OpenAI and Groq clients share one keep-alive httpx client, so repeated calls reuse warm
+    connections instead of building a client and doing a TLS handshake each time; its event hooks
+    feed the time-to-first-byte and retry counts of utils.llm_metrics. Anthropic
+    clients keep the connection pool of their own SDK client, which lives as long as the model.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 60.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http_client: httpx.Client | None = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, model_provider: ModelProvider, **params) -> ChatOpenAI | ChatGroq | ChatAnthropic:
+        api_key = _api_key(model_provider)
+        key = (ModelProvider(model_provider), model_name, api_key, tuple(sorted(params.items())))
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create(model_name, model_provider, api_key, params)
+            return self._clients[key]
+
+    def _http(self) -> httpx.Client:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self.limits, timeout=None, event_hooks=HTTPX_EVENT_HOOKS)
+        return self._http_client
+
+    def _create(self, model_name: str, model_provider: ModelProvider, api_key: str, params: dict) -> ChatOpenAI | ChatGroq | ChatAnthropic:
+        # call_llm retries with its own backoff and deadline, so the SDKs should not retry as well;
+        # the request timeout also ends requests call_llm has stopped waiting for
+        params = {"max_retries": 0, "timeout": float(os.environ.get("LLM_REQUEST_TIMEOUT", 60)), **params}
+        if model_provider == ModelProvider.GROQ:
+            return ChatGroq(model=model_name, api_key=api_key, http_client=self._http(), **params)
+        elif model_provider == ModelProvider.OPENAI:
+            return ChatOpenAI(model=model_name, api_key=api_key, http_client=self._http(), **params)
+        elif model_provider == ModelProvider.ANTHROPIC:
+            return ChatAnthropic(model=model_name, api_key=api_key, **params)
+        raise ValueError(f"Unsupported model provider: {model_provider}")
+
+    def close(self):
+        """Drop every cached client and close the shared connection pool."""
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+
+API_KEY_ENV = {
+    ModelProvider.GROQ: ("GROQ_API_KEY", "Groq"),
+    ModelProvider.OPENAI: ("OPENAI_API_KEY", "OpenAI"),
+    ModelProvider.ANTHROPIC: ("ANTHROPIC_API_KEY", "Anthropic"),
+}
+
+
+def _api_key(model_provider: ModelProvider) -> str:
+    env_name, label = API_KEY_ENV[ModelProvider(model_provider)]
+    api_key = os.getenv(env_name)
+    if not api_key:
+        # Print error to console
+        print(f"API Key Error: Please make sure {env_name} is set in your .env file.")
+        raise ValueError(f"{label} API key not found.  Please make sure {env_name} is set in your .env file.")
+    return api_key
+
+
+# Global registry, created on first use so that the pool settings are read after .env is loaded
+_registry: ModelClientRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelClientRegistry:
+    """Get the global model client registry (pool limits from LLM_HTTP_* environment variables)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelClientRegistry(
+                    max_connections=int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 100)),
+                    max_keepalive_connections=int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", 20)),
+                    keepalive_expiry=float(os.environ.get("LLM_HTTP_KEEPALIVE_EXPIRY", 60)),
+                )
+    return _registry
+
+
+def get_model(model_name: str, model_provider: ModelProvider, **params) -> ChatOpenAI | ChatGroq | ChatAnthropic | None:
+    """Get the shared client for a model; extra params (e.g. temperature) get a client of their own."""
+    return get_model_registry().get(model_name, model_provider, **params)
@@ -1,3 +1,4 @@
+import os
 import sys
 
 from dotenv import load_dotenv
@@ -29,6 +30,12 @@ from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from tabulate import tabulate
 from utils.visualize import save_graph_as_png
+from data.cache import configure_cache
+from tools.recorder import DATA_MODES, configure_data_mode
+from utils.llm_cache import configure_llm_cache
+from utils.llm_metrics import get_llm_metrics
+from tools.api import CryptoAPI
+from tools.kline_stream import configure_kline_stream, connect_websocket, replay_file
 
 # Load environment variables from .env file
 load_dotenv()
@@ -56,7 +63,15 @@ def run_hedge_fund(
     selected_analysts: list[str] = [],
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
+    data_mode: str | None = None,
+    data_archive: str | None = None,
+    batch_llm_prompts: bool = False,
+    llm_metrics_path: str | None = None,
 ):
+    # Switch data sources to record/replay when requested
+    if data_mode:
+        configure_data_mode(data_mode, data_archive)
+
     # Start progress tracking
     progress.start()
 
@@ -86,6 +101,8 @@ def run_hedge_fund(
                     "show_reasoning": show_reasoning,
                     "model_name": model_name,
                     "model_provider": model_provider,
+                    # Persona agents put several tickers in one prompt instead of one prompt per ticker
+                    "batch_llm_prompts": batch_llm_prompts,
                 },
             },
         )
@@ -98,6 +115,10 @@ def run_hedge_fund(
         # Stop progress tracking
         progress.stop()
 
+        # Write the token, latency and cost totals of every LLM call so far
+        if llm_metrics_path:
+            get_llm_metrics().dump(llm_metrics_path)
+
 
 def start(state: AgentState):
     """Initialize the workflow with the input message."""
@@ -144,9 +165,15 @@ def run_crypto_trading(
     initial_capital: float = 10000,
     show_reasoning: bool = False,
     model_name: str = "gpt-4",
-    model_provider: str = "OpenAI"
+    model_provider: str = "OpenAI",
+    data_mode: str | None = None,
+    data_archive: str | None = None,
 ):
     """运行加密货币交易系统"""
+    # 按需切换到录制/回放数据模式
+    if data_mode:
+        configure_data_mode(data_mode, data_archive)
+
     # 初始化投资组合
     portfolio = {
         "cash": initial_capital,
@@ -229,8 +256,38 @@ if __name__ == "__main__":
     )
     parser.add_argument("--end-date", type=str, help="End date (YYYY-MM-DD). Defaults to today")
     parser.add_argument("--show-reasoning", action="store_true", help="Show reasoning from each agent")
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Persist fetched market data in this directory so later runs skip the API (default: memory only)",
+    )
+    parser.add_argument(
+        "--data-mode",
+        choices=DATA_MODES,
+        default="live",
+        help="live: fetch from the network; record: fetch and archive every response; replay: serve responses from the archive only",
+    )
+    parser.add_argument("--data-archive", type=str, help="Archive file used by the record and replay data modes")
+    parser.add_argument("--llm-cache", type=str, help="SQLite file caching LLM responses; re-runs with identical prompts are served from it")
+    parser.add_argument(
+        "--kline-replay",
+        type=str,
+        help="JSON-lines file of recorded Binance kline/ticker messages to load into the streaming buffers before running",
+    )
+    parser.add_argument(
+        "--kline-websocket",
+        action="store_true",
+        help="Warm in-memory kline buffers from REST and keep them current from Binance websockets for the duration of the run; mainly useful for long-running or scheduled use, a single short run gains little over REST",
+    )
 
     args = parser.parse_args()
+    if args.data_mode != "live" and not args.data_archive:
+        parser.error(f"--data-mode {args.data_mode} needs --data-archive")
+    if args.data_mode == "replay" and not os.path.exists(args.data_archive):
+        parser.error(f"--data-archive {args.data_archive} does not exist; record it first with --data-mode record")
+    if args.kline_websocket and args.data_mode == "replay":
+        parser.error("--kline-websocket needs network access and cannot be combined with --data-mode replay")
 
     # Parse symbols from comma-separated string
     symbols = [symbol.strip() for symbol in args.symbols.split(",")]
@@ -280,14 +337,46 @@ if __name__ == "__main__":
         }
     }
 
-    # 运行加密货币交易系统
-    result = run_crypto_trading(
-        symbols=symbols,
-        start_date=start_date,
-        end_date=end_date,
-        initial_capital=args.initial_cash,
-        show_reasoning=args.show_reasoning,
-        model_name=model_choice,
-        model_provider=model_provider
-    )
+    # 持久化行情数据缓存
+    if args.cache_dir:
+        configure_cache(args.cache_dir)
+
+    # 缓存LLM响应
+    if args.llm_cache:
+        configure_llm_cache(args.llm_cache)
+
+    # 启用流式K线缓冲区
+    websocket = None
+    if args.kline_replay or args.kline_websocket:
+        stream = configure_kline_stream()
+        if args.kline_replay:
+            count = replay_file(args.kline_replay, stream)
+            print(f"Loaded {count} streamed messages from {args.kline_replay}")
+        if args.kline_websocket:
+            websocket = connect_websocket(stream, symbols, ["1h"])
+
+    try:
+        # 先用REST预热缓冲区（按所选数据模式记录），之后由实时推送保持最新
+        if websocket is not None:
+            configure_data_mode(args.data_mode, args.data_archive)
+            crypto_api = CryptoAPI()
+            for symbol in symbols:
+                crypto_api.get_crypto_prices(symbol, start_date, end_date, interval="1h")
+
+        # 运行加密货币交易系统
+        result = run_crypto_trading(
+            symbols=symbols,
+            start_date=start_date,
+            end_date=end_date,
+            initial_capital=args.initial_cash,
+            show_reasoning=args.show_reasoning,
+            model_name=model_choice,
+            model_provider=model_provider,
+            data_mode=args.data_mode,
+            data_archive=args.data_archive,
+        )
+    finally:
+        # 停止websocket线程，否则进程无法退出
+        if websocket is not None:
+            websocket.stop()
     print_trading_output(result)
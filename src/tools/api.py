@@ -1,58 +1,82 @@
+import asyncio
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
 import pandas as pd
-import requests
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
 
 from data.cache import get_cache
+from data.kline_store import Klines, empty_klines, klines_from_rows, klines_to_df, merge_klines, missing_buckets, resample_klines, slice_klines
+from data.price_store import PriceColumns, date_to_epoch_ns
 from data.models import (
     CompanyNews,
     CompanyNewsResponse,
     FinancialMetrics,
-    FinancialMetricsResponse,
+    LazyModelList,
     Price,
-    PriceResponse,
+    check_records,
     LineItem,
     LineItemResponse,
     InsiderTrade,
     InsiderTradeResponse,
 )
+from tools.binance_client import get_binance_client, get_binance_pool
+from tools.http_client import get_http_client
+from tools.kline_stream import get_kline_stream
+from tools.recorder import ReplayMissError, get_recorder
+from tools.singleflight import coalesce
 
 # Global cache instance
 _cache = get_cache()
 
-
-def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
-    """Fetch price data from cache or API."""
-    # Check cache first
+# Seconds a fetched range that includes today is reused before it is fetched again (today's bar can still change)
+PARTIAL_PRICES_TTL = float(os.environ.get("HEDGE_FUND_PARTIAL_PRICES_TTL", 300))
+
+# The data functions below are wrapped with @coalesce: when several agents ask for the same
+# data at the same time (e.g. parallel analyst nodes), only one request goes out and the
+# others wait for its result.
+
+
+@coalesce
+def get_prices(ticker: str, start_date: str, end_date: str) -> PriceColumns | list[Price]:
+    """Fetch price data from cache or API, requesting only the date ranges not fetched before."""
+    for gap_start, gap_end in _cache.get_missing_price_ranges(ticker, start_date, end_date):
+        prices = _fetch_prices(ticker, gap_start, gap_end)
+        if len(prices):
+            _cache.set_prices(ticker, prices)
+
+        # Today's bar can still change, so only mark ranges up to yesterday as complete; the rest
+        # counts as fetched for PARTIAL_PRICES_TTL seconds, so repeated calls within a run reuse it
+        today = datetime.now(timezone.utc).date()
+        last_complete_day = (today - timedelta(days=1)).isoformat()
+        covered_end = min(gap_end, last_complete_day)
+        if gap_start <= covered_end:
+            _cache.add_price_coverage(ticker, gap_start, covered_end)
+        if gap_end > last_complete_day:
+            _cache.add_price_coverage(ticker, max(gap_start, today.isoformat()), gap_end, ttl=PARTIAL_PRICES_TTL)
+
+    # Binary-search the cached columns for the date range
     if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = [Price(**price) for price in cached_data if start_date <= price["time"] <= end_date]
-        if filtered_data:
-            return filtered_data
+        return cached_data.slice(start_date, end_date)
+    return []
 
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
 
+def _fetch_prices(ticker: str, start_date: str, end_date: str) -> PriceColumns:
+    """Fetch daily prices for a date range from the API."""
     url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    data = get_http_client().get(url)
 
-    # Parse response with Pydantic model
-    price_response = PriceResponse(**response.json())
-    prices = price_response.prices
-
-    if not prices:
-        return []
-
-    # Cache the results as dicts
-    _cache.set_prices(ticker, [p.model_dump() for p in prices])
-    return prices
+    # Parse straight into validated columns; Price models are only built if a caller indexes them
+    return PriceColumns.from_json(data.get("prices") or [])
 
 
+@coalesce
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -63,34 +87,34 @@ def get_financial_metrics(
     # Check cache first
     if cached_data := _cache.get_financial_metrics(ticker):
         # Filter cached data by date and limit
-        filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
-        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
+        filtered_data = [metric for metric in cached_data if metric["report_period"] <= end_date]
+        filtered_data.sort(key=lambda x: x["report_period"], reverse=True)
         if filtered_data:
-            return filtered_data[:limit]
+            return LazyModelList(FinancialMetrics, filtered_data[:limit])
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
     url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
+    data = get_http_client().get(url)
 
-    # Parse response with Pydantic model
-    metrics_response = FinancialMetricsResponse(**response.json())
-    # Return the FinancialMetrics objects directly instead of converting to dict
-    financial_metrics = metrics_response.financial_metrics
+    # Validate the rows column-wise; FinancialMetrics objects are only built when accessed
+    financial_metrics = check_records(FinancialMetrics, data.get("financial_metrics") or [])
 
     if not financial_metrics:
         return []
 
     # Cache the results as dicts
-    _cache.set_financial_metrics(ticker, [m.model_dump() for m in financial_metrics])
-    return financial_metrics
+    _cache.set_financial_metrics(ticker, financial_metrics)
+    return LazyModelList(FinancialMetrics, financial_metrics)
+
+
+# Fields every line item row carries, whatever line items were requested
+LINE_ITEM_BASE_FIELDS = ("ticker", "report_period", "period", "currency")
+
+# Maximum number of tickers sent in one line item search
+LINE_ITEMS_BATCH_SIZE = 25
 
 
+@coalesce
 def search_line_items(
     ticker: str,
     line_items: list[str],
@@ -98,34 +122,114 @@ def search_line_items(
     period: str = "ttm",
     limit: int = 10,
 ) -> list[LineItem]:
-    """Fetch line items from API."""
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+    """Fetch line items from cache or API."""
+    return search_line_items_batch([ticker], line_items, end_date, period, limit)[ticker]
+
+
+@coalesce
+def search_line_items_batch(
+    tickers: list[str],
+    line_items: list[str],
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+) -> dict[str, list[LineItem]]:
+    """
+    Fetch line items for many tickers with a single search request.
+
+    Tickers whose answer is already in the cache (same period, a superset of the fields, a
+    later or equal end date and enough rows) are served locally; the rest are requested
+    together and the results are split per ticker into the cache. Requesting the union of
+    several callers' line items up front lets their later, narrower calls hit the cache.
+    """
+    results = {}
+    missing = []
+    for ticker in tickers:
+        cached = _get_cached_line_items(ticker, line_items, end_date, period, limit)
+        if cached is None:
+            missing.append(ticker)
+        else:
+            results[ticker] = cached
+
+    for i in range(0, len(missing), LINE_ITEMS_BATCH_SIZE):
+        batch = missing[i : i + LINE_ITEMS_BATCH_SIZE]
+        fetched = _fetch_line_items(batch, line_items, end_date, period, limit)
+
+        # If the response hit the request limit, it may have been shared across tickers;
+        # re-ask individually for any ticker that came back short.
+        if len(batch) > 1 and sum(len(rows) for rows in fetched.values()) >= limit * len(batch):
+            for ticker in [t for t in batch if len(fetched[t]) < limit]:
+                fetched.update(_fetch_line_items([ticker], line_items, end_date, period, limit))
+
+        for ticker in batch:
+            rows = fetched[ticker]
+            _cache.set_line_items(ticker, [row.model_dump() for row in rows])
+            _cache.add_line_item_query(
+                ticker,
+                {
+                    "period": period,
+                    "end_date": end_date,
+                    "limit": limit,
+                    "line_items": sorted(line_items),
+                    "rows": len(rows),
+                    "oldest_report_period": min((row.report_period for row in rows), default=None),
+                },
+            )
+            results[ticker] = rows[:limit]
+
+    return results
 
+
+def _fetch_line_items(tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int) -> dict[str, list[LineItem]]:
+    """Run one line item search and group the results by ticker, newest first."""
     url = "https://api.financialdatasets.ai/financials/search/line-items"
 
     body = {
-        "tickers": [ticker],
+        "tickers": tickers,
         "line_items": line_items,
         "end_date": end_date,
         "period": period,
-        "limit": limit,
+        "limit": limit * len(tickers),
     }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
-    data = response.json()
+    data = get_http_client().post(url, json=body)
     response_model = LineItemResponse(**data)
-    search_results = response_model.search_results
-    if not search_results:
-        return []
 
-    # Cache the results
-    return search_results[:limit]
+    grouped = {ticker: [] for ticker in tickers}
+    for item in response_model.search_results:
+        grouped.setdefault(item.ticker, []).append(item)
+    for rows in grouped.values():
+        rows.sort(key=lambda x: x.report_period, reverse=True)
+    return grouped
 
 
+def _get_cached_line_items(ticker: str, line_items: list[str], end_date: str, period: str, limit: int) -> list[LineItem] | None:
+    """Answer a line item search from the cache, or return None if a cached search can't cover it."""
+    cached_rows = _cache.get_line_items(ticker)
+    if cached_rows is None:
+        return None
+
+    requested = set(line_items)
+    fields = set(LINE_ITEM_BASE_FIELDS) | requested
+    for query in _cache.get_line_item_queries(ticker):
+        if query["period"] != period or end_date > query["end_date"] or not requested <= set(query["line_items"]):
+            continue
+
+        # A search that came back short returned everything up to its end date
+        exhausted = query["rows"] < query["limit"]
+        oldest = query["oldest_report_period"]
+        rows = [row for row in cached_rows if row["period"] == period and row["report_period"] <= end_date and (exhausted or oldest is None or row["report_period"] >= oldest)]
+        if len(rows) < limit and not exhausted:
+            continue
+        rows.sort(key=lambda row: row["report_period"], reverse=True)
+        rows = rows[:limit]
+        if not all(requested <= row.keys() for row in rows):
+            continue
+        return [LineItem(**{key: value for key, value in row.items() if key in fields}) for row in rows]
+
+    return None
+
+
+@coalesce
 def get_insider_trades(
     ticker: str,
     end_date: str,
@@ -144,10 +248,6 @@ def get_insider_trades(
             return filtered_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
     all_trades = []
     current_end_date = end_date
     
@@ -157,11 +257,7 @@ def get_insider_trades(
             url += f"&filing_date_gte={start_date}"
         url += f"&limit={limit}"
         
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
-        
-        data = response.json()
+        data = get_http_client().get(url)
         response_model = InsiderTradeResponse(**data)
         insider_trades = response_model.insider_trades
         
@@ -189,6 +285,7 @@ def get_insider_trades(
     return all_trades
 
 
+@coalesce
 def get_company_news(
     ticker: str,
     end_date: str,
@@ -207,10 +304,6 @@ def get_company_news(
             return filtered_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
     all_news = []
     current_end_date = end_date
     
@@ -220,11 +313,7 @@ def get_company_news(
             url += f"&start_date={start_date}"
         url += f"&limit={limit}"
         
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {response.status_code} - {response.text}")
-        
-        data = response.json()
+        data = get_http_client().get(url)
         response_model = CompanyNewsResponse(**data)
         company_news = response_model.news
         
@@ -266,8 +355,11 @@ def get_market_cap(
     return market_cap
 
 
-def prices_to_df(prices: list[Price]) -> pd.DataFrame:
-    """Convert prices to a DataFrame."""
+def prices_to_df(prices: PriceColumns | list[Price]) -> pd.DataFrame:
+    """Convert prices to a DataFrame the caller owns and may modify."""
+    if isinstance(prices, PriceColumns):
+        return prices.to_df()
+
     df = pd.DataFrame([p.model_dump() for p in prices])
     df["Date"] = pd.to_datetime(df["time"])
     df.set_index("Date", inplace=True)
@@ -278,68 +370,330 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     return df
 
 
+def prices_to_view_df(prices: PriceColumns | list[Price]) -> pd.DataFrame:
+    """
+    Read-only OHLCV DataFrame over the cached price columns, without copying them.
+
+    For internal consumers that only read the prices (e.g. the indicator engines); writing to
+    the frame would change the cache, or fail on memory-mapped columns.
+    """
+    if isinstance(prices, PriceColumns):
+        return prices.to_df(copy=False)
+    return prices_to_df(prices)
+
+
 # Update the get_price_data function to use the new functions
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
     prices = get_prices(ticker, start_date, end_date)
     return prices_to_df(prices)
 
 
+# Async variants: the sync functions above run in worker threads, so they share the
+# cache and the pooled HTTP client with the rest of the process.
+async def get_prices_async(ticker: str, start_date: str, end_date: str) -> PriceColumns | list[Price]:
+    return await asyncio.to_thread(get_prices, ticker, start_date, end_date)
+
+
+async def get_financial_metrics_async(ticker: str, end_date: str, period: str = "ttm", limit: int = 10) -> list[FinancialMetrics]:
+    return await asyncio.to_thread(get_financial_metrics, ticker, end_date, period, limit)
+
+
+async def search_line_items_async(ticker: str, line_items: list[str], end_date: str, period: str = "ttm", limit: int = 10) -> list[LineItem]:
+    return await asyncio.to_thread(search_line_items, ticker, line_items, end_date, period, limit)
+
+
+async def get_insider_trades_async(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list[InsiderTrade]:
+    return await asyncio.to_thread(get_insider_trades, ticker, end_date, start_date, limit)
+
+
+async def get_company_news_async(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list[CompanyNews]:
+    return await asyncio.to_thread(get_company_news, ticker, end_date, start_date, limit)
+
+
+# Shared by every prefetch_universe call (whatever thread or event loop it runs in), so overlapping
+# prefetches stay within one concurrency budget; size from FINANCIAL_DATASETS_PREFETCH_CONCURRENCY
+_prefetch_limiter = threading.BoundedSemaphore(int(os.environ.get("FINANCIAL_DATASETS_PREFETCH_CONCURRENCY", 8)))
+
+
+def _limited(fn, *args):
+    with _prefetch_limiter:
+        return fn(*args)
+
+
+async def prefetch_universe(
+    tickers: list[str],
+    datasets: list[str],
+    start_date: str,
+    end_date: str,
+    max_concurrency: int = 8,
+    line_items: list[str] | None = None,
+) -> dict[str, dict[str, list]]:
+    """
+    Fetch several datasets for many tickers concurrently, warming the cache.
+
+    Args:
+        tickers: Tickers to fetch
+        datasets: Any of "prices", "financial_metrics", "line_items", "insider_trades", "company_news"
+        start_date: Start of the window (prices, insider trades, company news)
+        end_date: End of the window
+        max_concurrency: Maximum number of this call's fetches running at once; all calls together
+            are further limited to FINANCIAL_DATASETS_PREFETCH_CONCURRENCY (default 8)
+        line_items: Line item names, required when "line_items" is requested
+
+    Returns:
+        ticker -> dataset -> fetched data
+    """
+    fetchers = {
+        "prices": partial(get_prices, start_date=start_date, end_date=end_date),
+        "financial_metrics": partial(get_financial_metrics, end_date=end_date, limit=10),
+        "insider_trades": partial(get_insider_trades, end_date=end_date, start_date=start_date, limit=1000),
+        "company_news": partial(get_company_news, end_date=end_date, start_date=start_date, limit=1000),
+    }
+    unknown = set(datasets) - set(fetchers) - {"line_items"}
+    if unknown:
+        raise ValueError(f"Unknown datasets: {sorted(unknown)}")
+    if "line_items" in datasets and not line_items:
+        raise ValueError("line_items must be given to prefetch the line_items dataset")
+
+    loop = asyncio.get_running_loop()
+    results = {ticker: {} for ticker in tickers}
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+
+        async def fetch(ticker: str, dataset: str):
+            results[ticker][dataset] = await loop.run_in_executor(executor, _limited, fetchers[dataset], ticker)
+
+        async def fetch_line_items(batch: list[str]):
+            fetched = await loop.run_in_executor(executor, _limited, partial(search_line_items_batch, batch, line_items, end_date))
+            for ticker, rows in fetched.items():
+                results[ticker]["line_items"] = rows
+
+        tasks = [fetch(ticker, dataset) for ticker in tickers for dataset in datasets if dataset != "line_items"]
+        if "line_items" in datasets:
+            # Line items for many tickers go out as one batched search per chunk
+            tasks += [fetch_line_items(tickers[i : i + LINE_ITEMS_BATCH_SIZE]) for i in range(0, len(tickers), LINE_ITEMS_BATCH_SIZE)]
+        await asyncio.gather(*tasks)
+
+    return results
+
+
+# 支持的K线周期 -> Binance API格式
+KLINE_INTERVALS = {
+    "1m": Client.KLINE_INTERVAL_1MINUTE,
+    "5m": Client.KLINE_INTERVAL_5MINUTE,
+    "15m": Client.KLINE_INTERVAL_15MINUTE,
+    "1h": Client.KLINE_INTERVAL_1HOUR,
+    "4h": Client.KLINE_INTERVAL_4HOUR,
+    "1d": Client.KLINE_INTERVAL_1DAY,
+}
+
+
+# K线周期长度（毫秒）
+KLINE_INTERVAL_MS = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 3_600_000,
+    "4h": 4 * 3_600_000,
+    "1d": 24 * 3_600_000,
+}
+
+
+def _closed_klines(klines: Klines, now_ms: int) -> Klines:
+    """只保留已收盘的K线"""
+    closed = klines["close_time"] < now_ms
+    return {name: array[closed] for name, array in klines.items()}
+
+
+# 24h行情快照的缓存时间（秒）
+MARKET_SNAPSHOT_TTL = 10.0
+
+# symbol -> (获取时间, 行情数据)
+_market_snapshot: dict[str, tuple[float, dict]] = {}
+_market_snapshot_lock = threading.Lock()
+
+
+def _parse_market_data(ticker: dict) -> dict:
+    return {
+        'price_change': float(ticker['priceChange']),
+        'price_change_percent': float(ticker['priceChangePercent']),
+        'weighted_avg_price': float(ticker['weightedAvgPrice']),
+        'volume': float(ticker['volume']),
+        'quote_volume': float(ticker['quoteVolume'])
+    }
+
+
 class CryptoAPI:
     def __init__(self):
-        self.client = Client(
-            os.getenv('BINANCE_API_KEY'),
-            os.getenv('BINANCE_API_SECRET')
+        self._client = None
+
+    @property
+    def client(self) -> Client:
+        # 进程内共享的客户端，首次使用时才创建：回放模式下完全不需要联网
+        if self._client is None:
+            self._client = get_binance_client()
+        return self._client
+
+    def _call(self, method: str, *args, **kwargs):
+        """调用Binance客户端方法（受请求权重限制），按数据模式录制或回放响应"""
+        return get_recorder().call(
+            "binance",
+            {"method": method, "args": list(args), "kwargs": kwargs},
+            lambda: get_binance_pool().call(self.client, method, *args, **kwargs),
         )
     
+    def _fetch_klines(self, symbol: str, interval: str, start, end) -> Klines:
+        rows = self._call("get_historical_klines", symbol, KLINE_INTERVALS[interval], start, end)
+        return klines_from_rows(rows)
+
+    def _get_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Klines:
+        """已收盘K线走缓存，只增量拉取缺失部分；未收盘的K线不入缓存，但仍返回"""
+        # 流式缓冲区覆盖整个窗口时直接使用，不发REST请求
+        stream = get_kline_stream()
+        if stream is not None and (klines := stream.get_klines(symbol, interval, start_ms, end_ms)) is not None:
+            return klines
+
+        now_ms = get_recorder().clock_ms("binance", {"symbol": symbol, "interval": interval, "start_ms": start_ms, "end_ms": end_ms})
+        stored, covered_from = _cache.get_klines(symbol, interval)
+        tail = empty_klines()
+
+        if stored is None or not len(stored["open_time"]):
+            tail = self._fetch_klines(symbol, interval, start_ms, end_ms)
+            _cache.set_klines(symbol, interval, _closed_klines(tail, now_ms), covered_from=start_ms)
+        else:
+            # 补齐缓存之前的历史
+            first_open = int(stored["open_time"][0])
+            if start_ms < min(first_open, covered_from if covered_from is not None else first_open):
+                head = self._fetch_klines(symbol, interval, start_ms, first_open - 1)
+                _cache.set_klines(symbol, interval, _closed_klines(head, now_ms), covered_from=start_ms)
+
+            # 只拉取最后一根已收盘K线之后的数据
+            last_close = int(stored["close_time"][-1])
+            if last_close < end_ms:
+                tail = self._fetch_klines(symbol, interval, last_close + 1, end_ms)
+                _cache.set_klines(symbol, interval, _closed_klines(tail, now_ms))
+
+        stored, _ = _cache.get_klines(symbol, interval)
+        klines = slice_klines(stored, start_ms, end_ms)
+
+        unclosed = tail["close_time"] >= now_ms
+        if unclosed.any():
+            klines = merge_klines(klines, slice_klines({name: array[unclosed] for name, array in tail.items()}, start_ms, end_ms))
+
+        # 用REST结果回填流式缓冲区，之后由实时推送接着更新
+        if stream is not None:
+            stream.seed(symbol, interval, klines)
+        return klines
+
     def get_crypto_prices(self, symbol: str, start_date: str, end_date: str, interval: str = "1h") -> pd.DataFrame:
         """获取加密货币历史价格数据"""
         try:
-            # 转换时间间隔到Binance API格式
-            interval_map = {
-                "1m": Client.KLINE_INTERVAL_1MINUTE,
-                "5m": Client.KLINE_INTERVAL_5MINUTE,
-                "15m": Client.KLINE_INTERVAL_15MINUTE,
-                "1h": Client.KLINE_INTERVAL_1HOUR,
-                "4h": Client.KLINE_INTERVAL_4HOUR,
-                "1d": Client.KLINE_INTERVAL_1DAY,
-            }
-            
-            klines = self.client.get_historical_klines(
-                symbol,
-                interval_map.get(interval, Client.KLINE_INTERVAL_1HOUR),
-                start_date,
-                end_date
-            )
-            
-            # 转换为DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'buy_base_volume',
-                'buy_quote_volume', 'ignore'
-            ])
-            
-            # 处理数据类型
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
-                
-            return df.set_index('timestamp')
-            
+            if interval not in KLINE_INTERVALS:
+                interval = "1h"
+
+            try:
+                start_ms = date_to_epoch_ns(start_date) // 1_000_000
+                end_ms = date_to_epoch_ns(end_date) // 1_000_000
+            except ValueError:
+                # 非日期格式（如 "1 day ago UTC"）交给Binance解析，不走缓存
+                return klines_to_df(self._fetch_klines(symbol, interval, start_date, end_date))
+
+            return klines_to_df(self._get_klines(symbol, interval, start_ms, end_ms))
+
+        except ReplayMissError:
+            # 回放缺少录制数据时直接报错，不能当作没有数据
+            raise
         except Exception as e:
             print(f"Error fetching crypto prices: {symbol} - {e}")
             return pd.DataFrame()
+
+    def get_crypto_prices_multi(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        intervals: list[str] = ["1h", "4h", "1d"],
+    ) -> dict[str, pd.DataFrame]:
+        """
+        一次拉取最细周期的K线，在本地聚合出其余周期（按UTC对齐，与Binance的K线边界一致）。
+
+        源K线有缺口时，缺口所在的聚合K线不会用不完整的数据拼出来：窗口内只要有聚合K线缺失，
+        该周期就打印警告并回退为直接向Binance拉取。
+        """
+        intervals = [interval if interval in KLINE_INTERVALS else "1h" for interval in intervals]
+        try:
+            start_ms = date_to_epoch_ns(start_date) // 1_000_000
+            end_ms = date_to_epoch_ns(end_date) // 1_000_000
+        except ValueError:
+            return {interval: self.get_crypto_prices(symbol, start_date, end_date, interval) for interval in intervals}
+
+        source = min(intervals, key=KLINE_INTERVAL_MS.get)
+        source_ms = KLINE_INTERVAL_MS[source]
+        longest_ms = max(KLINE_INTERVAL_MS[interval] for interval in intervals)
+        # 录制/回放模式下使用录制时的时间，回放时对K线是否收盘、是否完整的判断与录制时一致
+        now_ms = get_recorder().clock_ms("binance", {"symbol": symbol, "intervals": intervals, "start_ms": start_ms, "end_ms": end_ms})
+
+        try:
+            # 多拉到最长周期最后一根K线的末尾，保证窗口内最后一根聚合K线完整
+            fine = self._get_klines(symbol, source, start_ms, end_ms + longest_ms - source_ms)
+        except ReplayMissError:
+            raise
+        except Exception as e:
+            print(f"Error fetching crypto prices: {symbol} - {e}")
+            return {interval: pd.DataFrame() for interval in intervals}
+
+        frames = {}
+        for interval in intervals:
+            target_ms = KLINE_INTERVAL_MS[interval]
+            if target_ms % source_ms:
+                frames[interval] = self.get_crypto_prices(symbol, start_date, end_date, interval)
+                continue
+
+            klines = slice_klines(resample_klines(fine, source_ms, target_ms, now_ms), start_ms, end_ms)
+            missing = missing_buckets(klines, target_ms, start_ms, min(end_ms, now_ms))
+            if len(missing):
+                first_missing = pd.Timestamp(int(missing[0]), unit="ms")
+                print(f"{symbol} {source} data has gaps; {len(missing)} {interval} candles (first at {first_missing}) cannot be aggregated, fetching {interval} directly")
+                frames[interval] = self.get_crypto_prices(symbol, start_date, end_date, interval)
+            else:
+                frames[interval] = klines_to_df(klines)
+        return frames
     
-    def get_market_data(self, symbol: str) -> dict:
-        """获取市场数据如24h成交量、价格变化等"""
+    def get_market_snapshot(self, symbols: list[str], ttl: float = MARKET_SNAPSHOT_TTL) -> dict[str, dict]:
+        """一次请求获取多个交易对的24h行情，结果在进程内缓存 ttl 秒"""
+        now = time.monotonic()
+        with _market_snapshot_lock:
+            snapshot = {symbol: _market_snapshot[symbol][1] for symbol in symbols if symbol in _market_snapshot and now - _market_snapshot[symbol][0] < ttl}
+        # 优先使用流式数据
+        if (stream := get_kline_stream()) is not None:
+            for symbol in symbols:
+                if symbol not in snapshot and (market_data := stream.get_market_data(symbol)) is not None:
+                    snapshot[symbol] = market_data
+        missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in snapshot]
+        if not missing:
+            return snapshot
+
         try:
-            ticker = self.client.get_ticker(symbol=symbol)
-            return {
-                'price_change': float(ticker['priceChange']),
-                'price_change_percent': float(ticker['priceChangePercent']),
-                'weighted_avg_price': float(ticker['weightedAvgPrice']),
-                'volume': float(ticker['volume']),
-                'quote_volume': float(ticker['quoteVolume'])
-            }
+            if len(missing) == 1:
+                tickers = [self._call("get_ticker", symbol=missing[0])]
+            else:
+                tickers = self._call("get_ticker", symbols=json.dumps(missing, separators=(",", ":")))
         except BinanceAPIException as e:
-            print(f"Error fetching market data: {e}")
-            return {}
+            if len(missing) == 1:
+                print(f"Error fetching market data: {e}")
+                return snapshot
+            # 批量请求中有无效交易对时整个请求失败，逐个重试
+            for symbol in missing:
+                snapshot.update(self.get_market_snapshot([symbol], ttl))
+            return snapshot
+
+        fetched = {ticker["symbol"]: _parse_market_data(ticker) for ticker in tickers}
+        with _market_snapshot_lock:
+            for symbol, market_data in fetched.items():
+                _market_snapshot[symbol] = (now, market_data)
+        snapshot.update(fetched)
+        return snapshot
+
+    def get_market_data(self, symbol: str) -> dict:
+        """获取市场数据如24h成交量、价格变化等"""
+        return self.get_market_snapshot([symbol]).get(symbol, {})
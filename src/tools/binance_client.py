@@ -0,0 +1,138 @@
+import json
+import os
+import threading
+import time
+
+from binance.client import Client
+from requests.adapters import HTTPAdapter
+
+from tools.http_client import _parse_retry_after
+
+# Binance's default request-weight budget per IP and minute
+DEFAULT_WEIGHT_LIMIT = 6000
+
+# Request weight of the client methods we call (anything else counts as 1)
+REQUEST_WEIGHTS = {
+    "get_historical_klines": 2,
+    "get_klines": 2,
+    "get_ticker": 2,
+}
+
+
+def request_weight(method: str, kwargs: dict) -> int:
+    """Request weight of a client call; 24h ticker stats for several symbols cost more."""
+    if method == "get_ticker" and "symbol" not in kwargs:
+        symbols = kwargs.get("symbols")
+        count = len(json.loads(symbols)) if symbols else None
+        if count is None or count > 100:
+            return 80
+        return 2 if count <= 20 else 40
+    return REQUEST_WEIGHTS.get(method, 1)
+
+
+class WeightLimiter:
+    """
+    Tracks Binance's used request weight and holds callers back before the per-minute limit.
+
+    The used weight comes from the x-mbx-used-weight-1m header of every response. When the next
+    request would push it past `limit * headroom`, callers sleep until the next minute window;
+    a 429/418 response blocks everyone for its Retry-After period.
+    """
+
+    def __init__(self, limit: int = DEFAULT_WEIGHT_LIMIT, headroom: float = 0.9):
+        self.limit = limit
+        self.headroom = headroom
+        self._used = 0
+        self._window = 0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: int = 1):
+        """Block until a request of the given weight fits into the current minute's budget."""
+        while True:
+            with self._lock:
+                now = time.time()
+                window = int(now // 60)
+                if window != self._window:
+                    self._window, self._used = window, 0
+                if now >= self._blocked_until and self._used + weight <= self.limit * self.headroom:
+                    # Reserve the weight until the response reports the server's count
+                    self._used += weight
+                    return
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    wait = (window + 1) * 60 - now
+            time.sleep(wait)
+
+    def observe(self, response, *args, **kwargs):
+        """requests response hook: sync the used weight with the server and honour rate-limit bans."""
+        with self._lock:
+            used = response.headers.get("x-mbx-used-weight-1m")
+            if used is not None:
+                window = int(time.time() // 60)
+                self._used = max(int(used), self._used if window == self._window else 0)
+                self._window = window
+            if response.status_code in (418, 429):
+                retry_after = _parse_retry_after(response.headers.get("Retry-After")) or 60.0
+                self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+
+
+class BinanceClientPool:
+    """
+    Process-wide pool of Binance clients: one lazily created Client per API key pair.
+
+    Clients are built once (including python-binance's connection ping) and reused across graph
+    runs. Their sessions get a larger keep-alive connection pool and report every response to a
+    shared WeightLimiter.
+    """
+
+    def __init__(self, pool_size: int = 16, weight_limit: int = DEFAULT_WEIGHT_LIMIT):
+        self.pool_size = pool_size
+        self.limiter = WeightLimiter(weight_limit)
+        self._clients: dict[tuple[str | None, str | None], Client] = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str | None = None, api_secret: str | None = None) -> Client:
+        """Get the client for a key pair, creating it on first use."""
+        key = (api_key, api_secret)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create(api_key, api_secret)
+            return self._clients[key]
+
+    def _create(self, api_key: str | None, api_secret: str | None) -> Client:
+        client = Client(api_key, api_secret)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        client.session.mount("https://", adapter)
+        client.session.hooks["response"].append(self.limiter.observe)
+        return client
+
+    def call(self, client: Client, method: str, *args, **kwargs):
+        """Call a client method once the weight budget allows it."""
+        self.limiter.acquire(request_weight(method, kwargs))
+        return getattr(client, method)(*args, **kwargs)
+
+
+def _pool_from_env() -> BinanceClientPool:
+    return BinanceClientPool(
+        pool_size=int(os.environ.get("BINANCE_POOL_SIZE", 16)),
+        weight_limit=int(os.environ.get("BINANCE_WEIGHT_LIMIT", DEFAULT_WEIGHT_LIMIT)),
+    )
+
+
+# Global pool instance, shared by every CryptoAPI
+_pool = _pool_from_env()
+
+
+def get_binance_pool() -> BinanceClientPool:
+    """Get the global Binance client pool."""
+    return _pool
+
+
+def get_binance_client(api_key: str | None = None, api_secret: str | None = None) -> Client:
+    """Get the shared client for a key pair (defaults to BINANCE_API_KEY / BINANCE_API_SECRET)."""
+    return _pool.get(api_key or os.getenv("BINANCE_API_KEY"), api_secret or os.getenv("BINANCE_API_SECRET"))
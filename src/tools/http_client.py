@@ -0,0 +1,163 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.recorder import get_recorder
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class APIError(Exception):
+    """Raised when a data API request fails for good (non-retryable status or retries exhausted)."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows bursts up to `capacity`, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HTTPClient:
+    """
+    Shared HTTP client for the financialdatasets.ai API.
+
+    Keeps one pooled keep-alive session, caps the number of requests in flight, rate-limits
+    with a token bucket, and retries 429/5xx responses and connection errors with jittered
+    exponential backoff (honouring Retry-After when the server sends it).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: float = 10.0,
+        burst: int | None = None,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = TokenBucket(requests_per_second, burst or max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _headers(self) -> dict[str, str]:
+        headers = {}
+        if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+            headers["X-API-KEY"] = api_key
+        return headers
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        # Full jitter keeps many clients from retrying in lockstep
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def request(self, method: str, url: str, **kwargs) -> dict:
+        """Send a request and return the decoded JSON body (recorded or replayed per the data mode)."""
+        return get_recorder().call(
+            "financialdatasets",
+            {"method": method, "url": url, "params": kwargs.get("params"), "json": kwargs.get("json")},
+            lambda: self._send(method, url, **kwargs),
+        )
+
+    def _send(self, method: str, url: str, **kwargs) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.acquire()
+            try:
+                with self._semaphore:
+                    response = self.session.request(method, url, headers=self._headers(), timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise APIError(f"Error fetching data: {e}") from e
+                time.sleep(self._backoff(attempt, None))
+                continue
+
+            if response.status_code == 200:
+                return response.json()
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                raise APIError(f"Error fetching data: {response.status_code} - {response.text}", status_code=response.status_code)
+
+            time.sleep(self._backoff(attempt, _parse_retry_after(response.headers.get("Retry-After"))))
+
+    def get(self, url: str, **kwargs) -> dict:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> dict:
+        return self.request("POST", url, **kwargs)
+
+
+def _client_from_env() -> HTTPClient:
+    return HTTPClient(
+        max_concurrency=int(os.environ.get("FINANCIAL_DATASETS_MAX_CONCURRENCY", 8)),
+        requests_per_second=float(os.environ.get("FINANCIAL_DATASETS_RATE_LIMIT", 10.0)),
+        max_retries=int(os.environ.get("FINANCIAL_DATASETS_MAX_RETRIES", 5)),
+    )
+
+
+# Global client instance, shared by every data function in tools.api
+_client = _client_from_env()
+
+
+def get_http_client() -> HTTPClient:
+    """Get the global HTTP client."""
+    return _client
+
+
+def configure_http_client(**kwargs):
+    """Replace the global HTTP client, e.g. configure_http_client(max_concurrency=16, requests_per_second=20)."""
+    global _client
+    _client = HTTPClient(**kwargs)
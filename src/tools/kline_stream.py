@@ -0,0 +1,216 @@
+import json
+import socket
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+
+from data.kline_store import KLINE_COLUMNS, Klines, merge_klines, slice_klines
+
+# Fields of a Binance kline event ("k" object) -> our column names
+_KLINE_EVENT_FIELDS = {
+    "t": "open_time",
+    "o": "open",
+    "h": "high",
+    "l": "low",
+    "c": "close",
+    "v": "volume",
+    "T": "close_time",
+    "q": "quote_volume",
+    "n": "trades",
+    "V": "buy_base_volume",
+    "Q": "buy_quote_volume",
+}
+
+
+class KlineRingBuffer:
+    """Fixed-capacity columnar ring of the most recent candles for one symbol and interval."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in KLINE_COLUMNS.items()}
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _last(self) -> int:
+        return (self._start + self._size - 1) % self.capacity
+
+    def update(self, kline: dict[str, float]):
+        """Add a candle, or overwrite the newest one if it is an update of the same candle."""
+        if self._size and kline["open_time"] <= self._columns["open_time"][self._last()]:
+            if kline["open_time"] < self._columns["open_time"][self._last()]:
+                return  # out-of-order update of an older candle
+            index = self._last()
+        elif self._size < self.capacity:
+            index = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+        for name, value in kline.items():
+            self._columns[name][index] = value
+
+    def extend(self, klines: Klines):
+        """Add candles in open_time order (e.g. a REST backfill)."""
+        for i in range(len(klines["open_time"])):
+            self.update({name: klines[name][i] for name in KLINE_COLUMNS})
+
+    def klines(self) -> Klines:
+        """Copy of the buffered candles, oldest first."""
+        index = (self._start + np.arange(self._size)) % self.capacity
+        return {name: array[index] for name, array in self._columns.items()}
+
+
+class KlineStream:
+    """
+    In-memory ingestion of Binance kline updates into one ring buffer per (symbol, interval).
+
+    Feed it Binance websocket messages (raw or combined-stream format) through on_message, from a
+    live socket (connect_websocket) or a recording (replay_file / replay_socket). CryptoAPI reads
+    candles and 24h stats from here before falling back to REST.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self.capacity = capacity
+        self._buffers: dict[tuple[str, str], KlineRingBuffer] = {}
+        self._tickers: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Event time of the last replayed message; a replayed stream is "current" as of then
+        self.clock_ms: int | None = None
+
+    def now_ms(self) -> int:
+        return self.clock_ms if self.clock_ms is not None else int(time.time() * 1000)
+
+    def _buffer(self, symbol: str, interval: str) -> KlineRingBuffer:
+        key = (symbol, interval)
+        if key not in self._buffers:
+            self._buffers[key] = KlineRingBuffer(self.capacity)
+        return self._buffers[key]
+
+    def on_message(self, message: dict):
+        """Handle one Binance websocket message; anything but kline and 24h ticker events is ignored."""
+        message = message.get("data", message)
+        event = message.get("e")
+        if event == "kline":
+            k = message["k"]
+            kline = {name: float(k[field]) for field, name in _KLINE_EVENT_FIELDS.items()}
+            with self._lock:
+                self._buffer(k["s"], k["i"]).update(kline)
+        elif event == "24hrTicker":
+            with self._lock:
+                self._tickers[message["s"]] = {
+                    "price_change": float(message["p"]),
+                    "price_change_percent": float(message["P"]),
+                    "weighted_avg_price": float(message["w"]),
+                    "volume": float(message["v"]),
+                    "quote_volume": float(message["q"]),
+                }
+
+    def seed(self, symbol: str, interval: str, klines: Klines):
+        """Backfill a buffer with historical candles (e.g. from REST); streamed candles win on overlap."""
+        with self._lock:
+            buffer = self._buffer(symbol, interval)
+            merged = merge_klines(klines, buffer.klines())
+            seeded = KlineRingBuffer(self.capacity)
+            seeded.extend({name: array[-self.capacity :] for name, array in merged.items()})
+            self._buffers[(symbol, interval)] = seeded
+
+    def get_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Klines | None:
+        """Buffered candles for [start_ms, end_ms], or None unless the buffer covers the whole window."""
+        with self._lock:
+            buffer = self._buffers.get((symbol, interval))
+            if buffer is None or not len(buffer):
+                return None
+            klines = buffer.klines()
+        if klines["open_time"][0] > start_ms or klines["close_time"][-1] < min(end_ms, self.now_ms()):
+            return None
+        return slice_klines(klines, start_ms, end_ms)
+
+    def get_market_data(self, symbol: str) -> dict | None:
+        """24h stats from ticker events, or derived from the last 24 hourly candles."""
+        with self._lock:
+            if symbol in self._tickers:
+                return self._tickers[symbol]
+            buffer = self._buffers.get((symbol, "1h"))
+            if buffer is None or len(buffer) < 24:
+                return None
+            klines = {name: array[-24:] for name, array in buffer.klines().items()}
+        if klines["close_time"][-1] < self.now_ms() - 3_600_000:
+            return None  # stale
+        open_price, close_price = klines["open"][0], klines["close"][-1]
+        volume, quote_volume = float(klines["volume"].sum()), float(klines["quote_volume"].sum())
+        return {
+            "price_change": float(close_price - open_price),
+            "price_change_percent": float((close_price - open_price) / open_price * 100) if open_price else 0.0,
+            "weighted_avg_price": quote_volume / volume if volume else float(close_price),
+            "volume": volume,
+            "quote_volume": quote_volume,
+        }
+
+
+def replay(lines: Iterable[str], stream: KlineStream, speed: float | None = None) -> int:
+    """
+    Feed JSON-lines Binance messages into a stream, returning how many were read.
+
+    With `speed`, messages are paced by their event time ("E"), e.g. speed=10 replays ten times faster.
+    """
+    count = 0
+    previous = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        message = json.loads(line)
+        event_time = message.get("data", message).get("E")
+        if speed and previous is not None and event_time is not None:
+            time.sleep(max(0.0, (event_time - previous) / 1000 / speed))
+        previous = event_time if event_time is not None else previous
+        stream.on_message(message)
+        count += 1
+    if previous is not None:
+        stream.clock_ms = previous
+    return count
+
+
+def replay_file(path: str, stream: KlineStream, speed: float | None = None) -> int:
+    """Replay a JSON-lines file of recorded Binance messages."""
+    with open(path) as f:
+        return replay(f, stream, speed)
+
+
+def replay_socket(host: str, port: int, stream: KlineStream) -> int:
+    """Read JSON-lines Binance messages from a TCP socket until the sender closes it."""
+    with socket.create_connection((host, port)) as conn, conn.makefile("r") as f:
+        return replay(f, stream)
+
+
+def connect_websocket(stream: KlineStream, symbols: list[str], intervals: list[str]):
+    """Subscribe to live Binance kline streams; returns the running ThreadedWebsocketManager."""
+    from binance import ThreadedWebsocketManager
+
+    manager = ThreadedWebsocketManager()
+    manager.start()
+    streams = [f"{symbol.lower()}@kline_{interval}" for symbol in symbols for interval in intervals]
+    streams += [f"{symbol.lower()}@ticker" for symbol in symbols]
+    manager.start_multiplex_socket(callback=stream.on_message, streams=streams)
+    return manager
+
+
+# Global stream instance; None until streaming ingestion is enabled
+_stream: KlineStream | None = None
+
+
+def get_kline_stream() -> KlineStream | None:
+    """Get the global kline stream, or None when streaming is disabled."""
+    return _stream
+
+
+def configure_kline_stream(capacity: int | None = 5000) -> KlineStream | None:
+    """Enable streaming ingestion with buffers of `capacity` candles (None disables it)."""
+    global _stream
+    _stream = KlineStream(capacity) if capacity else None
+    return _stream
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable
+
+# "live": talk to the network only; "record": talk to the network and archive every response;
+# "replay": serve every response from the archive and never touch the network.
+DATA_MODES = ("live", "record", "replay")
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class DataRecorder:
+    """
+    Records data API responses to a local archive and replays them without network access.
+
+    The archive is a single SQLite file holding one zlib-compressed JSON payload per distinct
+    request, keyed by a hash of the data source and the request parameters.
+    """
+
+    def __init__(self, mode: str = "live", path: str | None = None):
+        if mode not in DATA_MODES:
+            raise ValueError(f"Unknown data mode {mode!r}, expected one of {DATA_MODES}")
+        if mode != "live" and not path:
+            raise ValueError(f"Data mode {mode!r} needs an archive path")
+
+        self.mode = mode
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        if mode != "live":
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, source TEXT NOT NULL, request TEXT NOT NULL, payload BLOB NOT NULL)")
+            self._conn.commit()
+
+    @staticmethod
+    def _key(source: str, request: dict) -> tuple[str, str]:
+        request_json = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{source}\n{request_json}".encode()).hexdigest(), request_json
+
+    def call(self, source: str, request: dict, fetch: Callable[[], any]) -> any:
+        """
+        Return the response for a request according to the current mode.
+
+        Args:
+            source: Name of the data source, e.g. "financialdatasets" or "binance"
+            request: JSON-serializable description of the request (URL, params, body, ...)
+            fetch: Performs the real request; only called in live and record modes
+        """
+        if self.mode == "live":
+            return fetch()
+
+        key, request_json = self._key(source, request)
+        if self.mode == "replay":
+            with self._lock:
+                row = self._conn.execute("SELECT payload FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise ReplayMissError(f"No recorded {source} response for {request_json}")
+            return json.loads(zlib.decompress(row[0]))
+
+        result = fetch()
+        payload = zlib.compress(json.dumps(result, separators=(",", ":")).encode())
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, source, request, payload) VALUES (?, ?, ?, ?)", (key, source, request_json, payload))
+            self._conn.commit()
+        return result
+
+    def clock_ms(self, source: str, request: dict) -> int:
+        """
+        Current time in epoch milliseconds as seen by a request, recorded and replayed like a response.
+
+        Decisions that depend on the clock (e.g. which candles have closed) therefore replay as they
+        were recorded, however much later the replay runs. Live mode reads the wall clock.
+        """
+        return self.call("clock", {"source": source, **request}, lambda: int(time.time() * 1000))
+
+    def close(self):
+        if self._conn:
+            with self._lock:
+                self._conn.close()
+
+
+# Global recorder instance
+_recorder = DataRecorder()
+
+
+def get_recorder() -> DataRecorder:
+    """Get the global data recorder."""
+    return _recorder
+
+
+def configure_data_mode(mode: str = "live", archive_path: str | None = None):
+    """Switch all data sources between live, record and replay modes."""
+    global _recorder
+    if mode == _recorder.mode and archive_path == _recorder.path:
+        return
+    _recorder.close()
+    _recorder = DataRecorder(mode, archive_path)
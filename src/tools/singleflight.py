@@ -0,0 +1,64 @@
+import functools
+import inspect
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls: callers with the same key share one in-flight execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) unless a call with the same key is already running, in which case wait for its result."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            result = future.result()
+            # Followers get their own list so callers can't see each other's mutations
+            return list(result) if isinstance(result, list) else result
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+def _freeze(value):
+    """Make an argument value hashable so it can be part of a call key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def coalesce(func: Callable) -> Callable:
+    """Decorator: concurrent calls to func with the same arguments share a single execution."""
+    signature = inspect.signature(func)
+    flight = SingleFlight()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple(_freeze(value) for value in bound.arguments.values())
+        return flight.do(key, func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,235 @@
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Indicator functions below take either a Series (one ticker) or a DataFrame (time x ticker,
+# one column per ticker) and return the same shape, so the per-ticker helpers in
+# agents.technicals and the panel engine share one implementation.
+
+PricePanel = dict[str, pd.DataFrame]
+
+
+def to_panel(prices: dict[str, pd.DataFrame], column: str) -> pd.DataFrame:
+    """
+    Stack one price column of every ticker into a right-aligned (bar x ticker) frame.
+
+    Row -1 is each ticker's latest bar, row -2 the one before, and so on; tickers with shorter
+    histories are padded with NaN at the top. Rows are positions, not dates, which is what the
+    rolling and exponential windows below count in.
+    """
+    length = max((len(df) for df in prices.values()), default=0)
+    panel = np.full((length, len(prices)), np.nan)
+    for i, df in enumerate(prices.values()):
+        if len(df):
+            panel[length - len(df) :, i] = df[column].to_numpy(dtype=np.float64)
+    return pd.DataFrame(panel, columns=list(prices))
+
+
+def ema(close, window: int):
+    return close.ewm(span=window, adjust=False).mean()
+
+
+def true_range(high, low, close):
+    """Largest of high-low, |high-prev close| and |low-prev close|, ignoring the missing previous close."""
+    prev_close = close.shift()
+    return np.fmax(np.fmax(high - low, (high - prev_close).abs()), (low - prev_close).abs())
+
+
+def adx(high, low, close, period: int = 14) -> dict[str, pd.DataFrame | pd.Series]:
+    """Average Directional Index with +DI and -DI, smoothed with an EWM of span `period`."""
+    tr = true_range(high, low, close)
+
+    up_move = high - high.shift()
+    down_move = low.shift() - low
+    valid = high.notna()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0.0).where(valid)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0.0).where(valid)
+
+    tr_smooth = tr.ewm(span=period).mean()
+    plus_di = 100 * (plus_dm.ewm(span=period).mean() / tr_smooth)
+    minus_di = 100 * (minus_dm.ewm(span=period).mean() / tr_smooth)
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
+    return {"adx": dx.ewm(span=period).mean(), "+di": plus_di, "-di": minus_di}
+
+
+def rsi(close, period: int = 14):
+    """RSI from simple rolling means of gains and losses."""
+    delta = close.diff()
+    valid = close.notna()
+    gain = delta.where(delta > 0, 0).fillna(0).where(valid)
+    loss = (-delta.where(delta < 0, 0)).fillna(0).where(valid)
+    rs = gain.rolling(window=period).mean() / loss.rolling(window=period).mean()
+    return 100 - (100 / (1 + rs))
+
+
+def bollinger_bands(close, window: int = 20):
+    sma = close.rolling(window).mean()
+    std_dev = close.rolling(window).std()
+    return sma + (std_dev * 2), sma - (std_dev * 2)
+
+
+def atr(high, low, close, period: int = 14):
+    return true_range(high, low, close).rolling(period).mean()
+
+
+def returns(close):
+    # Same as pct_change() on gap-free data, without forward-filling the padding
+    return close / close.shift() - 1
+
+
+def hurst_from_lag_std(lags, lag_std: np.ndarray) -> np.ndarray | float:
+    """
+    Slope of log(sqrt(std)) against log(lag), in closed form.
+
+    `lag_std` holds the std of each lag's differences along its last axis; a NaN std (no
+    differences for that lag) counts as the 1e-8 floor. Returns 0.5 where the fit is undefined.
+    """
+    # Add small epsilon to avoid log(0)
+    log_tau = np.log(np.fmax(1e-8, np.sqrt(lag_std)))
+    x = np.log(np.asarray(lags, dtype=np.float64))
+    x_centered = x - x.mean()
+    slope = (log_tau * x_centered).sum(axis=-1) / (x_centered * x_centered).sum()
+    return np.where(np.isfinite(slope), slope, 0.5)
+
+
+def _lag_difference_std(prices: np.ndarray, lags: range) -> np.ndarray:
+    """
+    Population std of prices[t] - prices[t - lag] for every lag, from one strided view.
+
+    `prices` is (time,) or (time, ticker) and may contain NaN (e.g. panel padding), which is ignored.
+    Returns (lag,) or (ticker, lag).
+    """
+    max_lag = lags[-1]
+    # Pad the end so every bar starts a full window; the padded differences are NaN and skipped
+    padded = np.concatenate([prices, np.full((max_lag,) + prices.shape[1:], np.nan)])
+    windows = sliding_window_view(padded, max_lag + 1, axis=0)[: len(prices)]
+    diffs = windows[..., list(lags)] - windows[..., :1]
+    with warnings.catch_warnings():
+        # Lags longer than the series have no differences; their std is NaN by design
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanstd(diffs, axis=0)
+
+
+def hurst_exponents(close: pd.DataFrame, max_lag: int = 20, chunk_size: int = 256) -> pd.Series:
+    """
+    Hurst exponent of every column of a (bar x ticker) panel over all its bars, NaN padding ignored.
+
+    H < 0.5: mean reverting, H = 0.5: random walk, H > 0.5: trending
+    """
+    lags = range(2, max_lag)
+    values = close.to_numpy(dtype=np.float64)
+    # Chunk the tickers to bound the (bar x ticker x lag) difference array
+    hurst = [hurst_from_lag_std(lags, _lag_difference_std(values[:, i : i + chunk_size], lags)) for i in range(0, values.shape[1], chunk_size)]
+    hurst = np.concatenate(hurst) if hurst else np.empty(0)
+    return pd.Series(hurst, index=close.columns)
+
+
+def compute_indicator_panel(prices: dict[str, pd.DataFrame]) -> PricePanel:
+    """
+    Compute every indicator used by the technical analyst for all tickers at once.
+
+    Args:
+        prices: ticker -> OHLCV DataFrame (as returned by prices_to_df), oldest bar first
+
+    Returns:
+        indicator name -> right-aligned (bar x ticker) DataFrame; the inputs are not modified
+    """
+    close = to_panel(prices, "close")
+    high = to_panel(prices, "high")
+    low = to_panel(prices, "low")
+    volume = to_panel(prices, "volume")
+
+    panel = {"close": close}
+
+    # Trend
+    panel["ema_8"] = ema(close, 8)
+    panel["ema_21"] = ema(close, 21)
+    panel["ema_55"] = ema(close, 55)
+    panel.update(adx(high, low, close, 14))
+
+    # Mean reversion
+    panel["z_score"] = (close - close.rolling(window=50).mean()) / close.rolling(window=50).std()
+    panel["bb_upper"], panel["bb_lower"] = bollinger_bands(close)
+    panel["rsi_14"] = rsi(close, 14)
+    panel["rsi_28"] = rsi(close, 28)
+
+    # Momentum
+    ret = returns(close)
+    panel["mom_1m"] = ret.rolling(21).sum()
+    panel["mom_3m"] = ret.rolling(63).sum()
+    panel["mom_6m"] = ret.rolling(126).sum()
+    panel["volume_momentum"] = volume / volume.rolling(21).mean()
+
+    # Volatility
+    hist_vol = ret.rolling(21).std() * math.sqrt(252)
+    vol_ma = hist_vol.rolling(63).mean()
+    panel["hist_vol"] = hist_vol
+    panel["vol_regime"] = hist_vol / vol_ma
+    panel["vol_z_score"] = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
+    panel["atr_ratio"] = atr(high, low, close) / close
+
+    # Statistical arbitrage
+    panel["skew"] = ret.rolling(63).skew()
+    panel["kurt"] = ret.rolling(63).kurt()
+    panel["hurst"] = hurst_exponents(close).to_frame().T
+    return panel
+
+
+def latest_values(panel: PricePanel, ticker: str) -> dict[str, float]:
+    """Latest value of every indicator for one ticker."""
+    return {name: frame[ticker].iloc[-1] for name, frame in panel.items()}
+
+
+class IndicatorTimeline:
+    """
+    Latest indicator values of many price windows per ticker, precomputed in bulk (e.g. for a backtest).
+
+    Each ticker keeps a (window x indicator) array sorted by window end date; get() finds a window
+    with a binary search on its end date and returns what latest_values gives for that window.
+    """
+
+    def __init__(self, names: list[str], windows: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]):
+        self.names = names
+        # ticker -> (start dates, end dates, values), ordered by end date
+        self._windows = windows
+
+    @classmethod
+    def build(cls, prices: dict[tuple[str, str, str], pd.DataFrame], chunk_size: int = 2048) -> "IndicatorTimeline":
+        """
+        Compute a timeline from every window's prices, passing many windows through one panel at a time.
+
+        Args:
+            prices: (ticker, start_date, end_date) -> OHLCV DataFrame of that window, not empty
+            chunk_size: windows per panel, bounding memory
+        """
+        keys = list(prices)
+        names, rows = [], []
+        for i in range(0, len(keys), chunk_size):
+            panel = compute_indicator_panel({j: prices[key] for j, key in enumerate(keys[i : i + chunk_size])})
+            names = list(panel)
+            rows.append(np.column_stack([panel[name].iloc[-1].to_numpy(dtype=np.float64) for name in names]))
+        values = np.concatenate(rows) if rows else np.empty((0, 0))
+
+        positions: dict[str, list[int]] = {}
+        for i, (ticker, _, _) in enumerate(keys):
+            positions.setdefault(ticker, []).append(i)
+        windows = {}
+        for ticker, index in positions.items():
+            index = sorted(index, key=lambda i: keys[i][2])
+            starts = np.array([keys[i][1] for i in index])
+            ends = np.array([keys[i][2] for i in index])
+            windows[ticker] = (starts, ends, values[index])
+        return cls(names, windows)
+
+    def get(self, ticker: str, start_date: str, end_date: str) -> dict[str, float] | None:
+        """Latest indicator values of one window, or None if it was not precomputed."""
+        if ticker not in self._windows:
+            return None
+        starts, ends, values = self._windows[ticker]
+        i = np.searchsorted(ends, end_date)
+        if i == len(ends) or ends[i] != end_date or starts[i] != start_date:
+            return None
+        return dict(zip(self.names, values[i]))
@@ -1,14 +1,215 @@
 """Helper functions for LLM"""
 
 import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
 from typing import TypeVar, Type, Optional, Any, Callable
+import httpx
 from pydantic import BaseModel, ValidationError
 from utils.progress import progress
 from colorama import Fore, Style
-from utils.logger import log_llm_call, log_error
+from utils.llm_cache import get_llm_cache
+from utils.llm_metrics import get_llm_metrics, request_timings, start_request_timer
+from utils.logger import log_llm_call, log_error, log_warning
+from tools.http_client import _parse_retry_after
 
 T = TypeVar('T', bound=BaseModel)
 
+# 并发调用LLM的共享线程池（大小由 LLM_MAX_WORKERS 设置）与每个服务商的并发上限
+# （LLM_MAX_CONCURRENCY，可用 LLM_MAX_CONCURRENCY_<PROVIDER> 单独覆盖），首次使用时创建
+# 单次模型请求（包括对冲请求）在另一个线程池中运行，以便限时等待
+_llm_executor: ThreadPoolExecutor | None = None
+_request_executor: ThreadPoolExecutor | None = None
+_provider_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_llm_lock = threading.Lock()
+
+
+def _provider_semaphore(model_provider: Any) -> threading.BoundedSemaphore:
+    """Semaphore bounding the concurrent requests to one provider."""
+    provider = str(getattr(model_provider, "value", model_provider))
+    with _llm_lock:
+        if provider not in _provider_semaphores:
+            limit = int(os.environ.get(f"LLM_MAX_CONCURRENCY_{provider.upper()}") or os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+            _provider_semaphores[provider] = threading.BoundedSemaphore(limit)
+        return _provider_semaphores[provider]
+
+
+def submit_llm_task(fn: Callable[..., T], *args, **kwargs) -> Future:
+    """
+    Run an LLM-calling function (e.g. an agent's generate_*_output) on the shared bounded thread pool.
+
+    The requests themselves are additionally capped per provider inside call_llm, so agents can
+    submit one task per ticker and collect the results; latency approaches the slowest call.
+    """
+    global _llm_executor
+    with _llm_lock:
+        if _llm_executor is None:
+            _llm_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("LLM_MAX_WORKERS", "16")), thread_name_prefix="llm")
+    return _llm_executor.submit(fn, *args, **kwargs)
+
+
+# 值得重试的HTTP状态码：请求超时、冲突、限流、服务端临时错误与过载
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed attempt may succeed when repeated (rate limits, transient errors, malformed output)."""
+    if isinstance(error, (json.JSONDecodeError, ValidationError, FutureTimeoutError, httpx.TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    # openai/groq/anthropic 的连接错误与超时（APITimeoutError 继承自 APIConnectionError）
+    return any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Full-jitter exponential backoff (LLM_RETRY_BACKOFF base, 30s cap), honouring Retry-After."""
+    base = float(os.environ.get("LLM_RETRY_BACKOFF", "1.0"))
+    delay = random.uniform(0, min(30.0, base * 2**attempt))
+    response = getattr(error, "response", None)
+    retry_after = _parse_retry_after(response.headers.get("retry-after")) if response is not None else None
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _fallback_chain(model_name: str, model_provider: str) -> list[tuple[str, str]]:
+    """
+    The requested model followed by the models to fail over to, in order.
+
+    Failover is opt-in: LLM_FALLBACK_MODELS lists the fallback model names, and without it only
+    the requested model is used. At most LLM_MAX_FALLBACKS (default 2) fallbacks are used.
+    """
+    from llm.models import get_model_info
+
+    configured = os.environ.get("LLM_FALLBACK_MODELS", "")
+    candidates = [model for name in configured.split(",") if (model := get_model_info(name.strip()))]
+    limit = int(os.environ.get("LLM_MAX_FALLBACKS", "2"))
+    fallbacks = [(model.model_name, model.provider.value) for model in candidates if model.model_name != model_name]
+    return [(model_name, model_provider)] + fallbacks[:limit]
+
+
+class _RequestSlot:
+    """
+    One request's place under its provider's concurrency limit.
+
+    The caller waiting for the request can abandon it (timed out, or a hedge won): the slot is
+    handed back at once even if the request is still running, and a request that has not
+    started yet is not sent at all.
+    """
+
+    def __init__(self, semaphore: threading.BoundedSemaphore):
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._held = False
+        self._abandoned = False
+
+    def acquire(self) -> bool:
+        """Wait for a slot; False if the request was abandoned in the meantime."""
+        self._semaphore.acquire()
+        with self._lock:
+            if self._abandoned:
+                self._semaphore.release()
+                return False
+            self._held = True
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._held:
+                self._held = False
+                self._semaphore.release()
+
+    def abandon(self):
+        with self._lock:
+            self._abandoned = True
+        self.release()
+
+
+def _invoke(model: Any, prompt: Any, slot: _RequestSlot) -> tuple[Any, float, float | None, int]:
+    """One model request: the response, its latency, time to first byte and HTTP request count."""
+    # 调用LLM（受服务商并发上限约束）
+    if not slot.acquire():
+        raise CancelledError("LLM request abandoned before it was sent")
+    try:
+        start_request_timer()
+        started = time.perf_counter()
+        response = model.invoke(prompt)
+        latency = time.perf_counter() - started
+        ttfb, http_requests = request_timings()
+    finally:
+        slot.release()
+    return response, latency, ttfb, http_requests
+
+
+def _invoke_hedged(model: Any, prompt: Any, model_name: str, model_provider: str, timeout: float) -> tuple[Any, float, float | None, int, bool]:
+    """
+    Run a model request with a timeout, optionally hedging it once it is slower than usual.
+
+    With LLM_HEDGE_PERCENTILE set (e.g. 95; default 0 disables hedging), a request that has not
+    answered after that percentile of the model's recent request latencies gets an identical
+    twin and whichever succeeds first wins. Requests given up on (timed out, or lost the race)
+    hand their provider slot back immediately; one already sent still runs to completion, bounded
+    by the client's LLM_REQUEST_TIMEOUT. Raises the last request error, or TimeoutError when
+    `timeout` runs out.
+    """
+    global _request_executor
+    with _llm_lock:
+        if _request_executor is None:
+            _request_executor = ThreadPoolExecutor(max_workers=2 * int(os.environ.get("LLM_MAX_WORKERS", "16")), thread_name_prefix="llm-request")
+
+    def submit():
+        slot = _RequestSlot(_provider_semaphore(model_provider))
+        future = _request_executor.submit(_invoke, model, prompt, slot)
+        slots[future] = slot
+        return future
+
+    percentile = float(os.environ.get("LLM_HEDGE_PERCENTILE", "0"))
+    hedge_after = get_llm_metrics().latency_percentile(model_name, percentile) if percentile > 0 else None
+    deadline = time.monotonic() + timeout
+    slots: dict[Future, _RequestSlot] = {}
+    pending = {submit()}
+    hedged = False
+    error = None
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            wait_for = remaining if hedged or hedge_after is None else min(remaining, hedge_after)
+            done, pending = wait(pending, timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return (*future.result(), hedged)
+                error = future.exception()
+            if not done:
+                if hedged or hedge_after is None or time.monotonic() >= deadline:
+                    raise FutureTimeoutError(f"{model_provider} {model_name} did not respond within {timeout:.0f}s")
+                # 请求慢于该模型通常的延迟，再发一个相同的请求，取先成功的结果
+                pending.add(submit())
+                hedged = True
+        raise error
+    finally:
+        # 放弃仍未完成的请求：未发出的取消，已发出的不再占用服务商并发名额
+        for future in pending:
+            future.cancel()
+            slots[future].abandon()
+
+
+def _parse_response(content: str, model_info: Any, pydantic_model: Type[T]) -> T:
+    # 处理 Deepseek 模型的响应
+    if model_info and model_info.is_deepseek():
+        result = extract_json_from_deepseek_response(content)
+        if not result:
+            raise json.JSONDecodeError("Failed to extract JSON from Deepseek response", content, 0)
+    else:
+        # 处理其他模型的响应
+        result = json.loads(content)
+    return pydantic_model(**result)
+
+
 def call_llm(
     prompt: Any,
     model_name: str,
@@ -16,70 +217,212 @@ def call_llm(
     pydantic_model: Type[T],
     agent_name: Optional[str] = None,
     max_retries: int = 3,
-    default_factory: Callable[[], T] = None
+    default_factory: Callable[[], T] = None,
+    ticker: Optional[str] = None,
+    timeout: Optional[float] = None,
 ) -> T:
     """
     Makes an LLM call with retry logic, handling both Deepseek and non-Deepseek models.
     
+    Retryable failures (rate limits, transient server and connection errors, request timeouts and
+    unparseable output) are retried with backoff; other failures, or running out of retries, move
+    on to the next model of the fallback chain. Each request gets at most LLM_REQUEST_TIMEOUT
+    seconds (default 60) and the whole call at most `timeout` (LLM_CALL_TIMEOUT, default 180).
+    
     Args:
         prompt: The prompt to send to the LLM
         model_name: Name of the model to use
         model_provider: Provider of the model
         pydantic_model: The Pydantic model class to structure the output
         agent_name: Optional name of the agent for progress updates
-        max_retries: Maximum number of retries (default: 3)
+        max_retries: Maximum number of retries per model (default: 3)
         default_factory: Optional factory function to create default response on failure
+        ticker: Optional ticker the call is about, for the token/latency/cost metrics
+        timeout: Optional deadline in seconds for the whole call, fallbacks included
         
     Returns:
         An instance of the specified Pydantic model
     """
     from llm.models import get_model, get_model_info
     
-    try:
-        model = get_model(model_name, model_provider)
-        model_info = get_model_info(model_name)
+    agent_name = agent_name or "Unknown Agent"
+    prompt_text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    metrics = get_llm_metrics()
+    started = time.perf_counter()
+    
+    # 相同的模型、提示词和输出结构直接返回缓存的结果
+    cache = get_llm_cache()
+    if cache is not None:
+        cache_key = cache.key(model_name, model_provider, prompt_text, pydantic_model)
+        if (cached := cache.get(cache_key)) is not None:
+            try:
+                output = pydantic_model(**cached)
+                metrics.record(agent_name, model_name, model_provider, ticker, latency=time.perf_counter() - started, cached=True)
+                return output
+            except ValidationError:
+                pass  # 缓存内容与当前模型结构不符，重新调用
+    
+    if timeout is None:
+        timeout = float(os.environ.get("LLM_CALL_TIMEOUT", "180"))
+    request_timeout = float(os.environ.get("LLM_REQUEST_TIMEOUT", "60"))
+    deadline = time.monotonic() + timeout
+    
+    # 记录本次调用的token、耗时、重试与费用
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "ttfb": None, "retries": 0, "http_requests": 0, "hedges": 0, "fallbacks": 0, "cost": None}
+    error = None
+    
+    for fallback, (current_model, current_provider) in enumerate(_fallback_chain(model_name, model_provider)):
+        if fallback:
+            log_error(f"[{agent_name}] Falling back from {model_provider} {model_name} to {current_provider} {current_model} after: {error}")
+            usage["fallbacks"] = fallback
         
-        if not model:
-            raise ValueError(f"Failed to initialize model {model_name}")
+        for attempt in range(max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                usage["retries"] += 1
+            try:
+                model = get_model(current_model, current_provider)
+                model_info = get_model_info(current_model)
+                
+                if not model:
+                    raise ValueError(f"Failed to initialize model {current_model}")
+                
+                response, latency, ttfb, http_requests, hedged = _invoke_hedged(model, prompt, current_model, current_provider, min(request_timeout, remaining))
+                metrics.observe_latency(current_model, latency)
+                
+                token_usage = getattr(response, "usage_metadata", None) or {}
+                prompt_tokens = token_usage.get("input_tokens") or estimate_tokens(prompt_text)
+                completion_tokens = token_usage.get("output_tokens") or estimate_tokens(response.content)
+                usage["prompt_tokens"] += prompt_tokens
+                usage["completion_tokens"] += completion_tokens
+                usage["ttfb"] = ttfb
+                usage["http_requests"] += http_requests
+                usage["hedges"] += hedged
+                if model_info and (cost := model_info.cost(prompt_tokens, completion_tokens)) is not None:
+                    usage["cost"] = (usage["cost"] or 0.0) + cost
+                
+                # 记录到日志文件
+                log_llm_call(
+                    model_name=current_model,
+                    model_provider=current_provider,
+                    agent_name=agent_name,
+                    prompt=prompt_text,
+                    response=response.content
+                )
+                
+                # 只在终端显示简短信息
+                print(f"\n{Fore.CYAN}[{agent_name}] Called {current_provider}-{current_model} model{Style.RESET_ALL}")
+                
+                output = _parse_response(response.content, model_info, pydantic_model)
+                # 只缓存所请求模型的回答，回退模型的回答不能代替它
+                if cache is not None and not fallback:
+                    cache.set(cache_key, model_name, model_provider, output.model_dump(mode="json"))
+                if fallback:
+                    message = f"[{agent_name}] Answered by fallback model {current_provider} {current_model} instead of {model_provider} {model_name}{f' for {ticker}' if ticker else ''}"
+                    log_warning(message)
+                    print(f"{Fore.YELLOW}{message}{Style.RESET_ALL}")
+                metrics.record(agent_name, current_model, current_provider, ticker, latency=time.perf_counter() - started, **usage)
+                return output
             
-        # 调用LLM
-        response = model.invoke(prompt)
+            except Exception as e:
+                error = e
+                if isinstance(e, (json.JSONDecodeError, ValidationError)):
+                    log_error(f"Error parsing model response: {e}")
+                else:
+                    log_error(f"Error calling {current_provider} model: {e}")
+                if not _is_retryable(e) or attempt == max_retries:
+                    break
+                delay = _retry_delay(e, attempt)
+                if time.monotonic() + delay >= deadline:
+                    break
+                time.sleep(delay)
         
-        # 记录到日志文件
-        log_llm_call(
+        if time.monotonic() >= deadline:
+            break
+    
+    if error is None:
+        error = FutureTimeoutError(f"No response from {model_provider} {model_name} within {timeout:.0f}s")
+    log_error(f"[{agent_name}] LLM call failed{f' for {ticker}' if ticker else ''} after {usage['retries']} retries and {usage['fallbacks']} fallbacks: {error}")
+    metrics.record(agent_name, model_name, model_provider, ticker, latency=time.perf_counter() - started, failed=True, **usage)
+    if default_factory:
+        return default_factory()
+    raise error
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def plan_prompt_batches(item_tokens: dict[str, int], token_budget: int, reserved_tokens: int = 0) -> list[list[str]]:
+    """
+    Group items, in order, into batches whose token estimates fit a prompt's budget.
+
+    Args:
+        item_tokens: item (e.g. ticker) -> tokens it adds to a prompt, including its share of the answer
+        token_budget: tokens available to one request
+        reserved_tokens: tokens every request spends regardless of the batch (system prompt, instructions)
+    """
+    batches, batch, used = [], [], reserved_tokens
+    for item, tokens in item_tokens.items():
+        # An item that does not fit an empty batch still gets a request of its own
+        if batch and used + tokens > token_budget:
+            batches.append(batch)
+            batch, used = [], reserved_tokens
+        batch.append(item)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def call_llm_batched(
+    analysis_data: dict[str, Any],
+    render_prompt: Callable[[dict[str, Any]], Any],
+    model_name: str,
+    model_provider: str,
+    container_model: Type[BaseModel],
+    agent_name: str,
+    default_factory: Callable[[], T],
+    token_budget: Optional[int] = None,
+    answer_tokens: int = 250,
+) -> dict[str, T]:
+    """
+    Get one structured answer per ticker from prompts that each carry several tickers' analysis.
+
+    Tickers are batched to fit `token_budget` (LLM_BATCH_TOKEN_BUDGET, default 8000), counting the
+    prompt without any ticker once per request and `answer_tokens` per ticker for the response.
+    Batches run concurrently. `container_model` has a `signals: dict[str, Signal]` field; tickers
+    missing from an answer get `default_factory()`.
+    """
+    if token_budget is None:
+        token_budget = int(os.environ.get("LLM_BATCH_TOKEN_BUDGET", "8000"))
+    reserved_tokens = estimate_tokens(render_prompt({}).to_string())
+    item_tokens = {ticker: estimate_tokens(json.dumps({ticker: data}, indent=2)) + answer_tokens for ticker, data in analysis_data.items()}
+    batches = plan_prompt_batches(item_tokens, token_budget, reserved_tokens)
+
+    futures = [
+        submit_llm_task(
+            call_llm,
+            prompt=render_prompt({ticker: analysis_data[ticker] for ticker in batch}),
             model_name=model_name,
             model_provider=model_provider,
-            agent_name=agent_name or "Unknown Agent",
-            prompt=prompt.to_string(),
-            response=response.content
+            pydantic_model=container_model,
+            agent_name=agent_name,
+            default_factory=lambda: container_model(signals={}),
+            ticker=",".join(batch),
         )
-        
-        # 只在终端显示简短信息
-        print(f"\n{Fore.CYAN}[{agent_name}] Called {model_provider}-{model_name} model{Style.RESET_ALL}")
-        
-        try:
-            # 处理 Deepseek 模型的响应
-            if model_info and model_info.is_deepseek():
-                result = extract_json_from_deepseek_response(response.content)
-                if not result:
-                    raise json.JSONDecodeError("Failed to extract JSON from Deepseek response", response.content, 0)
-            else:
-                # 处理其他模型的响应
-                result = json.loads(response.content)
-            
-            return pydantic_model(**result)
-            
-        except (json.JSONDecodeError, ValidationError) as e:
-            log_error(f"Error parsing model response: {e}")
-            if default_factory:
-                return default_factory()
-            raise
-            
-    except Exception as e:
-        log_error(f"Error calling {model_provider} model: {e}")
-        if default_factory:
-            return default_factory()
-        raise
+        for batch in batches
+    ]
+
+    outputs = {}
+    for batch, future in zip(batches, futures):
+        signals = future.result().signals
+        for ticker in batch:
+            outputs[ticker] = signals.get(ticker) or default_factory()
+    return outputs
+
 
 def create_default_response(model_class: Type[T]) -> T:
     """Creates a safe default response based on the model's fields."""
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel
+
+
+class LLMCache:
+    """
+    Persistent content-addressed cache of parsed LLM responses.
+
+    Entries are keyed by a hash of (model, provider, rendered prompt, output schema), so only a
+    byte-identical request for the same structured output is served from the cache. Entries older
+    than `ttl` seconds are ignored, and beyond `max_entries` the least recently used are evicted.
+    """
+
+    def __init__(self, path: str, ttl: float | None = None, max_entries: int | None = None):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model_name: str, model_provider: str, prompt: str, pydantic_model: type[BaseModel]) -> str:
+        schema = json.dumps(pydantic_model.model_json_schema(), sort_keys=True, separators=(",", ":"))
+        request = json.dumps([model_name, model_provider, prompt, schema], separators=(",", ":"))
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key: str) -> dict[str, any] | None:
+        """The cached response for a key, or None if there is none or it has expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, model_name: str, model_provider: str, response: dict[str, any]):
+        """Store a parsed response, evicting the least recently used entries beyond max_entries."""
+        now = time.time()
+        payload = json.dumps(response, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, provider, response, created_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, model_provider, payload, now, now),
+            )
+            if self.max_entries is not None:
+                excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used_at LIMIT ?)", (excess,))
+                    self.evictions += excess
+            self._conn.commit()
+
+    def stats(self) -> dict[str, any]:
+        """Hit/miss counts of this process and the number of stored entries."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _env_number(name: str, cast: type) -> any:
+    value = os.environ.get(name)
+    return cast(value) if value else None
+
+
+# Global LLM cache, set up from HEDGE_FUND_LLM_CACHE on first use (after .env is loaded) unless configured.
+# Agents call the LLM concurrently, so setup happens under a lock: the first calls must share one instance
+_llm_cache: LLMCache | None = None
+_llm_cache_configured = False
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache | None:
+    """Get the global LLM cache, or None when caching is disabled."""
+    if not _llm_cache_configured:
+        with _llm_cache_lock:
+            if not _llm_cache_configured:
+                _configure_llm_cache(
+                    os.environ.get("HEDGE_FUND_LLM_CACHE"),
+                    ttl=_env_number("HEDGE_FUND_LLM_CACHE_TTL", float),
+                    max_entries=_env_number("HEDGE_FUND_LLM_CACHE_MAX_ENTRIES", int),
+                )
+    return _llm_cache
+
+
+def configure_llm_cache(path: str | None, ttl: float | None = None, max_entries: int | None = None) -> LLMCache | None:
+    """Cache LLM responses in the SQLite file at `path` (None disables the cache)."""
+    with _llm_cache_lock:
+        return _configure_llm_cache(path, ttl, max_entries)
+
+
+def _configure_llm_cache(path: str | None, ttl: float | None, max_entries: int | None) -> LLMCache | None:
+    global _llm_cache, _llm_cache_configured
+    if _llm_cache is not None:
+        _llm_cache.close()
+    _llm_cache = LLMCache(path, ttl=ttl, max_entries=max_entries) if path else None
+    _llm_cache_configured = True
+    return _llm_cache
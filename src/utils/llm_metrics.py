@@ -0,0 +1,208 @@
+import csv
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+
+# Fields of one aggregated row, in CSV column order
+SUMMARY_FIELDS = [
+    "agent",
+    "model",
+    "provider",
+    "ticker",
+    "calls",
+    "cache_hits",
+    "failures",
+    "retries",
+    "http_requests",
+    "hedges",
+    "fallbacks",
+    "prompt_tokens",
+    "completion_tokens",
+    "cost",
+    "latency_total",
+    "latency_mean",
+    "latency_max",
+    "ttfb_mean",
+]
+
+
+class LLMMetrics:
+    """
+    In-process accounting of call_llm invocations.
+
+    Every call is added to the totals of its (agent, model, ticker) key: token counts, latency,
+    time to first byte, retries, HTTP requests sent, hedged requests, fallbacks to another model and estimated cost.
+    The most recent request latencies of each model are also kept, so callers can ask for latency
+    percentiles. Everything accumulates until reset().
+    """
+
+    def __init__(self, latency_samples: int = 1000):
+        self.latency_samples = latency_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._totals: dict[tuple[str, str, str | None], dict[str, any]] = {}
+            self._latencies: dict[str, deque] = {}
+
+    def record(
+        self,
+        agent_name: str,
+        model_name: str,
+        model_provider: str,
+        ticker: str | None = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        ttfb: float | None = None,
+        retries: int = 0,
+        http_requests: int = 0,
+        hedges: int = 0,
+        fallbacks: int = 0,
+        cost: float | None = None,
+        cached: bool = False,
+        failed: bool = False,
+    ):
+        """Add one call_llm invocation to the totals of its (agent, model, ticker)."""
+        key = (agent_name, model_name, ticker)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = {
+                    "provider": str(getattr(model_provider, "value", model_provider)),
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "failures": 0,
+                    "retries": 0,
+                    "http_requests": 0,
+                    "hedges": 0,
+                    "fallbacks": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                    "latency_total": 0.0,
+                    "latency_max": 0.0,
+                    "ttfb_total": 0.0,
+                    "ttfb_count": 0,
+                }
+            totals["calls"] += 1
+            totals["cache_hits"] += cached
+            totals["failures"] += failed
+            totals["retries"] += retries
+            totals["http_requests"] += http_requests
+            totals["hedges"] += hedges
+            totals["fallbacks"] += fallbacks
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost"] += cost or 0.0
+            totals["latency_total"] += latency
+            totals["latency_max"] = max(totals["latency_max"], latency)
+            if ttfb is not None:
+                totals["ttfb_total"] += ttfb
+                totals["ttfb_count"] += 1
+
+    def observe_latency(self, model_name: str, latency: float):
+        """Add the latency of one successful model request (not a whole call with its retries)."""
+        with self._lock:
+            self._latencies.setdefault(model_name, deque(maxlen=self.latency_samples)).append(latency)
+
+    def latency_percentile(self, model_name: str, percentile: float, min_samples: int = 20) -> float | None:
+        """A percentile (0-100) of the model's recent request latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(model_name, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, max(0, round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self) -> list[dict[str, any]]:
+        """One row per (agent, model, ticker), most expensive in latency first."""
+        with self._lock:
+            items = [(key, dict(totals)) for key, totals in self._totals.items()]
+        rows = []
+        for (agent_name, model_name, ticker), totals in items:
+            ttfb_count = totals.pop("ttfb_count")
+            ttfb_total = totals.pop("ttfb_total")
+            rows.append(
+                {
+                    "agent": agent_name,
+                    "model": model_name,
+                    "ticker": ticker,
+                    **totals,
+                    "latency_mean": totals["latency_total"] / totals["calls"],
+                    "ttfb_mean": ttfb_total / ttfb_count if ttfb_count else None,
+                }
+            )
+        rows.sort(key=lambda row: row["latency_total"], reverse=True)
+        return [{field: row[field] for field in SUMMARY_FIELDS} for row in rows]
+
+    def totals(self) -> dict[str, any]:
+        """Grand totals over every recorded call."""
+        rows = self.summary()
+        return {
+            field: sum(row[field] for row in rows)
+            for field in ("calls", "cache_hits", "failures", "retries", "http_requests", "hedges", "fallbacks", "prompt_tokens", "completion_tokens", "cost", "latency_total")
+        }
+
+    def dump(self, path: str):
+        """Write the summary to `path`, as CSV for a .csv file and as JSON otherwise."""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        rows = self.summary()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, "w") as f:
+                json.dump({"totals": self.totals(), "calls": rows}, f, indent=2)
+
+
+# Per-thread state of the LLM request in flight, filled in by the httpx event hooks below
+_request_state = threading.local()
+
+
+def start_request_timer():
+    """Start timing the calling thread's next LLM request."""
+    _request_state.started = time.perf_counter()
+    _request_state.first_byte = None
+    _request_state.http_requests = 0
+
+
+def request_timings() -> tuple[float | None, int]:
+    """Time to first byte of the current request (None if unknown) and how many HTTP requests it took."""
+    first_byte = getattr(_request_state, "first_byte", None)
+    started = getattr(_request_state, "started", None)
+    ttfb = first_byte - started if first_byte is not None and started is not None else None
+    return ttfb, getattr(_request_state, "http_requests", 0)
+
+
+def _on_request(request: httpx.Request):
+    _request_state.http_requests = getattr(_request_state, "http_requests", 0) + 1
+
+
+def _on_response(response: httpx.Response):
+    # The response hook runs once the headers have arrived, before the body is read
+    if getattr(_request_state, "first_byte", None) is None:
+        _request_state.first_byte = time.perf_counter()
+
+
+# httpx event hooks to install on the clients whose requests should be timed
+HTTPX_EVENT_HOOKS = {"request": [_on_request], "response": [_on_response]}
+
+
+# Global metrics registry, shared by every call_llm invocation
+_llm_metrics = LLMMetrics()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Get the global LLM metrics registry."""
+    return _llm_metrics
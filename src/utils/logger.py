@@ -47,6 +47,10 @@ class LLMLogger:
         """记录错误信息"""
         self.logger.error(error_msg)
 
+    def log_warning(self, warning_msg: str):
+        """记录警告信息"""
+        self.logger.warning(warning_msg)
+
 # 创建默认logger实例（不输出到控制台）
 llm_logger = LLMLogger(console_output=False)
 
@@ -57,6 +61,9 @@ def log_llm_call(model_name: str, model_provider: str, agent_name: str, prompt:
 def log_error(error_msg: str):
     llm_logger.log_error(error_msg)
 
+def log_warning(warning_msg: str):
+    llm_logger.log_warning(warning_msg)
+
 # 允许外部配置是否输出到控制台
 def configure_logger(console_output: bool = False):
     global llm_logger
@@ -0,0 +1,282 @@
+import time
+
+import numpy as np
+
+try:
+    import talib
+except ImportError:  # optional C library; the NumPy implementations below are used instead
+    talib = None
+
+# NumPy versions of the TA-Lib indicators used by the crypto technical analyst. Each one follows
+# the TA-Lib C implementation step by step (same seeding, lookback and order of floating point
+# operations), so outputs match talib's default parameters. They work on a batch: a 2-D array
+# with one series per row, left-aligned and NaN-padded at the end (see stack_left), and walk the
+# time axis once for the whole batch. 1-D input returns 1-D output.
+
+
+def _is_zero(x: np.ndarray) -> np.ndarray:
+    return (-1e-8 < x) & (x < 1e-8)
+
+
+def _batch(x) -> tuple[np.ndarray, bool]:
+    x = np.asarray(x, dtype=np.float64)
+    return (x[None, :], True) if x.ndim == 1 else (x, False)
+
+
+def _unbatch(out: np.ndarray, single: bool) -> np.ndarray:
+    return out[0] if single else out
+
+
+def _sequential_sum(x: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Sum of columns [start, stop) added left to right, as TA-Lib's loops do."""
+    total = np.zeros(x.shape[0])
+    for i in range(start, stop):
+        total += x[:, i]
+    return total
+
+
+def _sma(x: np.ndarray, period: int) -> np.ndarray:
+    # TA-Lib keeps a running sum: add the newest value, emit, then drop the oldest
+    out = np.full(x.shape, np.nan)
+    total = _sequential_sum(x, 0, min(period - 1, x.shape[1]))
+    for i in range(period - 1, x.shape[1]):
+        total += x[:, i]
+        out[:, i] = total / period
+        total -= x[:, i - period + 1]
+    return out
+
+
+def _ema(x: np.ndarray, period: int, first: int) -> np.ndarray:
+    # Seeded with the mean of the `period` values ending at `first`, the first output index
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] <= first:
+        return out
+    k = 2.0 / (period + 1)
+    value = _sequential_sum(x, first - period + 1, first + 1) / period
+    out[:, first] = value
+    for i in range(first + 1, x.shape[1]):
+        value = ((x[:, i] - value) * k) + value
+        out[:, i] = value
+    return out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range from bar 1 on (bar 0 has no previous close and stays NaN)."""
+    tr = np.full(high.shape, np.nan)
+    prev_close = close[:, :-1]
+    value = high[:, 1:] - low[:, 1:]
+    candidate = np.abs(high[:, 1:] - prev_close)
+    value = np.where(candidate > value, candidate, value)
+    candidate = np.abs(low[:, 1:] - prev_close)
+    tr[:, 1:] = np.where(candidate > value, candidate, value)
+    return tr
+
+
+def sma(x, period: int = 30) -> np.ndarray:
+    """Simple moving average (talib.SMA)."""
+    x, single = _batch(x)
+    return _unbatch(_sma(x, period), single)
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing (talib.RSI)."""
+    close, single = _batch(close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] > period:
+        diff = np.diff(close, axis=1)
+        gain = np.zeros(close.shape[0])
+        loss = np.zeros(close.shape[0])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i in range(close.shape[1] - 1):
+                if i >= period:
+                    gain *= period - 1
+                    loss *= period - 1
+                d = diff[:, i]
+                loss -= np.where(d < 0, d, 0.0)
+                gain += np.where(d < 0, 0.0, d)
+                if i >= period - 1:
+                    gain /= period
+                    loss /= period
+                    total = gain + loss
+                    out[:, i + 1] = np.where(_is_zero(total), 0.0, 100 * (gain / total))
+    return _unbatch(out, single)
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram (talib.MACD); values start at bar slow + signal - 2."""
+    close, single = _batch(close)
+    if slow < fast:
+        fast, slow = slow, fast
+    # Both EMAs are seeded at the slow EMA's first bar, so the fast seed covers the last `fast` bars before it
+    first = slow - 1
+    line = _ema(close, fast, first) - _ema(close, slow, first)
+    signal_first = first + signal - 1
+    signal_line = np.full(close.shape, np.nan)
+    if close.shape[1] > signal_first:
+        signal_line[:, first:] = _ema(line[:, first:], signal, signal - 1)
+    line[:, :signal_first] = np.nan
+    return tuple(_unbatch(out, single) for out in (line, signal_line, line - signal_line))
+
+
+def bbands(close, period: int = 5, nbdev: float = 2.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands over an SMA with population standard deviation (talib.BBANDS)."""
+    close, single = _batch(close)
+    middle = _sma(close, period)
+    std = np.full(close.shape, np.nan)
+    total = _sequential_sum(close * close, 0, min(period - 1, close.shape[1]))
+    for i in range(period - 1, close.shape[1]):
+        total += close[:, i] * close[:, i]
+        variance = total / period
+        total -= close[:, i - period + 1] * close[:, i - period + 1]
+        variance -= middle[:, i] * middle[:, i]
+        std[:, i] = np.where(variance < 1e-8, 0.0, np.sqrt(np.abs(variance)))
+    width = std * nbdev
+    return tuple(_unbatch(out, single) for out in (middle + width, middle, middle - width))
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing, seeded by the mean of the first `period` true ranges (talib.ATR)."""
+    (high, single), (low, _), (close, _) = _batch(high), _batch(low), _batch(close)
+    tr = _true_range(high, low, close)
+    out = np.full(close.shape, np.nan)
+    if close.shape[1] > period:
+        value = _sequential_sum(tr, 1, period + 1) / period
+        out[:, period] = value
+        for i in range(period + 1, close.shape[1]):
+            value = value * (period - 1)
+            value += tr[:, i]
+            value /= period
+            out[:, i] = value
+    return _unbatch(out, single)
+
+
+def obv(close, volume) -> np.ndarray:
+    """On Balance Volume, starting from the first bar's volume (talib.OBV)."""
+    (close, single), (volume, _) = _batch(close), _batch(volume)
+    signed = np.zeros(close.shape)
+    if close.shape[1]:
+        signed[:, 0] = volume[:, 0]
+        direction = np.sign(np.diff(close, axis=1))
+        signed[:, 1:] = np.where(direction == 0, 0.0, direction * volume[:, 1:])
+    return _unbatch(np.cumsum(signed, axis=1), single)
+
+
+def adx(high, low, close, period: int = 14) -> np.ndarray:
+    """Average Directional Movement Index with Wilder smoothing (talib.ADX); values start at bar 2 * period - 1."""
+    (high, single), (low, _), (close, _) = _batch(high), _batch(low), _batch(close)
+    n, length = close.shape
+    out = np.full(close.shape, np.nan)
+    if length < 2 * period:
+        return _unbatch(out, single)
+
+    tr = _true_range(high, low, close)
+    diff_plus = np.full(close.shape, np.nan)
+    diff_minus = np.full(close.shape, np.nan)
+    diff_plus[:, 1:] = high[:, 1:] - high[:, :-1]
+    diff_minus[:, 1:] = low[:, :-1] - low[:, 1:]
+    minus_dm = np.where((diff_minus > 0) & (diff_plus < diff_minus), diff_minus, 0.0)
+    plus_dm = np.where((diff_plus > 0) & (diff_plus > diff_minus), diff_plus, 0.0)
+
+    prev_plus, prev_minus, prev_tr = np.zeros(n), np.zeros(n), np.zeros(n)
+    for i in range(1, period):
+        prev_minus += minus_dm[:, i]
+        prev_plus += plus_dm[:, i]
+        prev_tr += tr[:, i]
+
+    def smooth(i):
+        nonlocal prev_plus, prev_minus, prev_tr
+        prev_minus = prev_minus - prev_minus / period + minus_dm[:, i]
+        prev_plus = prev_plus - prev_plus / period + plus_dm[:, i]
+        prev_tr = prev_tr - (prev_tr / period) + tr[:, i]
+
+    def dx() -> tuple[np.ndarray, np.ndarray]:
+        # TA-Lib skips a bar whose true range or directional movement sums to zero
+        with np.errstate(invalid="ignore", divide="ignore"):
+            minus_di = 100.0 * (prev_minus / prev_tr)
+            plus_di = 100.0 * (prev_plus / prev_tr)
+            total = minus_di + plus_di
+            value = 100.0 * (np.abs(minus_di - plus_di) / total)
+        return value, ~(_is_zero(prev_tr) | _is_zero(total))
+
+    sum_dx = np.zeros(n)
+    for i in range(period, 2 * period):
+        smooth(i)
+        value, valid = dx()
+        sum_dx += np.where(valid, value, 0.0)
+    value_adx = sum_dx / period
+    out[:, 2 * period - 1] = value_adx
+    for i in range(2 * period, length):
+        smooth(i)
+        value, valid = dx()
+        value_adx = np.where(valid, ((value_adx * (period - 1)) + value) / period, value_adx)
+        out[:, i] = value_adx
+    return _unbatch(out, single)
+
+
+def stack_left(series: list[np.ndarray]) -> np.ndarray:
+    """Stack 1-D series of different lengths into one left-aligned batch, NaN-padded at the end."""
+    batch = np.full((len(series), max((len(s) for s in series), default=0)), np.nan)
+    for i, s in enumerate(series):
+        batch[i, : len(s)] = s
+    return batch
+
+
+def _numpy_indicator_set(high, low, close, volume) -> dict[str, np.ndarray]:
+    indicators = {"rsi": rsi(close)}
+    indicators["macd"], indicators["macd_signal"], indicators["macd_hist"] = macd(close)
+    indicators["bb_upper"], indicators["bb_middle"], indicators["bb_lower"] = bbands(close)
+    indicators["volume_sma"] = sma(volume, 20)
+    indicators["atr"] = atr(high, low, close, 14)
+    indicators["obv"] = obv(close, volume)
+    indicators["adx"] = adx(high, low, close, 14)
+    return indicators
+
+
+def _talib_indicator_set(high, low, close, volume) -> dict[str, np.ndarray]:
+    names = ["rsi", "macd", "macd_signal", "macd_hist", "bb_upper", "bb_middle", "bb_lower", "volume_sma", "atr", "obv", "adx"]
+    indicators = {name: np.full(close.shape, np.nan) for name in names}
+    lengths = (~np.isnan(close)).sum(axis=1)
+    for row, length in enumerate(lengths):
+        h, l, c, v = (a[row, :length] for a in (high, low, close, volume))
+        values = [talib.RSI(c), *talib.MACD(c), *talib.BBANDS(c), talib.SMA(v, timeperiod=20), talib.ATR(h, l, c, timeperiod=14), talib.OBV(c, v), talib.ADX(h, l, c, timeperiod=14)]
+        for name, value in zip(names, values):
+            indicators[name][row, :length] = value
+    return indicators
+
+
+def indicator_set(high, low, close, volume, use_talib: bool | None = None) -> dict[str, np.ndarray]:
+    """
+    Every indicator of the crypto technical analyst for a batch of OHLCV series in one call.
+
+    Inputs are left-aligned (series x bar) batches (see stack_left). talib is used when it is
+    installed unless `use_talib` is False; the NumPy implementations otherwise.
+    """
+    high, low, close, volume = (np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in (high, low, close, volume))
+    if use_talib is None:
+        use_talib = talib is not None
+    return _talib_indicator_set(high, low, close, volume) if use_talib else _numpy_indicator_set(high, low, close, volume)
+
+
+if __name__ == "__main__":
+    # Benchmark: python -m utils.ta (from src/)
+    rng = np.random.default_rng(0)
+    series, bars = 150, 720  # e.g. 50 symbols x 3 timeframes, 30 days of hourly candles
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (series, bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.01, close.shape))
+    low = close * (1 - rng.uniform(0, 0.01, close.shape))
+    volume = rng.uniform(1e3, 1e5, close.shape)
+
+    start = time.perf_counter()
+    numpy_values = indicator_set(high, low, close, volume, use_talib=False)
+    print(f"numpy: {time.perf_counter() - start:.3f}s for {series} series x {bars} bars")
+
+    if talib is None:
+        print("talib is not installed; skipping the comparison")
+    else:
+        start = time.perf_counter()
+        talib_values = indicator_set(high, low, close, volume, use_talib=True)
+        print(f"talib: {time.perf_counter() - start:.3f}s")
+        for name, expected in talib_values.items():
+            same_nan = np.array_equal(np.isnan(expected), np.isnan(numpy_values[name]))
+            error = np.nanmax(np.abs(expected - numpy_values[name]) / np.maximum(np.abs(expected), 1.0))
+            print(f"{name:12s} max relative error {error:.2e}{'' if same_nan else '  (NaN positions differ)'}")
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The application modules import each other as top-level packages (data, tools, utils, ...)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# utils.logger writes ./logs as soon as it is imported; keep test runs out of the checkout
+os.chdir(tempfile.mkdtemp(prefix="ai-hedge-fund-tests-"))
@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+
+import pytest
+
+import tools.api as api
+from data.cache import Cache, SQLiteCacheStore
+from data.models import LineItem
+
+METRICS = [{"report_period": "2024-03-31", "pe": 12.5}, {"report_period": "2023-12-31", "pe": 11.0}]
+
+
+def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.sqlite"))
+    assert store.get("financial_metrics", "AAPL") is None
+    store.set("financial_metrics", "AAPL", METRICS)
+    store.close()
+
+    reopened = SQLiteCacheStore(str(tmp_path / "cache.sqlite"))
+    assert reopened.get("financial_metrics", "AAPL") == METRICS
+    assert reopened.get("financial_metrics", "MSFT") is None
+    reopened.close()
+
+
+def test_rows_survive_a_new_cache_instance(tmp_path):
+    cache = Cache(cache_dir=str(tmp_path))
+    cache.set_financial_metrics("AAPL", METRICS)
+    cache.set_company_news("AAPL", [{"date": "2024-01-02", "title": "a"}])
+    cache.disable_persistence()
+
+    fresh = Cache(cache_dir=str(tmp_path))
+    assert fresh.get_financial_metrics("AAPL") == METRICS
+    assert fresh.get_company_news("AAPL") == [{"date": "2024-01-02", "title": "a"}]
+
+
+def test_merge_keeps_existing_rows_and_skips_duplicates(tmp_path):
+    cache = Cache(cache_dir=str(tmp_path))
+    cache.set_financial_metrics("AAPL", METRICS[:1])
+    cache.set_financial_metrics("AAPL", [{"report_period": "2024-03-31", "pe": 99.0}, METRICS[1]])
+    assert cache.get_financial_metrics("AAPL") == METRICS
+
+
+def test_line_items_merge_fields_per_report_period():
+    cache = Cache()
+    cache.set_line_items("AAPL", [{"report_period": "2024-03-31", "period": "ttm", "revenue": 1}])
+    cache.set_line_items("AAPL", [{"report_period": "2024-03-31", "period": "ttm", "net_income": 2}])
+    assert cache.get_line_items("AAPL") == [{"report_period": "2024-03-31", "period": "ttm", "revenue": 1, "net_income": 2}]
+
+
+def test_lru_evicts_least_recently_used_and_reloads_from_disk(tmp_path):
+    cache = Cache(cache_dir=str(tmp_path), max_memory_entries=2)
+    for ticker in ("A", "B"):
+        cache.set_financial_metrics(ticker, [{"report_period": "2024-03-31", "ticker": ticker}])
+    # Touch A so that B becomes the least recently used entry
+    cache.get_financial_metrics("A")
+    cache.set_financial_metrics("C", [{"report_period": "2024-03-31", "ticker": "C"}])
+
+    assert list(cache._memory) == [("financial_metrics", "A"), ("financial_metrics", "C")]
+    # The evicted entry is still served, from the disk tier, and becomes most recent again
+    assert cache.get_financial_metrics("B") == [{"report_period": "2024-03-31", "ticker": "B"}]
+    assert list(cache._memory) == [("financial_metrics", "C"), ("financial_metrics", "B")]
+
+
+def test_memory_only_cache_never_evicts():
+    cache = Cache(max_memory_entries=1)
+    for ticker in ("A", "B", "C"):
+        cache.set_financial_metrics(ticker, [{"report_period": "2024-03-31", "ticker": ticker}])
+    assert all(cache.get_financial_metrics(ticker) for ticker in ("A", "B", "C"))
+
+
+def test_disable_persistence_keeps_memory_entries(tmp_path):
+    cache = Cache(cache_dir=str(tmp_path))
+    cache.set_insider_trades("AAPL", [{"filing_date": "2024-01-02"}])
+    assert cache.cache_dir == str(tmp_path)
+    cache.disable_persistence()
+    assert cache.cache_dir is None
+    assert cache.get_insider_trades("AAPL") == [{"filing_date": "2024-01-02"}]
+
+
+QUARTERS = ["2024-12-31", "2024-09-30", "2024-06-30", "2024-03-31", "2023-12-31", "2023-09-30"]
+
+
+@pytest.fixture
+def line_item_fetches(monkeypatch):
+    """Route line item searches through a fresh memory-only cache and a fake API; `reports` caps each ticker's history."""
+    calls = []
+    reports = {}
+
+    def fake_fetch(tickers, line_items, end_date, period, limit):
+        calls.append((tuple(tickers), tuple(line_items), end_date, period, limit))
+        return {
+            ticker: [
+                LineItem(ticker=ticker, report_period=day, period=period, currency="USD", **{name: 1.0 for name in line_items})
+                for day in [day for day in QUARTERS if day <= end_date][: reports.get(ticker, len(QUARTERS))][:limit]
+            ]
+            for ticker in tickers
+        }
+
+    monkeypatch.setattr(api, "_cache", Cache())
+    monkeypatch.setattr(api, "_fetch_line_items", fake_fetch)
+    return SimpleNamespace(calls=calls, reports=reports)
+
+
+def test_narrower_line_item_search_is_served_from_cache(line_item_fetches):
+    api.search_line_items_batch(["AAPL"], ["revenue", "net_income"], "2024-12-31", limit=4)
+
+    # Fewer fields, an earlier end date and a smaller limit are all covered by the first search
+    rows = api.search_line_items("AAPL", ["revenue"], "2024-09-30", limit=2)
+    assert [row.report_period for row in rows] == ["2024-09-30", "2024-06-30"]
+    assert not hasattr(rows[0], "net_income")
+    assert len(line_item_fetches.calls) == 1
+
+
+@pytest.mark.parametrize(
+    "line_items, end_date, period, limit",
+    [
+        (["revenue", "free_cash_flow"], "2024-12-31", "ttm", 4),  # a field that was never requested
+        (["revenue"], "2025-03-31", "ttm", 4),  # a later end date
+        (["revenue"], "2024-12-31", "annual", 4),  # another period
+        (["revenue"], "2024-09-30", "ttm", 4),  # rows before the oldest one fetched may exist
+    ],
+)
+def test_wider_line_item_search_is_fetched(line_item_fetches, line_items, end_date, period, limit):
+    api.search_line_items_batch(["AAPL"], ["revenue", "net_income"], "2024-12-31", limit=4)
+    api.search_line_items("AAPL", line_items, end_date, period, limit)
+    assert len(line_item_fetches.calls) == 2
+
+
+def test_short_answer_means_the_history_is_exhausted(line_item_fetches):
+    line_item_fetches.reports["NEW"] = 2
+    api.search_line_items("NEW", ["revenue"], "2024-12-31", limit=4)
+
+    # The first search returned everything there is, so a larger limit needs no new request
+    rows = api.search_line_items("NEW", ["revenue"], "2024-12-31", limit=10)
+    assert [row.report_period for row in rows] == ["2024-12-31", "2024-09-30"]
+    assert len(line_item_fetches.calls) == 1
+
+
+def test_ticker_left_short_by_a_full_batch_is_asked_again(line_item_fetches, monkeypatch):
+    def shared_limit_fetch(tickers, line_items, end_date, period, limit):
+        line_item_fetches.calls.append(tuple(tickers))
+        # The batch limit is shared: AAPL's history uses it all up and TINY gets nothing
+        if len(tickers) > 1:
+            return {"AAPL": [LineItem(ticker="AAPL", report_period=day, period=period, currency="USD", revenue=1.0) for day in QUARTERS[: limit * 2]], "TINY": []}
+        return {tickers[0]: [LineItem(ticker=tickers[0], report_period=day, period=period, currency="USD", revenue=1.0) for day in QUARTERS[:limit]]}
+
+    monkeypatch.setattr(api, "_fetch_line_items", shared_limit_fetch)
+    results = api.search_line_items_batch(["AAPL", "TINY"], ["revenue"], "2024-12-31", limit=2)
+
+    assert line_item_fetches.calls == [("AAPL", "TINY"), ("TINY",)]
+    assert [len(results[ticker]) for ticker in ("AAPL", "TINY")] == [2, 2]
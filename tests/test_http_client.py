@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import tools.http_client as http_client
+from tools.http_client import APIError, HTTPClient, TokenBucket, _parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = str(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Answers requests from a script; an exception in the script is raised instead."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock that time.sleep advances; the sleeps are logged in `clock.sleeps`."""
+
+    class Clock:
+        now = 1000.0
+        sleeps = []
+
+        def sleep(self, seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+    fake = Clock()
+    monkeypatch.setattr(http_client.time, "monotonic", lambda: fake.now)
+    monkeypatch.setattr(http_client.time, "sleep", fake.sleep)
+    return fake
+
+
+def make_client(*script, **kwargs) -> HTTPClient:
+    client = HTTPClient(requests_per_second=1000, **kwargs)
+    client.session = FakeSession(*script)
+    return client
+
+
+def test_token_bucket_allows_a_burst_then_paces_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(7):
+        bucket.acquire()
+    # Three tokens are there up front; each of the other four takes half a second to refill
+    assert clock.now - 1000.0 == pytest.approx(2.0)
+
+
+def test_retry_after_is_honoured(clock, monkeypatch):
+    monkeypatch.setattr(http_client.random, "uniform", lambda low, high: low)
+    client = make_client(FakeResponse(429, headers={"Retry-After": "7"}), FakeResponse(200, {"ok": True}))
+    assert client.get("https://example.test/prices") == {"ok": True}
+    assert clock.sleeps == [7.0]
+
+
+def test_retry_after_accepts_an_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert _parse_retry_after(format_datetime(when, usegmt=True)) == pytest.approx(30, abs=2)
+    assert _parse_retry_after("not a date") is None
+    assert _parse_retry_after("-5") == 0.0
+
+
+def test_backoff_is_jittered_exponential_and_capped(clock, monkeypatch):
+    bounds = []
+    monkeypatch.setattr(http_client.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    client = make_client(FakeResponse(503), requests.ConnectionError("reset"), FakeResponse(502), FakeResponse(200, {}), backoff_base=0.5, backoff_max=1.5)
+    client.get("https://example.test/prices")
+    assert bounds == [(0, 0.5), (0, 1.0), (0, 1.5)]
+    assert clock.sleeps == [0.5, 1.0, 1.5]
+
+
+def test_non_retryable_status_fails_at_once(clock):
+    client = make_client(FakeResponse(404, "not found"))
+    with pytest.raises(APIError) as error:
+        client.get("https://example.test/prices")
+    assert error.value.status_code == 404
+    assert client.session.calls == 1 and clock.sleeps == []
+
+
+def test_gives_up_after_max_retries(clock):
+    client = make_client(*[FakeResponse(503)] * 3, max_retries=2)
+    with pytest.raises(APIError) as error:
+        client.get("https://example.test/prices")
+    assert error.value.status_code == 503
+    assert client.session.calls == 3 and len(clock.sleeps) == 2
@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import technicals
+from data.price_store import PriceColumns
+from utils.indicators import compute_indicator_panel, hurst_exponents, latest_values
+
+INDICATORS = ["close", "ema_8", "ema_21", "ema_55", "adx", "+di", "-di", "z_score", "bb_upper", "bb_lower", "rsi_14", "rsi_28", "mom_1m", "mom_3m", "mom_6m", "volume_momentum", "hist_vol", "vol_regime", "vol_z_score", "atr_ratio", "skew", "kurt", "hurst"]
+
+
+def make_prices(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(rng.normal(0, 0.02, n).cumsum())
+    open = close * (1 + rng.normal(0, 0.005, n))
+    index = pd.date_range("2023-01-02", periods=n, freq="B", tz="UTC", name="Date")
+    return pd.DataFrame(
+        {
+            "open": open,
+            "close": close,
+            "high": np.maximum(open, close) * (1 + rng.uniform(0, 0.01, n)),
+            "low": np.minimum(open, close) * (1 - rng.uniform(0, 0.01, n)),
+            "volume": rng.integers(1_000_000, 5_000_000, n),
+        },
+        index=index,
+    )
+
+
+def baseline_values(df: pd.DataFrame) -> dict[str, float]:
+    """Latest indicator values computed with the original per-ticker pandas formulas, except for the Hurst exponent."""
+    close, high, low, volume = df["close"], df["high"], df["low"], df["volume"]
+    values = {"close": close.iloc[-1]}
+    for span in (8, 21, 55):
+        values[f"ema_{span}"] = close.ewm(span=span, adjust=False).mean().iloc[-1]
+
+    tr = pd.concat([high - low, abs(high - close.shift()), abs(low - close.shift())], axis=1).max(axis=1)
+    up_move, down_move = high - high.shift(), low.shift() - low
+    plus_dm = pd.Series(np.where((up_move > down_move) & (up_move > 0), up_move, 0), index=df.index)
+    minus_dm = pd.Series(np.where((down_move > up_move) & (down_move > 0), down_move, 0), index=df.index)
+    plus_di = 100 * (plus_dm.ewm(span=14).mean() / tr.ewm(span=14).mean())
+    minus_di = 100 * (minus_dm.ewm(span=14).mean() / tr.ewm(span=14).mean())
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    values.update({"adx": dx.ewm(span=14).mean().iloc[-1], "+di": plus_di.iloc[-1], "-di": minus_di.iloc[-1]})
+
+    values["z_score"] = ((close - close.rolling(50).mean()) / close.rolling(50).std()).iloc[-1]
+    values["bb_upper"] = (close.rolling(20).mean() + close.rolling(20).std() * 2).iloc[-1]
+    values["bb_lower"] = (close.rolling(20).mean() - close.rolling(20).std() * 2).iloc[-1]
+    delta = close.diff()
+    gain, loss = delta.where(delta > 0, 0).fillna(0), (-delta.where(delta < 0, 0)).fillna(0)
+    for period in (14, 28):
+        values[f"rsi_{period}"] = (100 - 100 / (1 + gain.rolling(period).mean() / loss.rolling(period).mean())).iloc[-1]
+
+    returns = close.pct_change()
+    values["mom_1m"] = returns.rolling(21).sum().iloc[-1]
+    values["mom_3m"] = returns.rolling(63).sum().iloc[-1]
+    values["mom_6m"] = returns.rolling(126).sum().iloc[-1]
+    values["volume_momentum"] = (volume / volume.rolling(21).mean()).iloc[-1]
+    hist_vol = returns.rolling(21).std() * math.sqrt(252)
+    vol_ma = hist_vol.rolling(63).mean()
+    values["hist_vol"] = hist_vol.iloc[-1]
+    values["vol_regime"] = (hist_vol / vol_ma).iloc[-1]
+    values["vol_z_score"] = ((hist_vol - vol_ma) / hist_vol.rolling(63).std()).iloc[-1]
+    values["atr_ratio"] = (tr.rolling(14).mean() / close).iloc[-1]
+    values["skew"] = returns.rolling(63).skew().iloc[-1]
+    values["kurt"] = returns.rolling(63).kurt().iloc[-1]
+
+    # Hurst differences by position; the original subtracted index-aligned slices (see original_hurst)
+    prices = close.to_numpy()
+    lags = range(2, 20)
+    tau = [max(1e-8, np.sqrt(np.std(prices[lag:] - prices[:-lag]))) for lag in lags]
+    values["hurst"] = np.polyfit(np.log(lags), np.log(tau), 1)[0]
+    return values
+
+
+def original_hurst(close: pd.Series) -> float:
+    """The original Hurst exponent, which subtracted index-aligned slices: every difference is zero."""
+    lags = range(2, 20)
+    tau = [max(1e-8, np.sqrt(np.std(np.subtract(close[lag:], close[:-lag])))) for lag in lags]
+    return np.polyfit(np.log(lags), np.log(tau), 1)[0]
+
+
+def assert_values_close(actual: dict[str, float], expected: dict[str, float]):
+    for name in INDICATORS:
+        assert actual[name] == pytest.approx(expected[name], rel=1e-7, abs=1e-9, nan_ok=True), name
+
+
+@pytest.mark.parametrize("bars", [30, 70, 300])
+def test_single_ticker_panel_matches_baseline(bars):
+    df = make_prices(bars, seed=bars)
+    assert_values_close(latest_values(compute_indicator_panel({"AAPL": df}), "AAPL"), baseline_values(df))
+
+
+def test_multi_ticker_panel_matches_each_ticker_alone():
+    # Different lengths and calendars, so the panel has to pad and right-align them
+    prices = {"AAPL": make_prices(300, seed=1), "MSFT": make_prices(180, seed=2), "NVDA": make_prices(40, seed=3).iloc[5:]}
+    panel = compute_indicator_panel(prices)
+    for ticker, df in prices.items():
+        assert_values_close(latest_values(panel, ticker), baseline_values(df))
+
+
+def test_panel_does_not_modify_its_inputs():
+    df = make_prices(100, seed=4)
+    before = df.copy()
+    compute_indicator_panel({"AAPL": df})
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_hurst_of_each_column_matches_the_series_alone():
+    close = pd.DataFrame({"AAPL": make_prices(120, seed=9)["close"], "MSFT": make_prices(120, seed=11)["close"]})
+    close.iloc[:30, 1] = np.nan  # right-aligned padding of a shorter series
+    hurst = hurst_exponents(close)
+    assert hurst["AAPL"] == pytest.approx(baseline_values(make_prices(120, seed=9))["hurst"], rel=1e-9)
+    assert hurst["MSFT"] == pytest.approx(baseline_values(make_prices(120, seed=11).iloc[30:])["hurst"], rel=1e-9)
+
+
+def test_hurst_no_longer_follows_the_original_constant():
+    close = make_prices(300, seed=10)["close"]
+    hurst = latest_values(compute_indicator_panel({"AAPL": make_prices(300, seed=10)}), "AAPL")["hurst"]
+    assert original_hurst(close) == pytest.approx(0.0, abs=1e-12)
+    # A random walk gives about 0.25: the fit is on sqrt(std), which halves the slope
+    assert 0.1 < hurst < 0.4
+
+
+@pytest.mark.parametrize("lookback_days", [30, 300])
+def test_timeline_reproduces_the_per_day_agent_output(monkeypatch, lookback_days):
+    frames = {"AAPL": make_prices(400, seed=12), "MSFT": make_prices(400, seed=13).iloc[150:]}
+    columns = {
+        ticker: PriceColumns.from_arrays(time=df.index.strftime("%Y-%m-%dT%H:%M:%SZ"), **{name: df[name].to_numpy() for name in ("open", "close", "high", "low", "volume")})
+        for ticker, df in frames.items()
+    }
+    monkeypatch.setattr(technicals, "get_prices", lambda ticker, start_date, end_date: columns[ticker].slice(start_date, end_date))
+
+    dates = pd.date_range("2024-01-02", "2024-07-31", freq="B")
+    windows = [((date - pd.Timedelta(days=lookback_days)).strftime("%Y-%m-%d"), date.strftime("%Y-%m-%d")) for date in dates]
+
+    def run_agent(start_date: str, end_date: str) -> str:
+        state = {"data": {"tickers": list(frames), "start_date": start_date, "end_date": end_date, "analyst_signals": {}}, "messages": [], "metadata": {"show_reasoning": False}}
+        return technicals.technical_analyst_agent(state)["messages"][-1].content
+
+    expected = [run_agent(*window) for window in windows]
+    try:
+        technicals.set_technical_timeline(technicals.build_technical_timeline(list(frames), windows))
+        # Every window is served from the timeline, without loading prices
+        monkeypatch.setattr(technicals, "get_prices", lambda **kwargs: pytest.fail("timeline miss"))
+        actual = [run_agent(*window) for window in windows]
+    finally:
+        technicals.set_technical_timeline(None)
+
+    assert actual == expected
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from data.kline_store import KLINE_COLUMNS, klines_to_df, missing_buckets, resample_klines
+
+HOUR = 3_600_000
+FOUR_HOURS = 4 * HOUR
+DAY = 24 * HOUR
+START = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+
+
+def make_hourly(n: int, start: int = START, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    open_time = start + np.arange(n, dtype=np.int64) * HOUR
+    open = 40_000 + rng.normal(0, 100, n).cumsum()
+    close = open + rng.normal(0, 50, n)
+    return {
+        "open_time": open_time,
+        "open": open,
+        "high": np.maximum(open, close) + rng.uniform(0, 30, n),
+        "low": np.minimum(open, close) - rng.uniform(0, 30, n),
+        "close": close,
+        "volume": rng.uniform(1, 10, n),
+        "close_time": open_time + HOUR - 1,
+        "quote_volume": rng.uniform(1e4, 1e5, n),
+        "trades": rng.integers(100, 1000, n),
+        "buy_base_volume": rng.uniform(0, 1, n),
+        "buy_quote_volume": rng.uniform(1e3, 1e4, n),
+    }
+
+
+def pandas_resample(klines, rule: str) -> pd.DataFrame:
+    df = klines_to_df(klines)
+    aggregations = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    aggregations.update({name: "sum" for name in ("volume", "quote_volume", "trades", "buy_base_volume", "buy_quote_volume")})
+    return df.resample(rule).agg(aggregations)
+
+
+def test_matches_pandas_resample_for_complete_buckets():
+    klines = make_hourly(72)
+    now_ms = START + 72 * HOUR
+    for target_ms, rule in ((FOUR_HOURS, "4h"), (DAY, "1D")):
+        resampled = resample_klines(klines, HOUR, target_ms, now_ms)
+        expected = pandas_resample(klines, rule)
+        actual = klines_to_df(resampled)
+        assert (actual["close_time"] == resampled["open_time"] + target_ms - 1).all()
+        pd.testing.assert_frame_equal(actual[expected.columns], expected, check_freq=False, check_dtype=False)
+
+
+def test_buckets_align_to_utc_even_when_the_source_starts_mid_bucket():
+    klines = make_hourly(42, start=START + 6 * HOUR)
+    resampled = resample_klines(klines, HOUR, DAY, now_ms=START + 48 * HOUR)
+    # The first day lacks its first six hours, so only the second day is emitted
+    assert list(resampled["open_time"]) == [START + DAY]
+    assert resampled["open"][0] == klines["open"][18]
+
+
+def test_buckets_with_a_gap_are_skipped_and_reported():
+    klines = make_hourly(24)
+    keep = np.ones(24, dtype=bool)
+    keep[9] = False  # 09:00 falls in the 08:00 4h bucket
+    gapped = {name: array[keep] for name, array in klines.items()}
+
+    resampled = resample_klines(gapped, HOUR, FOUR_HOURS, now_ms=START + 24 * HOUR)
+    assert START + 8 * HOUR not in resampled["open_time"]
+    assert len(resampled["open_time"]) == 5
+    assert list(missing_buckets(resampled, FOUR_HOURS, START, START + 24 * HOUR - 1)) == [START + 8 * HOUR]
+
+
+def test_open_bucket_is_emitted_once_every_candle_up_to_now_is_present():
+    klines = make_hourly(22)  # the last 4h bucket (20:00) holds 20:00 and 21:00
+    now_ms = START + 21 * HOUR + 30 * 60_000
+    resampled = resample_klines(klines, HOUR, FOUR_HOURS, now_ms)
+    assert resampled["open_time"][-1] == START + 20 * HOUR
+    assert resampled["close"][-1] == klines["close"][21]
+    assert resampled["high"][-1] == klines["high"][20:22].max()
+
+    # Without the 21:00 candle the open bucket is incomplete
+    short = {name: array[:21] for name, array in klines.items()}
+    assert resample_klines(short, HOUR, FOUR_HOURS, now_ms)["open_time"][-1] == START + 16 * HOUR
+
+
+def test_empty_input_and_full_coverage():
+    empty = {name: np.empty(0, dtype=dtype) for name, dtype in KLINE_COLUMNS.items()}
+    assert len(resample_klines(empty, HOUR, DAY, START)["open_time"]) == 0
+
+    resampled = resample_klines(make_hourly(48), HOUR, DAY, now_ms=START + 48 * HOUR)
+    assert len(missing_buckets(resampled, DAY, START, START + 2 * DAY - 1)) == 0
+    # A start inside a bucket only asks for the buckets opening after it
+    assert len(missing_buckets(resampled, DAY, START + 1, START + 3 * DAY - 1)) == 1
@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.api as api
+from data.cache import Cache
+from data.kline_store import KlineStore, klines_from_rows
+
+HOUR = 3_600_000
+NOW = int(pd.Timestamp("2026-10-14T10:30:00Z").value // 1_000_000)
+
+
+def hourly_rows(start, end, now):
+    """Binance-style hourly rows for open times in [start, end], up to the candle open at `now`."""
+    rows = []
+    for open_time in range(-(-start // HOUR) * HOUR, min(end, now // HOUR * HOUR) + 1, HOUR):
+        price = 60_000 + open_time // HOUR % 97
+        rows.append([open_time, str(price), str(price + 10), str(price - 10), str(price + 1), "2.5", open_time + HOUR - 1, "150000", 42, "1.2", "72000", "0"])
+    return rows
+
+
+class StubBinanceClient:
+    """Records each (start, end) it is asked for and serves hourly candles up to NOW."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_historical_klines(self, symbol, interval, start, end):
+        self.requests.append((start, end))
+        return hourly_rows(start, end, NOW)
+
+
+@pytest.fixture
+def crypto(monkeypatch):
+    monkeypatch.setattr(time, "time", lambda: NOW / 1000)
+    monkeypatch.setattr(api, "_cache", Cache())
+    client = api.CryptoAPI()
+    client._client = StubBinanceClient()
+    return client
+
+
+def test_unclosed_candle_is_returned_but_not_stored(crypto):
+    start, end = NOW - 5 * HOUR, NOW + HOUR
+    klines = crypto._get_klines("BTCUSDT", "1h", start, end)
+
+    open_candle = NOW // HOUR * HOUR
+    assert int(klines["open_time"][-1]) == open_candle
+    stored, covered_from = api._cache.get_klines("BTCUSDT", "1h")
+    assert int(stored["open_time"][-1]) == open_candle - HOUR
+    assert (stored["close_time"] < NOW).all()
+    assert covered_from == start
+
+
+def test_only_the_head_and_tail_are_fetched(crypto):
+    start, end = NOW - 5 * HOUR, NOW + HOUR
+    crypto._get_klines("BTCUSDT", "1h", start, end)
+    stored, _ = api._cache.get_klines("BTCUSDT", "1h")
+    first_open, last_close = int(stored["open_time"][0]), int(stored["close_time"][-1])
+
+    # An earlier start fetches only what lies before the first stored candle, and the tail
+    # resumes after the last closed one (the open candle is asked for again)
+    klines = crypto._get_klines("BTCUSDT", "1h", start - 3 * HOUR, end)
+    assert crypto._client.requests[1:] == [(start - 3 * HOUR, first_open - 1), (last_close + 1, end)]
+    assert np.array_equal(np.diff(klines["open_time"]), np.full(len(klines["open_time"]) - 1, HOUR))
+
+    # A window inside what has been requested before only needs the tail
+    crypto._get_klines("BTCUSDT", "1h", start - HOUR, end)
+    assert crypto._client.requests[3:] == [(last_close + 1, end)]
+
+
+def test_kline_store_persists_closed_runs_and_the_earliest_request(tmp_path):
+    store = KlineStore(str(tmp_path))
+    rows = hourly_rows(NOW - 6 * HOUR, NOW, NOW)
+    store.append("BTCUSDT", "1h", klines_from_rows(rows[3:-1]), covered_from=NOW - 3 * HOUR)
+    store.append("BTCUSDT", "1h", klines_from_rows(rows[:4]), covered_from=NOW - 8 * HOUR)
+
+    klines, covered_from = KlineStore(str(tmp_path)).get("BTCUSDT", "1h")
+    assert list(klines["open_time"]) == [row[0] for row in rows[:-1]]
+    assert covered_from == NOW - 8 * HOUR
+    assert KlineStore(str(tmp_path)).get("ETHUSDT", "1h") == (None, None)
@@ -0,0 +1,194 @@
+import json
+import time
+from typing import Literal
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+import llm.models
+from utils.llm import call_llm, call_llm_batched
+from utils.llm_cache import configure_llm_cache
+from utils.llm_metrics import get_llm_metrics
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Response:
+    def __init__(self, content: str):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 10, "output_tokens": 5}
+
+
+class FakeModel:
+    """Answers each invoke() with the next scripted step: a string, an exception, or a callable."""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        step = self.steps.pop(0) if len(self.steps) > 1 else self.steps[0]
+        if callable(step):
+            step = step(prompt)
+        if isinstance(step, BaseException):
+            raise step
+        return Response(step)
+
+
+BULLISH = json.dumps({"signal": "bullish", "confidence": 80.0})
+
+
+def sleep_then(seconds: float, content: str = BULLISH):
+    def step(prompt):
+        time.sleep(seconds)
+        return content
+
+    return step
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """Serve call_llm's models from a name -> FakeModel dict, with no backoff, caching or failover configured."""
+    fakes = {}
+    monkeypatch.setattr(llm.models, "get_model", lambda model_name, model_provider, **params: fakes[model_name])
+    monkeypatch.setenv("LLM_RETRY_BACKOFF", "0")
+    monkeypatch.delenv("LLM_FALLBACK_MODELS", raising=False)
+    monkeypatch.delenv("LLM_HEDGE_PERCENTILE", raising=False)
+    configure_llm_cache(None)
+    get_llm_metrics().reset()
+    return fakes
+
+
+def call(**kwargs):
+    return call_llm(prompt="Analyze AAPL", model_name="gpt-4o", model_provider="OpenAI", pydantic_model=Signal, agent_name="test_agent", **kwargs)
+
+
+def test_retryable_errors_are_retried(models):
+    models["gpt-4o"] = FakeModel(StatusError(429), StatusError(503), "not json", BULLISH)
+    assert call() == Signal(signal="bullish", confidence=80.0)
+    assert len(models["gpt-4o"].prompts) == 4
+
+    totals = get_llm_metrics().totals()
+    assert totals["retries"] == 3 and totals["failures"] == 0
+    # Only the two requests that got an answer (the malformed one and the last) used tokens
+    assert totals["prompt_tokens"] == 20 and totals["completion_tokens"] == 10
+
+
+def test_non_retryable_error_fails_at_once(models):
+    models["gpt-4o"] = FakeModel(StatusError(400))
+    assert call(default_factory=lambda: Signal(signal="neutral", confidence=0.0)).signal == "neutral"
+    assert len(models["gpt-4o"].prompts) == 1
+    assert get_llm_metrics().totals()["failures"] == 1
+
+
+def test_exhausted_retries_raise_the_last_error(models):
+    models["gpt-4o"] = FakeModel(StatusError(500))
+    with pytest.raises(StatusError):
+        call(max_retries=2)
+    assert len(models["gpt-4o"].prompts) == 3
+
+
+def test_slow_request_times_out_and_is_retried(models, monkeypatch):
+    monkeypatch.setenv("LLM_REQUEST_TIMEOUT", "0.2")
+    models["gpt-4o"] = FakeModel(sleep_then(1.0), BULLISH)
+    started = time.monotonic()
+    assert call().signal == "bullish"
+    assert time.monotonic() - started < 0.9
+    assert get_llm_metrics().totals()["retries"] == 1
+
+
+def test_call_deadline_bounds_the_whole_call(models, monkeypatch):
+    monkeypatch.setenv("LLM_REQUEST_TIMEOUT", "0.2")
+    models["gpt-4o"] = FakeModel(sleep_then(1.0))
+    started = time.monotonic()
+    result = call(max_retries=10, timeout=0.5, default_factory=lambda: Signal(signal="neutral", confidence=0.0))
+    assert time.monotonic() - started < 0.9
+    assert result.signal == "neutral"
+    assert len(models["gpt-4o"].prompts) <= 3
+
+
+def test_fallback_model_answers_after_the_primary_fails(models, monkeypatch):
+    monkeypatch.setenv("LLM_FALLBACK_MODELS", "gpt-4o, gpt-4o-mini")
+    models["gpt-4o"] = FakeModel(StatusError(400))
+    models["gpt-4o-mini"] = FakeModel(json.dumps({"signal": "bearish", "confidence": 55.0}))
+
+    assert call().signal == "bearish"
+    assert len(models["gpt-4o"].prompts) == 1
+    [row] = get_llm_metrics().summary()
+    assert row["model"] == "gpt-4o-mini" and row["fallbacks"] == 1
+
+
+def test_no_failover_without_fallback_models(models):
+    models["gpt-4o"] = FakeModel(StatusError(400))
+    models["gpt-4o-mini"] = FakeModel(BULLISH)
+    with pytest.raises(StatusError):
+        call()
+    assert models["gpt-4o-mini"].prompts == []
+
+
+class Signals(BaseModel):
+    signals: dict[str, Signal]
+
+
+NEUTRAL = Signal(signal="neutral", confidence=0.0)
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+
+def render_prompt(batch: dict):
+    return ChatPromptTemplate.from_messages([("human", "Signals for {tickers}:\n{analysis_data}")]).invoke({"tickers": ", ".join(batch), "analysis_data": json.dumps(batch)})
+
+
+def batched(**kwargs):
+    return call_llm_batched(
+        analysis_data={ticker: {"score": i} for i, ticker in enumerate(TICKERS)},
+        render_prompt=render_prompt,
+        model_name="gpt-4o",
+        model_provider="OpenAI",
+        container_model=Signals,
+        agent_name="test_agent",
+        default_factory=lambda: NEUTRAL,
+        **kwargs,
+    )
+
+
+def answer_for(tickers):
+    def step(prompt):
+        asked = [ticker for ticker in tickers if ticker in prompt.to_string()]
+        return json.dumps({"signals": {ticker: {"signal": "bullish", "confidence": 70.0} for ticker in asked}})
+
+    return step
+
+
+def test_batched_call_defaults_the_tickers_missing_from_the_answer(models):
+    # The model leaves out NVDA, and answers for a ticker that was never asked about
+    models["gpt-4o"] = FakeModel(answer_for(["AAPL", "MSFT", "TSLA", "AMZN"]))
+    outputs = batched()
+    assert len(models["gpt-4o"].prompts) == 1
+    assert list(outputs) == TICKERS
+    assert outputs["NVDA"] == NEUTRAL
+    assert all(outputs[ticker].signal == "bullish" for ticker in ("AAPL", "MSFT", "TSLA"))
+
+
+def test_failed_batch_defaults_only_its_own_tickers(models):
+    def step(prompt):
+        if "AAPL" in prompt.to_string():
+            raise StatusError(400)
+        return answer_for(TICKERS)(prompt)
+
+    models["gpt-4o"] = FakeModel(step)
+    # A budget this small puts every ticker in a request of its own
+    outputs = batched(token_budget=1)
+    assert len(models["gpt-4o"].prompts) == 4
+    assert outputs["AAPL"] == NEUTRAL
+    assert all(outputs[ticker].signal == "bullish" for ticker in ("MSFT", "NVDA", "TSLA"))
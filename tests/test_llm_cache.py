@@ -0,0 +1,109 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from utils import llm_cache
+from utils.llm_cache import LLMCache, get_llm_cache
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+class OtherSignal(BaseModel):
+    signal: str
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable wall clock for the cache's timestamps."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_key_covers_model_provider_prompt_and_schema():
+    key = LLMCache.key("gpt-4o", "OpenAI", "prompt", Signal)
+    assert key == LLMCache.key("gpt-4o", "OpenAI", "prompt", Signal)
+    assert key != LLMCache.key("gpt-4o-mini", "OpenAI", "prompt", Signal)
+    assert key != LLMCache.key("gpt-4o", "Groq", "prompt", Signal)
+    assert key != LLMCache.key("gpt-4o", "OpenAI", "prompt ", Signal)
+    assert key != LLMCache.key("gpt-4o", "OpenAI", "prompt", OtherSignal)
+
+
+def test_responses_persist_across_instances(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    cache.set("k", "gpt-4o", "OpenAI", {"signal": "bullish", "confidence": 80.0})
+    cache.close()
+    assert LLMCache(str(tmp_path / "llm.sqlite")).get("k") == {"signal": "bullish", "confidence": 80.0}
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), ttl=60)
+    cache.set("k", "gpt-4o", "OpenAI", {"signal": "bullish"})
+    clock.value += 60
+    assert cache.get("k") == {"signal": "bullish"}
+    clock.value += 1
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    for key in ("a", "b"):
+        clock.value += 1
+        cache.set(key, "gpt-4o", "OpenAI", {"key": key})
+    # Reading "a" makes "b" the least recently used
+    clock.value += 1
+    cache.get("a")
+    clock.value += 1
+    cache.set("c", "gpt-4o", "OpenAI", {"key": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"key": "a"} and cache.get("c") == {"key": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stats_count_hits_misses_and_entries(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "evictions": 0, "entries": 0}
+    cache.get("k")
+    cache.set("k", "gpt-4o", "OpenAI", {})
+    cache.get("k")
+    cache.get("k")
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "evictions": 0, "entries": 1}
+
+
+def test_concurrent_first_use_sets_up_one_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("HEDGE_FUND_LLM_CACHE", str(tmp_path / "llm.sqlite"))
+    monkeypatch.setattr(llm_cache, "_llm_cache", None)
+    monkeypatch.setattr(llm_cache, "_llm_cache_configured", False)
+    created = []
+    original_init = llm_cache.LLMCache.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(llm_cache.LLMCache, "__init__", counting_init)
+    gate = threading.Barrier(16, timeout=5)
+    caches = []
+
+    def first_call():
+        gate.wait()
+        caches.append(get_llm_cache())
+
+    threads = [threading.Thread(target=first_call) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert len(created) == 1
+        assert all(cache is created[0] for cache in caches)
+    finally:
+        llm_cache.configure_llm_cache(None)
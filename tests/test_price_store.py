@@ -0,0 +1,154 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.api as api
+from data.cache import Cache
+from data.models import Price
+from data.price_store import PriceColumns, PriceStore, load_columns, missing_ranges, save_columns
+from tools.api import prices_to_df, prices_to_view_df
+
+
+def make_prices(days: list[str]) -> PriceColumns:
+    n = len(days)
+    return PriceColumns.from_arrays(
+        time=[f"{day}T05:00:00Z" for day in days],
+        open=np.arange(n, dtype=float),
+        close=np.arange(n, dtype=float) + 0.5,
+        high=np.arange(n, dtype=float) + 1,
+        low=np.arange(n, dtype=float),
+        volume=np.arange(n) * 100,
+    )
+
+
+def test_prices_round_trip_through_memory_mapped_columns(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append("AAPL", make_prices(["2024-01-02", "2024-01-03"]))
+    store.append("AAPL", make_prices(["2024-01-03", "2024-01-04"]))
+
+    prices = PriceStore(str(tmp_path)).get("AAPL")
+    assert isinstance(prices.epoch, np.memmap)
+    assert [price.time for price in prices] == ["2024-01-02T05:00:00Z", "2024-01-03T05:00:00Z", "2024-01-04T05:00:00Z"]
+    # Where both appends hold a day, the later one wins
+    assert prices[1].open == 0.0
+
+
+def test_overwrite_swaps_in_a_whole_new_set(tmp_path):
+    old = {"epoch": np.arange(3), "close": np.arange(3, dtype=float)}
+    save_columns(str(tmp_path), old)
+    mapped = load_columns(str(tmp_path), ["epoch", "close"], marker="epoch")
+
+    save_columns(str(tmp_path), {"epoch": np.arange(5), "close": np.arange(5, dtype=float) * 2})
+    loaded = load_columns(str(tmp_path), ["epoch", "close"], marker="epoch")
+    assert len(loaded["epoch"]) == len(loaded["close"]) == 5
+    # Arrays mapped before the overwrite still read the old set, and no staging directories are left behind
+    assert list(mapped["close"]) == [0.0, 1.0, 2.0]
+    assert sorted(os.listdir(tmp_path)) == ["columns"]
+
+
+def test_prices_to_df_matches_the_list_of_price_path(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append("AAPL", make_prices(["2024-01-02", "2024-01-03", "2024-01-04"]))
+    columns = store.get("AAPL")
+
+    expected = prices_to_df([Price(**price.model_dump()) for price in columns])
+    df = prices_to_df(columns)
+    assert str(df.index.tz) == "UTC"
+    pd.testing.assert_frame_equal(df[expected.columns], expected, check_freq=False)
+
+
+def test_prices_to_df_returns_a_copy_the_caller_may_modify(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append("AAPL", make_prices(["2024-01-02", "2024-01-03"]))
+    columns = store.get("AAPL")
+
+    df = prices_to_df(columns)
+    df["close"] *= 2
+    df["sma"] = df["close"].rolling(2).mean()
+    assert list(prices_to_df(columns)["close"]) == [0.5, 1.5]
+
+    view = prices_to_view_df(columns)
+    assert list(view.columns) == ["open", "close", "high", "low", "volume"]
+    assert list(view["close"]) == [0.5, 1.5]
+
+
+@pytest.mark.parametrize(
+    "coverage, expected",
+    [
+        ([], [("2024-01-01", "2024-01-31")]),
+        ([("2024-01-01", "2024-01-31")], []),
+        ([("2023-12-01", "2024-02-28")], []),
+        ([("2024-01-10", "2024-01-20")], [("2024-01-01", "2024-01-09"), ("2024-01-21", "2024-01-31")]),
+        ([("2024-01-01", "2024-01-05"), ("2024-01-06", "2024-01-31")], []),
+        ([("2024-01-20", "2024-01-25"), ("2024-01-03", "2024-01-04")], [("2024-01-01", "2024-01-02"), ("2024-01-05", "2024-01-19"), ("2024-01-26", "2024-01-31")]),
+        ([("2023-01-01", "2023-12-31"), ("2024-03-01", "2024-03-31")], [("2024-01-01", "2024-01-31")]),
+    ],
+)
+def test_missing_ranges(coverage, expected):
+    assert missing_ranges(coverage, "2024-01-01", "2024-01-31") == expected
+
+
+def test_coverage_merges_and_persists(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.add_coverage("AAPL", "2024-01-01", "2024-01-10")
+    store.add_coverage("AAPL", "2024-01-11", "2024-01-20")
+    store.add_coverage("AAPL", "2024-02-01", "2024-02-05")
+    assert store.get_coverage("AAPL") == [("2024-01-01", "2024-01-20"), ("2024-02-01", "2024-02-05")]
+
+    reopened = PriceStore(str(tmp_path))
+    assert reopened.get_coverage("AAPL") == [("2024-01-01", "2024-01-20"), ("2024-02-01", "2024-02-05")]
+    assert reopened.missing_ranges("AAPL", "2024-01-15", "2024-02-10") == [("2024-01-21", "2024-01-31"), ("2024-02-06", "2024-02-10")]
+
+
+@pytest.fixture
+def fetch_log(monkeypatch):
+    """Route get_prices through a fresh memory-only cache and a fake API that records each range it is asked for."""
+    calls = []
+
+    def fake_fetch(ticker, start_date, end_date):
+        calls.append((start_date, end_date))
+        days = [str(day) for day in np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1) if np.is_busday(day)]
+        return make_prices(days)
+
+    monkeypatch.setattr(api, "_cache", Cache())
+    monkeypatch.setattr(api, "_fetch_prices", fake_fetch)
+    return calls
+
+
+def test_get_prices_fetches_only_uncovered_ranges(fetch_log):
+    first = api.get_prices("AAPL", "2024-01-10", "2024-01-20")
+    assert fetch_log == [("2024-01-10", "2024-01-20")]
+    assert first[0].time.startswith("2024-01-10") and first[-1].time.startswith("2024-01-19")
+
+    prices = api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    assert fetch_log[1:] == [("2024-01-01", "2024-01-09"), ("2024-01-21", "2024-01-31")]
+    assert len(prices) == np.busday_count("2024-01-01", "2024-02-01")
+
+    api.get_prices("AAPL", "2024-01-05", "2024-01-25")
+    assert len(fetch_log) == 3
+
+
+def test_empty_range_is_covered_and_not_refetched(fetch_log):
+    # A weekend holds no bars; it must still count as fetched
+    assert len(api.get_prices("AAPL", "2024-01-06", "2024-01-07")) == 0
+    api.get_prices("AAPL", "2024-01-06", "2024-01-07")
+    assert fetch_log == [("2024-01-06", "2024-01-07")]
+
+
+def test_range_including_today_is_reused_until_ttl_expires(fetch_log, monkeypatch):
+    today = datetime.now(timezone.utc).date()
+    start, end = (today - timedelta(days=10)).isoformat(), today.isoformat()
+
+    # With no TTL today is fetched again on every call; the complete days stay covered
+    monkeypatch.setattr(api, "PARTIAL_PRICES_TTL", 0)
+    api.get_prices("AAPL", start, end)
+    api.get_prices("AAPL", start, end)
+    assert fetch_log == [(start, end), (end, end)]
+
+    monkeypatch.setattr(api, "PARTIAL_PRICES_TTL", 300)
+    api.get_prices("AAPL", start, end)
+    api.get_prices("AAPL", start, end)
+    assert fetch_log[2:] == [(end, end)]
@@ -0,0 +1,146 @@
+import time
+
+import pandas as pd
+import pytest
+
+import tools.api as api
+from data.cache import Cache
+from tools.http_client import get_http_client
+from tools.recorder import DataRecorder, ReplayMissError, configure_data_mode
+
+PRICES = {
+    "ticker": "AAPL",
+    "prices": [
+        {"time": "2024-01-02T05:00:00Z", "open": 187.15, "close": 185.64, "high": 188.44, "low": 183.89, "volume": 82488700},
+        {"time": "2024-01-03T05:00:00Z", "open": 184.22, "close": 184.25, "high": 185.88, "low": 183.43, "volume": 58414500},
+    ],
+}
+
+
+def test_replay_returns_exactly_what_was_recorded(tmp_path):
+    path = str(tmp_path / "archive.sqlite")
+    payload = {"nested": {"values": [1, 2.5, None, "x"]}, "unicode": "比特币"}
+    recorder = DataRecorder("record", path)
+    assert recorder.call("binance", {"method": "get_ticker", "args": []}, lambda: payload) == payload
+    recorder.close()
+
+    replayer = DataRecorder("replay", path)
+    assert replayer.call("binance", {"method": "get_ticker", "args": []}, lambda: pytest.fail("replay must not fetch")) == payload
+    replayer.close()
+
+
+def test_request_key_ignores_dict_order_but_not_source(tmp_path):
+    path = str(tmp_path / "archive.sqlite")
+    recorder = DataRecorder("record", path)
+    recorder.call("financialdatasets", {"url": "u", "params": {"a": 1, "b": 2}}, lambda: {"ok": 1})
+    recorder.close()
+
+    replayer = DataRecorder("replay", path)
+    assert replayer.call("financialdatasets", {"params": {"b": 2, "a": 1}, "url": "u"}, lambda: None) == {"ok": 1}
+    with pytest.raises(ReplayMissError):
+        replayer.call("binance", {"url": "u", "params": {"a": 1, "b": 2}}, lambda: None)
+    with pytest.raises(ReplayMissError):
+        replayer.call("financialdatasets", {"url": "u", "params": {"a": 1, "b": 3}}, lambda: None)
+    replayer.close()
+
+
+def test_live_mode_always_fetches():
+    recorder = DataRecorder()
+    assert recorder.call("binance", {}, lambda: 1) == 1
+    assert recorder.call("binance", {}, lambda: 2) == 2
+
+
+@pytest.mark.parametrize("mode", ["record", "replay"])
+def test_archive_modes_need_a_path(mode):
+    with pytest.raises(ValueError):
+        DataRecorder(mode)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+def test_replayed_run_reproduces_the_recorded_prices(tmp_path, monkeypatch):
+    path = str(tmp_path / "archive.sqlite")
+    session = get_http_client().session
+    try:
+        configure_data_mode("record", path)
+        monkeypatch.setattr(api, "_cache", Cache())
+        monkeypatch.setattr(session, "request", lambda *args, **kwargs: FakeResponse(PRICES))
+        recorded = api.prices_to_df(api.get_prices("AAPL", "2024-01-01", "2024-01-05"))
+
+        configure_data_mode("replay", path)
+        monkeypatch.setattr(api, "_cache", Cache())
+        monkeypatch.setattr(session, "request", lambda *args, **kwargs: pytest.fail("replay must not touch the network"))
+        replayed = api.prices_to_df(api.get_prices("AAPL", "2024-01-01", "2024-01-05"))
+    finally:
+        configure_data_mode("live")
+
+    assert len(recorded) == 2
+    pd.testing.assert_frame_equal(replayed, recorded)
+
+
+HOUR = 3_600_000
+
+
+class FakeBinanceClient:
+    """Serves hourly candles up to the current (possibly still open) one, from a settable clock."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.requests = 0
+
+    def get_historical_klines(self, symbol, interval, start, end):
+        self.requests += 1
+        assert interval == "1h"
+        last_open = min(end, self.clock() // HOUR * HOUR)
+        rows = []
+        for open_time in range(-(-start // HOUR) * HOUR, last_open + 1, HOUR):
+            price = 60_000 + open_time // HOUR % 97
+            rows.append([open_time, str(price), str(price + 10), str(price - 10), str(price + 1), "2.5", open_time + HOUR - 1, "150000", 42, "1.2", "72000", "0"])
+        return rows
+
+
+def test_replayed_crypto_run_keeps_the_recorded_clock(tmp_path, monkeypatch):
+    path = str(tmp_path / "archive.sqlite")
+    now = {"ms": int(pd.Timestamp("2026-10-14T10:30:00Z").value // 1_000_000)}
+    monkeypatch.setattr(time, "time", lambda: now["ms"] / 1000)
+    client = FakeBinanceClient(lambda: now["ms"])
+    try:
+        configure_data_mode("record", path)
+        monkeypatch.setattr(api, "_cache", Cache())
+        crypto = api.CryptoAPI()
+        crypto._client = client
+        recorded = crypto.get_crypto_prices_multi("BTCUSDT", "2026-10-05", "2026-10-14")
+
+        # A day later, on a fresh cache, with a client that must not be reached
+        configure_data_mode("replay", path)
+        now["ms"] += 24 * HOUR
+        monkeypatch.setattr(api, "_cache", Cache())
+        crypto = api.CryptoAPI()
+        crypto._client = FakeBinanceClient(lambda: pytest.fail("replay must not touch the network"))
+        replayed = crypto.get_crypto_prices_multi("BTCUSDT", "2026-10-05", "2026-10-14")
+    finally:
+        configure_data_mode("live")
+
+    assert client.requests == 1
+    assert len(recorded["1d"]) == 10 and recorded["1d"].index[-1] == pd.Timestamp("2026-10-14")
+    for interval in ("1h", "4h", "1d"):
+        pd.testing.assert_frame_equal(replayed[interval], recorded[interval])
+
+
+def test_replay_miss_is_raised_not_swallowed(tmp_path):
+    path = str(tmp_path / "archive.sqlite")
+    DataRecorder("record", path).close()
+    try:
+        configure_data_mode("replay", path)
+        with pytest.raises(ReplayMissError):
+            api.CryptoAPI().get_crypto_prices("BTCUSDT", "2026-10-05", "2026-10-14", "1d")
+    finally:
+        configure_data_mode("live")
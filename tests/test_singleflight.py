@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools.singleflight import SingleFlight, coalesce
+
+
+def test_concurrent_calls_with_one_key_share_a_single_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["row"]
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flight.do, "AAPL", fetch) for _ in range(5)]
+        # The leader holds the key until released, so every caller joins its flight
+        time.sleep(0.2)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert results == [["row"]] * 5
+    # Every caller owns its list
+    results[0].append("mutated")
+    assert results[1] == ["row"]
+    assert flight._calls == {}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+    flight.do("k", calls.append, 1)
+    flight.do("k", calls.append, 2)
+    assert calls == [1, 2]
+
+
+def test_errors_reach_every_waiting_caller_and_clear_the_key():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "k", fail)
+        started.wait(5)
+        follower = executor.submit(flight.do, "k", fail)
+        time.sleep(0.2)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_coalesce_keys_on_bound_arguments():
+    calls = []
+    gate = threading.Barrier(4, timeout=5)
+
+    @coalesce
+    def fetch(ticker, end_date, limit=10):
+        calls.append((ticker, end_date, limit))
+        time.sleep(0.2)
+        return [ticker]
+
+    def call(*args, **kwargs):
+        gate.wait()
+        return fetch(*args, **kwargs)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(call, "AAPL", "2024-01-31"),
+            executor.submit(call, "AAPL", end_date="2024-01-31", limit=10),
+            executor.submit(call, ticker="AAPL", end_date="2024-01-31"),
+            executor.submit(call, "MSFT", "2024-01-31"),
+        ]
+        results = [future.result() for future in futures]
+
+    assert results == [["AAPL"], ["AAPL"], ["AAPL"], ["MSFT"]]
+    assert sorted(calls) == [("AAPL", "2024-01-31", 10), ("MSFT", "2024-01-31", 10)]
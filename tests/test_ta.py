@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import ta
+
+
+def make_ohlcv(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(rng.normal(0, 0.01, n).cumsum())
+    high = close * (1 + rng.uniform(0, 0.01, n))
+    low = close * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.uniform(1e3, 1e5, n)
+    return high, low, close, volume
+
+
+def ta_ema(x, period: int, first: int) -> np.ndarray:
+    """TA-Lib's EMA: seeded with the SMA of the `period` values ending at index `first`."""
+    out = np.full(len(x), np.nan)
+    value = np.mean(x[first - period + 1 : first + 1])
+    out[first] = value
+    for i in range(first + 1, len(x)):
+        value += (x[i] - value) * 2 / (period + 1)
+        out[i] = value
+    return out
+
+
+def wilder_rsi(close, period: int = 14) -> np.ndarray:
+    diff = np.diff(close)
+    out = np.full(len(close), np.nan)
+    gain = np.mean(np.clip(diff[:period], 0, None))
+    loss = np.mean(np.clip(-diff[:period], 0, None))
+    out[period] = 100 * gain / (gain + loss)
+    for i in range(period, len(diff)):
+        gain = (gain * (period - 1) + max(diff[i], 0)) / period
+        loss = (loss * (period - 1) + max(-diff[i], 0)) / period
+        out[i + 1] = 100 * gain / (gain + loss)
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    return np.r_[np.nan, [max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])) for i in range(1, len(close))]]
+
+
+def wilder_atr(high, low, close, period: int = 14) -> np.ndarray:
+    tr = true_range(high, low, close)
+    out = np.full(len(close), np.nan)
+    value = np.mean(tr[1 : period + 1])
+    out[period] = value
+    for i in range(period + 1, len(close)):
+        value = (value * (period - 1) + tr[i]) / period
+        out[i] = value
+    return out
+
+
+def wilder_adx(high, low, close, period: int = 14) -> np.ndarray:
+    tr = true_range(high, low, close)
+    up = np.r_[0.0, np.diff(high)]
+    down = np.r_[0.0, -np.diff(low)]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+
+    tr_sum, plus_sum, minus_sum = tr[1:period].sum(), plus_dm[1:period].sum(), minus_dm[1:period].sum()
+    dx = np.full(len(close), np.nan)
+    for i in range(period, len(close)):
+        tr_sum += tr[i] - tr_sum / period
+        plus_sum += plus_dm[i] - plus_sum / period
+        minus_sum += minus_dm[i] - minus_sum / period
+        plus_di, minus_di = 100 * plus_sum / tr_sum, 100 * minus_sum / tr_sum
+        dx[i] = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+
+    out = np.full(len(close), np.nan)
+    value = np.mean(dx[period : 2 * period])
+    out[2 * period - 1] = value
+    for i in range(2 * period, len(close)):
+        value = (value * (period - 1) + dx[i]) / period
+        out[i] = value
+    return out
+
+
+def assert_matches(actual, expected, rtol: float = 1e-9):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=rtol, equal_nan=True)
+
+
+def test_sma_and_bbands_match_pandas():
+    _, _, close, volume = make_ohlcv(100)
+    assert_matches(ta.sma(volume, 20), pd.Series(volume).rolling(20).mean().to_numpy())
+
+    upper, middle, lower = ta.bbands(close)
+    mean = pd.Series(close).rolling(5).mean().to_numpy()
+    std = pd.Series(close).rolling(5).std(ddof=0).to_numpy()
+    assert_matches(middle, mean)
+    assert_matches(upper, mean + 2 * std, rtol=1e-7)
+    assert_matches(lower, mean - 2 * std, rtol=1e-7)
+
+
+def test_macd_matches_seeded_emas():
+    _, _, close, _ = make_ohlcv(120)
+    line, signal, hist = ta.macd(close)
+    expected_line = ta_ema(close, 12, 25) - ta_ema(close, 26, 25)
+    expected_signal = np.full(len(close), np.nan)
+    expected_signal[25:] = ta_ema(expected_line[25:], 9, 8)
+    expected_line[:33] = np.nan
+
+    assert_matches(line, expected_line)
+    assert_matches(signal, expected_signal)
+    assert_matches(hist, expected_line - expected_signal, rtol=1e-7)
+
+
+def test_rsi_atr_adx_match_wilder_smoothing():
+    high, low, close, _ = make_ohlcv(150, seed=1)
+    assert_matches(ta.rsi(close), wilder_rsi(close))
+    assert_matches(ta.atr(high, low, close), wilder_atr(high, low, close))
+    assert_matches(ta.adx(high, low, close), wilder_adx(high, low, close))
+
+
+def test_obv_accumulates_signed_volume():
+    close = np.array([10.0, 11.0, 11.0, 10.5, 12.0])
+    volume = np.array([100.0, 200.0, 300.0, 400.0, 500.0])
+    np.testing.assert_array_equal(ta.obv(close, volume), [100.0, 300.0, 300.0, -100.0, 400.0])
+
+
+def test_known_values():
+    rising = np.arange(1.0, 31.0)
+    assert np.all(ta.rsi(rising)[14:] == 100.0)
+    assert np.all(ta.rsi(np.full(30, 5.0))[14:] == 0.0)
+
+    # Bars of constant range without gaps have that range as their true range
+    close = np.full(30, 100.0)
+    np.testing.assert_allclose(ta.atr(close + 1, close - 1, close)[14:], 2.0)
+    upper, middle, lower = ta.bbands(close)
+    np.testing.assert_array_equal(upper[4:], middle[4:])
+    np.testing.assert_array_equal(lower[4:], middle[4:])
+
+
+def test_series_shorter_than_the_lookback_are_nan():
+    high, low, close, volume = make_ohlcv(10)
+    values = ta.indicator_set(high, low, close, volume, use_talib=False)
+    # Only OBV and the 5-bar Bollinger Bands have enough bars
+    assert sorted(name for name, value in values.items() if not np.isnan(value).all()) == ["bb_lower", "bb_middle", "bb_upper", "obv"]
+
+
+def test_batch_rows_match_each_series_alone():
+    series = [make_ohlcv(n, seed=n) for n in (200, 60, 35)]
+    batch = {name: ta.stack_left([s[i] for s in series]) for i, name in enumerate(("high", "low", "close", "volume"))}
+    values = ta.indicator_set(**batch, use_talib=False)
+    for row, (high, low, close, volume) in enumerate(series):
+        alone = ta.indicator_set(high, low, close, volume, use_talib=False)
+        for name, expected in alone.items():
+            np.testing.assert_array_equal(values[name][row, : len(close)], expected[0], err_msg=name)
+            assert np.isnan(values[name][row, len(close) :]).all(), name
+
+
+def test_numpy_matches_talib():
+    pytest.importorskip("talib")
+    high, low, close, volume = make_ohlcv(300, seed=2)
+    expected = ta.indicator_set(high, low, close, volume, use_talib=True)
+    actual = ta.indicator_set(high, low, close, volume, use_talib=False)
+    for name in expected:
+        assert_matches(actual[name][0], expected[name][0], rtol=1e-10)